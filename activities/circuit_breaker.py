@@ -0,0 +1,218 @@
+"""
+Circuit breaker cho các dependency bên ngoài mà activities gọi tới
+(inventory service, payment gateway, order service).
+
+Mỗi dependency có một breaker dùng chung trong worker process:
+    CLOSED     gọi bình thường, ghi nhận tỷ lệ lỗi trong cửa sổ thời gian trượt
+    OPEN       tỷ lệ lỗi vượt ngưỡng -> từ chối ngay bằng CircuitOpenError
+    HALF_OPEN  hết open_seconds -> cho một số lượt gọi thử; thành công thì CLOSED, lỗi thì OPEN lại
+
+CircuitOpenError là ApplicationError có type riêng và retryable, nên RetryPolicy của
+workflow sẽ backoff thay vì để activity chiếm slot chờ hết timeout. ServiceRequestError
+(4xx, dependency từ chối request vì lý do nghiệp vụ) cho thấy dependency vẫn trả lời,
+nên không tính là lỗi.
+
+Cấu hình qua biến môi trường (áp dụng cho mọi breaker):
+    CIRCUIT_BREAKER_FAILURE_RATE     ngưỡng tỷ lệ lỗi (mặc định 0.5)
+    CIRCUIT_BREAKER_WINDOW_SECONDS   độ dài cửa sổ tính tỷ lệ lỗi (mặc định 30)
+    CIRCUIT_BREAKER_MIN_CALLS        số lượt gọi tối thiểu trong cửa sổ trước khi mở (mặc định 10)
+    CIRCUIT_BREAKER_OPEN_SECONDS     thời gian giữ trạng thái OPEN (mặc định 15)
+"""
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Deque, Dict, List
+
+from temporalio.exceptions import ApplicationError
+
+from integrations.http import ServiceRequestError
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_OPEN_ERROR_TYPE = "CircuitOpenError"
+
+
+class CircuitState(str, Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitOpenError(ApplicationError):
+    """Raised instead of calling a dependency whose breaker is open. Retryable."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(
+            f"Circuit breaker '{name}' is open, retry in {retry_in:.1f}s",
+            type=CIRCUIT_OPEN_ERROR_TYPE,
+            non_retryable=False,
+        )
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        window_seconds: float = 30.0,
+        minimum_calls: int = 10,
+        open_seconds: float = 15.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_seconds = window_seconds
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        # Bucket 1 giây: [second, successes, failures]
+        self._buckets: Deque[List[int]] = deque()
+
+        # Metrics
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _bucket(self, now: float) -> List[int]:
+        second = int(now)
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        self._trim(now)
+        return self._buckets[-1]
+
+    def _trim(self, now: float):
+        cutoff = now - self.window_seconds
+        while self._buckets and self._buckets[0][0] < cutoff:
+            self._buckets.popleft()
+
+    def _window_counts(self, now: float):
+        self._trim(now)
+        successes = sum(b[1] for b in self._buckets)
+        failures = sum(b[2] for b in self._buckets)
+        return successes, failures
+
+    def failure_rate(self) -> float:
+        successes, failures = self._window_counts(time.monotonic())
+        total = successes + failures
+        return failures / total if total else 0.0
+
+    def _transition(self, state: CircuitState):
+        if self.state != state:
+            logger.warning(f"Circuit breaker '{self.name}': {self.state.value} -> {state.value}")
+            self.state = state
+
+    def before_call(self):
+        """Raises CircuitOpenError if the call must not go through."""
+        now = time.monotonic()
+        if self.state == CircuitState.OPEN:
+            retry_in = self._opened_at + self.open_seconds - now
+            if retry_in > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, retry_in)
+            self._transition(CircuitState.HALF_OPEN)
+            self._half_open_calls = 0
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, 0.0)
+            self._half_open_calls += 1
+        self.calls += 1
+
+    def record_success(self):
+        self.successes += 1
+        if self.state == CircuitState.HALF_OPEN:
+            self._buckets.clear()
+            self._transition(CircuitState.CLOSED)
+            return
+        self._bucket(time.monotonic())[1] += 1
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == CircuitState.OPEN:
+            # Lời gọi bắt đầu trước khi breaker mở và lỗi sau đó: không mở lại (không kéo dài
+            # thời gian mở, không đếm thêm một lần mở)
+            return
+        now = time.monotonic()
+        if self.state == CircuitState.HALF_OPEN:
+            self._open(now)
+            return
+        self._bucket(now)[2] += 1
+        successes, failures = self._window_counts(now)
+        total = successes + failures
+        if total >= self.minimum_calls and failures / total >= self.failure_rate_threshold:
+            self._open(now)
+
+    def _open(self, now: float):
+        self._opened_at = now
+        self.times_opened += 1
+        self._transition(CircuitState.OPEN)
+
+    @asynccontextmanager
+    async def guard(self):
+        """
+        Wraps a call to the dependency: rejects it while open, and records an
+        exception as a failure and a normal exit or a ServiceRequestError as a success.
+        """
+        self.before_call()
+        try:
+            yield
+        except ServiceRequestError:
+            # Dependency đã trả lời (4xx nghiệp vụ): không mở breaker vì request sai
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Bị cancel giữa chừng: không tính là lỗi, trả lại lượt gọi thử
+            self.abandon_call()
+            raise
+        self.record_success()
+
+    def abandon_call(self):
+        if self.state == CircuitState.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def metrics(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "failure_rate": self.failure_rate(),
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "times_opened": self.times_opened,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Returns the process-wide breaker for a dependency, creating it on first use."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name,
+            failure_rate_threshold=float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5")),
+            window_seconds=float(os.getenv("CIRCUIT_BREAKER_WINDOW_SECONDS", "30")),
+            minimum_calls=int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "10")),
+            open_seconds=float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "15")),
+        )
+        _breakers[name] = breaker
+    return breaker
+
+
+def all_breaker_metrics() -> List[dict]:
+    return [breaker.metrics() for breaker in _breakers.values()]
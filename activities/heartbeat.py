@@ -0,0 +1,31 @@
+"""
+Heartbeat helpers cho activities.
+
+Activity chỉ nhận được yêu cầu cancel (và server chỉ phát hiện worker chết)
+thông qua heartbeat, nên các bước chờ lâu trong activity dùng sleep_with_heartbeat
+thay cho asyncio.sleep. SDK tự throttle heartbeat (theo heartbeat_timeout của
+workflow), nên gọi heartbeat thường xuyên không tốn thêm RPC.
+"""
+import asyncio
+import os
+
+from temporalio import activity
+
+HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_HEARTBEAT_INTERVAL_SECONDS", "0.5"))
+
+
+async def sleep_with_heartbeat(seconds: float, step: str = ""):
+    """
+    Sleeps in HEARTBEAT_INTERVAL_SECONDS slices, heartbeating progress after
+    each one. Cancellation of the activity surfaces here as CancelledError.
+    """
+    if not activity.in_activity():
+        await asyncio.sleep(seconds)
+        return
+
+    elapsed = 0.0
+    while elapsed < seconds:
+        chunk = min(HEARTBEAT_INTERVAL_SECONDS, seconds - elapsed)
+        await asyncio.sleep(chunk)
+        elapsed += chunk
+        activity.heartbeat({"step": step, "progress": round(elapsed / seconds, 2)})
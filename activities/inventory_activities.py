@@ -1,7 +1,6 @@
 from temporalio import activity
 from temporalio.exceptions import ApplicationError
 import asyncio
-import random
 import sys
 import os
 from datetime import datetime
@@ -10,58 +9,55 @@ from datetime import datetime
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from models.inventory import InventoryItem, InventoryUpdate, InventoryStatus
+from activities.circuit_breaker import get_breaker
+from activities import simulation
+from activities.temporal_client import get_client
+from integrations.http import ServiceUnavailableError, get_service
+from storage.inventory_store import InsufficientInventoryError, ProductNotFoundError, get_hot_skus, get_inventory_store
+from storage.leases import Lease, LeaseNotFoundError
 
-# Mô phỏng cơ sở dữ liệu kho hàng
-_inventory_db = {
-    "PROD-001": InventoryItem(
-        id="INV-001",
-        product_id="PROD-001",
-        name="Laptop XPS 15",
-        quantity=50,
-        reserved=5
-    ),
-    "PROD-002": InventoryItem(
-        id="INV-002",
-        product_id="PROD-002",
-        name="iPhone 15 Pro",
-        quantity=100,
-        reserved=10
-    ),
-    "PROD-003": InventoryItem(
-        id="INV-003",
-        product_id="PROD-003",
-        name="Sony Headphones XM5",
-        quantity=30,
-        reserved=2
-    ),
-    "PROD-004": InventoryItem(
-        id="INV-004",
-        product_id="PROD-004",
-        name="Samsung TV 65\"",
-        quantity=12,
-        reserved=2
-    ),
-    "PROD-005": InventoryItem(
-        id="INV-005",
-        product_id="PROD-005",
-        name="Gaming Mouse",
-        quantity=5,
-        reserved=0
-    )
-}
+# Tồn kho nằm trong InventoryStore (bộ nhớ hoặc Postgres, chọn qua INVENTORY_STORE).
+# Activities không tự đọc rồi ghi: mọi thay đổi là một thao tác nguyên tử của store,
+# nên nhiều activity/worker process chạy song song không bán vượt tồn kho.
+
+async def _get_item(product_id: str) -> InventoryItem:
+    try:
+        return await get_inventory_store().get(product_id)
+    except ProductNotFoundError as e:
+        activity.logger.error(f"Product {product_id} not found in inventory")
+        raise ApplicationError(str(e), non_retryable=True)
+
+def sku_reservation_workflow_id(product_id: str) -> str:
+    """Id của SkuReservationWorkflow (actor) cho một sản phẩm"""
+    return f"sku_reservation_{product_id}"
+
+def _lease_result(lease: Lease) -> dict:
+    return {
+        **lease.to_dict(),
+        "status": "RESERVED",
+        "expires_at": datetime.fromtimestamp(lease.expires_at).isoformat(),
+        "reserved_at": datetime.now().isoformat()
+    }
 
-async def _simulate_inventory_service(operation: str, product_id: str, duration_seconds: float = 1.0):
+async def _simulate_inventory_service(operation: str, product_id: str):
     """Mô phỏng gọi service kho hàng"""
     activity.logger.info(f"Connecting to inventory service for operation '{operation}' on product {product_id}")
-    
-    # Mô phỏng độ trễ mạng/xử lý
-    await asyncio.sleep(duration_seconds)
-    
-    # Mô phỏng lỗi ngẫu nhiên (10% xác suất)
-    if random.random() < 0.1:
-        activity.logger.error(f"Inventory service error during {operation} for product {product_id}")
+    try:
+        # Fail fast nếu circuit breaker đang mở
+        async with get_breaker("inventory_service").guard():
+            service = get_service("inventory_service")
+            if service.configured:
+                # Inventory service thật (hoặc stub server) qua connection pool dùng chung
+                await service.post(f"/inventory/{operation}", {"product_id": product_id})
+            else:
+                # Mô phỏng độ trễ mạng/xử lý và lỗi ngẫu nhiên (theo operation trong simulation profile)
+                await simulation.delay("inventory_service", f"{operation}:{product_id}", operation)
+                if simulation.fails("inventory_service", operation):
+                    raise ServiceUnavailableError("inventory_service", f"simulated failure during {operation}")
+    except ServiceUnavailableError as e:
+        activity.logger.error(f"Inventory service error during {operation} for product {product_id}: {e}")
         return False
-    
+
     activity.logger.info(f"Inventory service operation '{operation}' completed for product {product_id}")
     return True
 
@@ -69,73 +65,84 @@ async def _simulate_inventory_service(operation: str, product_id: str, duration_
 async def check_inventory(product_id: str, quantity: int) -> dict:
     """Kiểm tra xem sản phẩm có đủ số lượng trong kho không"""
     activity.logger.info(f"Checking inventory for product {product_id}, quantity {quantity}")
-    
+
     # Mô phỏng thời gian kiểm tra
-    await asyncio.sleep(0.5)
-    
-    # Kiểm tra sản phẩm có tồn tại không
-    if product_id not in _inventory_db:
-        activity.logger.error(f"Product {product_id} not found in inventory")
-        raise ApplicationError(f"Product {product_id} not found", non_retryable=True)
-    
-    inventory_item = _inventory_db[product_id]
-    available = inventory_item.quantity - inventory_item.reserved
-    
+    await simulation.delay("check_inventory", f"check:{product_id}")
+
+    inventory_item = await _get_item(product_id)
+    available = inventory_item.available_quantity()
+
     activity.logger.info(f"Product {product_id} has {available} available units (total: {inventory_item.quantity}, reserved: {inventory_item.reserved})")
-    
+
     is_available = available >= quantity
     if not is_available:
         activity.logger.warning(f"Insufficient inventory for product {product_id}. Requested: {quantity}, Available: {available}")
-    
-    # Cập nhật trạng thái dựa trên số lượng hiện có
-    status = inventory_item.status
-    if inventory_item.quantity == 0:
-        status = InventoryStatus.OUT_OF_STOCK
-    elif inventory_item.quantity < 10:
-        status = InventoryStatus.LOW_STOCK
-    
+
     return {
         "product_id": product_id,
         "available": available,
         "is_available": is_available,
-        "status": status,
+        "status": inventory_item.status,
         "checked_at": datetime.now().isoformat()
     }
 
 @activity.defn
-async def reserve_inventory(update: dict) -> dict:
+async def check_inventory_batch(lines: list) -> dict:
+    """Kiểm tra tồn kho cho cả đơn hàng trong một lần gọi; lines là [{"product_id", "quantity"}]"""
+    activity.logger.info(f"Checking inventory for {len(lines)} order lines")
+
+    # Một lần gọi service cho cả đơn thay vì một lần cho mỗi dòng
+    await simulation.delay("check_inventory_batch", "check_batch")
+
+    try:
+        results = await get_inventory_store().check_batch(
+            [(line["product_id"], abs(line["quantity"])) for line in lines]
+        )
+    except ProductNotFoundError as e:
+        activity.logger.error(f"Product {e.product_id} not found in inventory")
+        raise ApplicationError(str(e), non_retryable=True)
+
+    checked_at = datetime.now().isoformat()
+    hot_skus = get_hot_skus()
+    details = {}
+    for result in results:
+        if not result["is_available"]:
+            activity.logger.warning(f"Insufficient inventory for product {result['product_id']}. Requested: {result['requested']}, Available: {result['available']}")
+        # Sản phẩm bán chạy được đặt trước qua actor riêng của SKU (SkuReservationWorkflow)
+        details[result["product_id"]] = {**result, "hot": result["product_id"] in hot_skus, "checked_at": checked_at}
+
+    return {
+        "is_available": all(result["is_available"] for result in results),
+        "details": details,
+        "checked_at": checked_at
+    }
+
+@activity.defn
+async def reserve_inventory(inventory_update: InventoryUpdate) -> dict:
     """Đặt trước hàng tồn kho cho một đơn hàng"""
-    inventory_update = InventoryUpdate(**update)
     product_id = inventory_update.product_id
     quantity = abs(inventory_update.quantity_change)  # Đảm bảo giá trị dương
-    
+
     activity.logger.info(f"Reserving {quantity} units of product {product_id} for order {inventory_update.order_id or 'N/A'}")
-    
+
     # Kiểm tra sản phẩm có tồn tại không
-    if product_id not in _inventory_db:
-        activity.logger.error(f"Product {product_id} not found in inventory")
-        raise ApplicationError(f"Product {product_id} not found", non_retryable=True)
-    
+    await _get_item(product_id)
+
     # Mô phỏng service call
-    service_success = await _simulate_inventory_service("reserve", product_id, 1.5)
+    service_success = await _simulate_inventory_service("reserve", product_id)
     if not service_success:
         activity.logger.error(f"Failed to connect to inventory service for product {product_id}")
         raise ValueError("Inventory service temporarily unavailable")
-    
-    # Kiểm tra và cập nhật inventory
-    inventory_item = _inventory_db[product_id]
-    available = inventory_item.quantity - inventory_item.reserved
-    
-    if available < quantity:
-        activity.logger.error(f"Cannot reserve {quantity} units of product {product_id}. Only {available} available")
+
+    # Kiểm tra và đặt trước trong một bước nguyên tử
+    try:
+        inventory_item = await get_inventory_store().reserve(product_id, quantity, order_id=inventory_update.order_id)
+    except InsufficientInventoryError as e:
+        activity.logger.error(f"Cannot reserve {quantity} units of product {product_id}. Only {e.available} available")
         raise ApplicationError(f"Insufficient inventory for product {product_id}", non_retryable=True)
-    
-    # Cập nhật dữ liệu đặt trước
-    inventory_item.reserved += quantity
-    inventory_item.last_updated = datetime.now()
-    
+
     activity.logger.info(f"Successfully reserved {quantity} units of product {product_id}. New reserved count: {inventory_item.reserved}")
-    
+
     return {
         "product_id": product_id,
         "quantity": quantity,
@@ -145,57 +152,31 @@ async def reserve_inventory(update: dict) -> dict:
     }
 
 @activity.defn
-async def update_inventory(update: dict) -> dict:
+async def update_inventory(inventory_update: InventoryUpdate) -> dict:
     """Cập nhật kho hàng (giảm hoặc tăng)"""
-    inventory_update = InventoryUpdate(**update)
     product_id = inventory_update.product_id
     quantity_change = inventory_update.quantity_change
-    
+
     activity.logger.info(f"Updating inventory for product {product_id} by {quantity_change} units for order {inventory_update.order_id or 'N/A'}")
-    
+
     # Kiểm tra sản phẩm có tồn tại không
-    if product_id not in _inventory_db:
-        activity.logger.error(f"Product {product_id} not found in inventory")
-        raise ApplicationError(f"Product {product_id} not found", non_retryable=True)
-    
+    await _get_item(product_id)
+
     # Mô phỏng service call
-    service_success = await _simulate_inventory_service("update", product_id, 1.0)
+    service_success = await _simulate_inventory_service("update", product_id)
     if not service_success:
         activity.logger.error(f"Failed to connect to inventory service for product {product_id}")
         raise ValueError("Inventory service temporarily unavailable")
-    
-    # Cập nhật inventory
-    inventory_item = _inventory_db[product_id]
-    
-    # Nếu quantity_change âm (giảm kho) thì giảm cả reserved
+
+    store = get_inventory_store()
     if quantity_change < 0:
-        abs_change = abs(quantity_change)
-        # Đảm bảo không vượt quá số lượng đã đặt trước
-        if abs_change > inventory_item.reserved:
-            activity.logger.warning(f"Attempting to reduce more than reserved for product {product_id}. Reserved: {inventory_item.reserved}, Change: {abs_change}")
-            abs_change = inventory_item.reserved
-        
-        inventory_item.quantity += quantity_change  # Giảm vì quantity_change < 0
-        inventory_item.reserved -= abs_change
-        
-        if inventory_item.quantity < 0:
-            inventory_item.quantity = 0
-            
+        # Giảm kho: trừ số lượng thực tế và phần đã đặt trước tương ứng
+        inventory_item = await store.commit(product_id, abs(quantity_change), order_id=inventory_update.order_id)
     else:  # quantity_change > 0, tăng kho
-        inventory_item.quantity += quantity_change
-    
-    # Cập nhật trạng thái
-    if inventory_item.quantity == 0:
-        inventory_item.status = InventoryStatus.OUT_OF_STOCK
-    elif inventory_item.quantity < 10:
-        inventory_item.status = InventoryStatus.LOW_STOCK
-    else:
-        inventory_item.status = InventoryStatus.IN_STOCK
-    
-    inventory_item.last_updated = datetime.now()
-    
+        inventory_item = await store.restock(product_id, quantity_change, order_id=inventory_update.order_id)
+
     activity.logger.info(f"Inventory updated for product {product_id}. New quantity: {inventory_item.quantity}, Reserved: {inventory_item.reserved}")
-    
+
     return {
         "product_id": product_id,
         "quantity_change": quantity_change,
@@ -206,32 +187,22 @@ async def update_inventory(update: dict) -> dict:
     }
 
 @activity.defn
-async def unreserve_inventory(update: dict) -> dict:
+async def unreserve_inventory(inventory_update: InventoryUpdate) -> dict:
     """Hủy đặt trước hàng tồn kho"""
-    inventory_update = InventoryUpdate(**update)
     product_id = inventory_update.product_id
     quantity = abs(inventory_update.quantity_change)  # Đảm bảo giá trị dương
-    
+
     activity.logger.info(f"Unreserving {quantity} units of product {product_id} for order {inventory_update.order_id or 'N/A'}")
-    
-    # Kiểm tra sản phẩm có tồn tại không
-    if product_id not in _inventory_db:
+
+    # Store không bao giờ hủy đặt trước nhiều hơn số lượng đang giữ
+    try:
+        inventory_item = await get_inventory_store().release(product_id, quantity, order_id=inventory_update.order_id)
+    except ProductNotFoundError as e:
         activity.logger.error(f"Product {product_id} not found in inventory")
-        raise ApplicationError(f"Product {product_id} not found", non_retryable=True)
-    
-    # Cập nhật inventory
-    inventory_item = _inventory_db[product_id]
-    
-    # Đảm bảo không hủy đặt trước nhiều hơn số lượng đã đặt
-    if quantity > inventory_item.reserved:
-        activity.logger.warning(f"Attempting to unreserve more than reserved for product {product_id}. Reserved: {inventory_item.reserved}, Unreserve: {quantity}")
-        quantity = inventory_item.reserved
-    
-    inventory_item.reserved -= quantity
-    inventory_item.last_updated = datetime.now()
-    
+        raise ApplicationError(str(e), non_retryable=True)
+
     activity.logger.info(f"Successfully unreserved {quantity} units of product {product_id}. New reserved count: {inventory_item.reserved}")
-    
+
     return {
         "product_id": product_id,
         "quantity": quantity,
@@ -240,10 +211,132 @@ async def unreserve_inventory(update: dict) -> dict:
         "unreserved_at": datetime.now().isoformat()
     }
 
+@activity.defn
+async def reserve_inventory_lease(params: dict) -> dict:
+    """
+    Đặt trước cả đơn hàng dưới một lease có hạn. params gồm lease_id, order_id,
+    lines ([{"product_id", "quantity"}]) và ttl_seconds. Gọi lại với cùng lease_id trả về lease cũ.
+    """
+    lease_id = params["lease_id"]
+    lines = [(line["product_id"], abs(line["quantity"])) for line in params["lines"]]
+    activity.logger.info(f"Reserving {len(lines)} lines under lease {lease_id} for order {params.get('order_id') or 'N/A'}")
+
+    # Mô phỏng service call (một lần cho cả lease)
+    service_success = await _simulate_inventory_service("reserve_lease", lease_id)
+    if not service_success:
+        activity.logger.error(f"Failed to connect to inventory service for lease {lease_id}")
+        raise ValueError("Inventory service temporarily unavailable")
+
+    try:
+        lease = await get_inventory_store().reserve_lease(
+            lease_id, lines, float(params["ttl_seconds"]), order_id=params.get("order_id")
+        )
+    except ProductNotFoundError as e:
+        activity.logger.error(f"Product {e.product_id} not found in inventory")
+        raise ApplicationError(str(e), non_retryable=True)
+    except InsufficientInventoryError as e:
+        activity.logger.error(f"Cannot reserve lease {lease_id}: {e}")
+        raise ApplicationError(f"Insufficient inventory for product {e.product_id}", non_retryable=True)
+
+    activity.logger.info(f"Lease {lease_id} reserved until {datetime.fromtimestamp(lease.expires_at).isoformat()}")
+    return _lease_result(lease)
+
+@activity.defn
+async def commit_inventory_lease(lease_id: str) -> dict:
+    """Trừ kho theo lease; lỗi LeaseNotFoundError (không retry) nếu lease đã hết hạn"""
+    activity.logger.info(f"Committing inventory lease {lease_id}")
+
+    service_success = await _simulate_inventory_service("commit_lease", lease_id)
+    if not service_success:
+        activity.logger.error(f"Failed to connect to inventory service for lease {lease_id}")
+        raise ValueError("Inventory service temporarily unavailable")
+
+    try:
+        lease = await get_inventory_store().commit_lease(lease_id)
+    except LeaseNotFoundError as e:
+        activity.logger.error(str(e))
+        raise ApplicationError(str(e), type="LeaseNotFoundError", non_retryable=True)
+
+    activity.logger.info(f"Inventory lease {lease_id} committed")
+    return {**lease.to_dict(), "status": "COMMITTED", "committed_at": datetime.now().isoformat()}
+
+@activity.defn
+async def release_inventory_lease(lease_id: str) -> dict:
+    """Trả hàng của lease về tồn kho; gọi lại nhiều lần là an toàn"""
+    activity.logger.info(f"Releasing inventory lease {lease_id}")
+    lease = await get_inventory_store().release_lease(lease_id)
+    if lease is None:
+        activity.logger.info(f"Inventory lease {lease_id} already settled or expired")
+        return {"lease_id": lease_id, "status": "NOT_FOUND"}
+
+    activity.logger.info(f"Inventory lease {lease_id} released")
+    return {**lease.to_dict(), "status": "RELEASED", "released_at": datetime.now().isoformat()}
+
+@activity.defn
+async def request_sku_reservation(request: dict) -> None:
+    """
+    Gửi yêu cầu đặt trước tới SkuReservationWorkflow của sản phẩm (signal-with-start).
+    request gồm product_id, lease_id, order_id, quantity, ttl_seconds và reply_to
+    ({"workflow_id", "run_id"}) để actor gửi kết quả về.
+    """
+    product_id = request["product_id"]
+    activity.logger.info(f"Queueing reservation {request['lease_id']} for hot product {product_id}")
+    client = await get_client()
+    await client.start_workflow(
+        "SkuReservationWorkflow",
+        {"product_id": product_id},
+        id=sku_reservation_workflow_id(product_id),
+        task_queue=activity.info().task_queue,
+        start_signal="reserve",
+        start_signal_args=[request]
+    )
+
+@activity.defn
+async def reserve_sku_batch(params: dict) -> list:
+    """
+    Quyết định một lô yêu cầu đặt trước của cùng một SKU theo thứ tự đến, trong một
+    lần gọi service. Mỗi yêu cầu thành công nhận một lease; trả về quyết định cho từng yêu cầu.
+    """
+    product_id = params["product_id"]
+    requests = params["requests"]
+    activity.logger.info(f"Deciding {len(requests)} reservations for product {product_id}")
+
+    # Một lần gọi service cho cả lô
+    service_success = await _simulate_inventory_service("reserve_batch", product_id)
+    if not service_success:
+        activity.logger.error(f"Failed to connect to inventory service for product {product_id}")
+        raise ValueError("Inventory service temporarily unavailable")
+
+    # reserve_lease idempotent theo lease_id nên retry cả lô không đặt trước hai lần
+    outcomes = await get_inventory_store().reserve_lease_batch([
+        (request["lease_id"], [(product_id, abs(request["quantity"]))], float(request["ttl_seconds"]), request.get("order_id"))
+        for request in requests
+    ])
+
+    decisions = []
+    for request, outcome in zip(requests, outcomes):
+        if isinstance(outcome, Lease):
+            decisions.append(_lease_result(outcome))
+        elif isinstance(outcome, InsufficientInventoryError):
+            decisions.append({"lease_id": request["lease_id"], "status": "FAILED",
+                              "reason": f"Insufficient inventory for product {product_id}"})
+        else:
+            decisions.append({"lease_id": request["lease_id"], "status": "FAILED", "reason": str(outcome)})
+
+    granted = sum(decision["status"] == "RESERVED" for decision in decisions)
+    activity.logger.info(f"Product {product_id}: granted {granted}/{len(requests)} reservations")
+    return decisions
+
 # Tất cả các activities kho hàng
 inventory_activities = [
     check_inventory,
+    check_inventory_batch,
     reserve_inventory,
     update_inventory,
-    unreserve_inventory
-] 
\ No newline at end of file
+    unreserve_inventory,
+    reserve_inventory_lease,
+    commit_inventory_lease,
+    release_inventory_lease,
+    request_sku_reservation,
+    reserve_sku_batch
+]
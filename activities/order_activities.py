@@ -1,8 +1,7 @@
 from temporalio import activity
 from temporalio.exceptions import ApplicationError # Import ApplicationError
-from datetime import timedelta
+from datetime import datetime, timedelta
 import time # For simulating work
-import random
 import sys
 import os
 import asyncio # Import asyncio
@@ -11,18 +10,33 @@ import asyncio # Import asyncio
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from models.order import Order # Import necessary models
+from rules.engine import ApprovalRules, Decision, Velocity, VelocityTracker, get_rules
+from rules.validation import catalog_price_lookup, validate_lines
+from activities.circuit_breaker import get_breaker
+from activities import simulation
+from integrations.http import get_service
 
 # Placeholder database/service interactions
 # Replace these with actual interactions with Postgres, Redis, payment gateways, shipping APIs, etc.
 
-async def _simulate_external_call(operation: str, order_id: str, duration_seconds: int = 1):
+async def _simulate_external_call(operation: str, order_id: str):
     activity.logger.info(f"Performing '{operation}' for order {order_id}...")
-    # await activity.sleep(duration_seconds) # Simulate network delay/processing time
-    await asyncio.sleep(duration_seconds) # Use asyncio.sleep instead
-    # Simulate potential failures
-    # if random.random() < 0.1: # 10% chance of failure
+    # Fail fast while the order service breaker is open
+    async with get_breaker("order_service").guard():
+        # Latency from the simulation profile; heartbeats so cancellation is delivered
+        await simulation.delay("order_service", operation)
     activity.logger.info(f"'{operation}' for order {order_id} completed.")
 
+async def _send_notification(kind: str, order_id: str):
+    """Sends a notification through the notification service, or simulates it when none is configured."""
+    service = get_service("notification_service")
+    if service.configured:
+        await service.post("/notifications", {"kind": kind, "order_id": order_id})
+    else:
+        await simulation.delay("notification", kind) # Simulate notification time
+
+# type của ApplicationError khi đơn hàng có dòng không hợp lệ; details[0] là danh sách lỗi
+VALIDATION_ERROR_TYPE = "OrderValidationError"
 
 @activity.defn
 async def validate_order(order_data: dict) -> bool:
@@ -30,44 +44,82 @@ async def validate_order(order_data: dict) -> bool:
     total_amount = order_data.get("total_amount", 0)
     activity.logger.info(f"Validating order {order_id} with amount ${total_amount:.2f}")
 
-    # Simulate invalid data check (non-retryable error)
-    if total_amount < 0:
-        activity.logger.error(f"Validation failed for order {order_id}: Invalid total amount.")
+    # Kiểm tra mọi dòng với catalog trong một lượt; lỗi dữ liệu thì không retry
+    errors = validate_lines(order_data, catalog_price_lookup())
+    if errors:
+        activity.logger.error(f"Validation failed for order {order_id}: {len(errors)} errors, first: {errors[0]['message']}")
         # Raise ApplicationError for non-retryable business logic failures
-        raise ApplicationError(f"Invalid order total: ${total_amount:.2f}", non_retryable=True)
-
-    # Simulate temporary failures (retryable)
-    failure_chance = 0.1 # 10% chance to fail temporarily  - Tỉ lệ lỗi
-    if random.random() < failure_chance:
-        activity.logger.warning(f"Simulating temporary validation failure for order {order_id}")
-        await asyncio.sleep(0.5) # Simulate delay during failure
-        raise ValueError("Temporary validation service unavailable")
-
-    # Simulate validation time
-    await asyncio.sleep(1)
+        raise ApplicationError(
+            f"Order {order_id} failed validation with {len(errors)} errors: {errors[0]['message']}",
+            errors,
+            type=VALIDATION_ERROR_TYPE,
+            non_retryable=True,
+        )
+
+    # Fail fast while the validation service breaker is open
+    async with get_breaker("validation_service").guard():
+        # Simulate temporary failures (retryable); rate and latency from the simulation profile
+        if simulation.fails("validate_order"):
+            activity.logger.warning(f"Simulating temporary validation failure for order {order_id}")
+            await simulation.delay("validate_order", "validate", failed=True) # Simulate delay during failure
+            raise ValueError("Temporary validation service unavailable")
+
+        # Simulate validation time
+        await simulation.delay("validate_order", "validate")
 
     activity.logger.info(f"Order {order_id} validated successfully.")
     return True
 
+# Velocity theo khách hàng, lưu trong bộ nhớ của worker process: mỗi process chỉ thấy
+# các đơn mà nó đã ghi và mất hết khi restart, nên giới hạn velocity là best-effort
+_velocity_tracker: VelocityTracker | None = None
+
+def _record_velocity(order_data: dict, rules: ApprovalRules) -> Velocity:
+    """Records the order (once per order id, so retries are not counted twice) and returns the prior velocity."""
+    global _velocity_tracker
+    if _velocity_tracker is None or _velocity_tracker.window != rules.velocity_window:
+        _velocity_tracker = VelocityTracker(rules.velocity_window or timedelta(hours=1))
+
+    velocity = _velocity_tracker.record(
+        order_data["customer_id"], order_data["id"], float(order_data.get("total_amount", 0)), datetime.now()
+    )
+    activity.logger.info(
+        f"Customer {order_data['customer_id']} velocity: {velocity.order_count} orders, ${velocity.total_amount:.2f}"
+    )
+    return velocity
+
+@activity.defn
+async def evaluate_approval_rules(order_data: dict) -> Decision:
+    """Evaluates the approval rules for the order; the decision is recorded in the workflow history."""
+    rules = get_rules()
+    velocity = _record_velocity(order_data, rules) if rules.needs_velocity else None
+    return rules.evaluate(order_data, velocity)
+
+@activity.defn
+async def record_customer_order(order_data: dict) -> dict:
+    """Records the order for velocity limits and returns the customer's prior velocity."""
+    # Only workflows started before the "approval-rules-activity" patch call this
+    velocity = _record_velocity(order_data, get_rules())
+    return {"order_count": velocity.order_count, "total_amount": velocity.total_amount}
+
 @activity.defn
 async def notify_manager(order_id: str):
     activity.logger.info(f"Notifying manager about pending approval for order {order_id}")
-    await asyncio.sleep(0.5) # Simulate notification time
-    # TODO: Implement actual notification (email, Slack, etc.)
+    await _send_notification("manager_approval", order_id)
     activity.logger.info(f"Manager notification sent for order {order_id}")
 
 @activity.defn
 async def process_approved_order(order_id: str):
+    # Only workflows started before the "child-workflow-fulfilment" patch call this;
+    # newer ones run payment/inventory as child workflows of OrderApprovalWorkflow.
     activity.logger.info(f"Processing approved order {order_id} (e.g., initiate payment/shipping)")
-    await asyncio.sleep(2) # Simulate processing time
-    # TODO: Call other activities like process_payment, ship_order etc.
+    await simulation.delay("process_approved_order", "process") # Simulate processing time
     activity.logger.info(f"Approved order {order_id} processed.")
 
 @activity.defn
 async def notify_rejection(order_id: str):
     activity.logger.info(f"Notifying customer about rejected order {order_id}")
-    await asyncio.sleep(0.5) # Simulate notification time
-    # TODO: Implement actual notification
+    await _send_notification("order_rejected", order_id)
     activity.logger.info(f"Rejection notification sent for order {order_id}")
 
 @activity.defn
@@ -75,19 +127,21 @@ async def handle_cancellation(order_id: str):
     activity.logger.info(f"Handling cancellation for order {order_id}")
     # TODO: Implement cancellation logic (e.g., notify warehouse, process refund if applicable)
     # Check current state before acting (e.g., was payment processed? was it shipped?)
-    await _simulate_external_call("cancellation handling", order_id, duration_seconds=1)
+    await _simulate_external_call("cancellation handling", order_id)
     activity.logger.info(f"Cancellation processed for order {order_id}")
 
 @activity.defn
 async def cleanup_order(order_id: str):
     activity.logger.warning(f"Running cleanup for failed order {order_id}")
     # TODO: Implement cleanup logic for failed workflows
-    await _simulate_external_call("failure cleanup", order_id, duration_seconds=1)
+    await _simulate_external_call("failure cleanup", order_id)
     activity.logger.info(f"Cleanup complete for order {order_id}")
 
 # Gather all activities for the new workflow
 all_activities = [
     validate_order,
+    evaluate_approval_rules,
+    record_customer_order,
     notify_manager,
     process_approved_order,
     notify_rejection,
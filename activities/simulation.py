@@ -0,0 +1,237 @@
+"""
+Mô hình độ trễ và lỗi của các service giả lập (khi không cấu hình service thật).
+
+Mọi độ trễ và xác suất lỗi nằm trong một profile (JSON, hoặc YAML nếu cài PyYAML; mặc
+định simulation_profile.json) thay vì hằng số rải trong activities. Mỗi operation có:
+    latency          số giây cố định, hoặc một phân phối:
+                     {"distribution": "uniform", "min": 0.5, "max": 1.5}
+                     {"distribution": "normal", "mean": 1.0, "stddev": 0.2}
+                     {"distribution": "lognormal", "median": 0.8, "sigma": 0.5}
+                     {"distribution": "exponential", "mean": 1.0}
+                     (thêm "max" để chặn trên; giá trị âm bị cắt về 0)
+    failure_rate     xác suất lỗi/từ chối của một lần gọi
+    failure_latency  độ trễ của lần gọi bị lỗi (mặc định bằng latency)
+    variants         ghi đè theo biến thể, vd. theo phương thức thanh toán
+
+Với seed, mỗi operation (và biến thể) có hai dãy random riêng, một cho độ trễ và một
+cho lỗi: lần gọi thứ n của một operation luôn nhận cùng kết quả, không phụ thuộc thứ
+tự xen kẽ giữa các activity chạy song song, và đổi phân phối độ trễ không làm lệch dãy
+lỗi. Hai lần benchmark với cùng seed (mỗi worker process) thấy cùng một dãy lỗi.
+
+Cấu hình (ghi đè giá trị trong profile):
+    SIMULATION_PROFILE_PATH   file profile
+    SIMULATION_SEED           seed; "none" để dùng random không seed
+    SIMULATION_LATENCY_SCALE  hệ số nhân mọi độ trễ; 0 = chế độ không độ trễ, để đo riêng
+                              chi phí điều phối của Temporal
+    SIMULATION_FAULTS         false để tắt mọi lỗi/từ chối ngẫu nhiên
+"""
+import json
+import math
+import os
+import random
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional
+
+from activities.heartbeat import sleep_with_heartbeat
+
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(__file__), "simulation_profile.json")
+
+
+@dataclass(frozen=True)
+class Latency:
+    distribution: str = "fixed"
+    params: Dict[str, float] = field(default_factory=dict)
+    cap: Optional[float] = None
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.distribution == "fixed":
+            value = p["seconds"]
+        elif self.distribution == "uniform":
+            value = rng.uniform(p["min"], p["max"])
+        elif self.distribution == "normal":
+            value = rng.gauss(p["mean"], p["stddev"])
+        elif self.distribution == "lognormal":
+            value = rng.lognormvariate(math.log(p["median"]), p["sigma"])
+        else:
+            value = rng.expovariate(1.0 / p["mean"]) if p["mean"] > 0 else 0.0
+        value = max(0.0, value)
+        return min(value, self.cap) if self.cap is not None else value
+
+
+# Tham số bắt buộc của từng phân phối
+DISTRIBUTIONS = {
+    "fixed": ("seconds",),
+    "uniform": ("min", "max"),
+    "normal": ("mean", "stddev"),
+    "lognormal": ("median", "sigma"),
+    "exponential": ("mean",),
+}
+
+
+@dataclass(frozen=True)
+class OperationProfile:
+    latency: Latency = Latency("fixed", {"seconds": 0.0})
+    failure_rate: float = 0.0
+    failure_latency: Optional[Latency] = None
+
+
+@dataclass(frozen=True)
+class SimulationProfile:
+    version: str
+    seed: Optional[int]
+    latency_scale: float
+    faults: bool
+    operations: Dict[str, OperationProfile]
+
+
+def compile_latency(spec, where: str) -> Latency:
+    """Latency model from a number of seconds or a distribution mapping."""
+    if isinstance(spec, (int, float)):
+        return Latency("fixed", {"seconds": float(spec)})
+    distribution = spec.get("distribution", "fixed")
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"{where}: unknown latency distribution {distribution!r}")
+    missing = [name for name in DISTRIBUTIONS[distribution] if name not in spec]
+    if missing:
+        raise ValueError(f"{where}: {distribution} latency needs {', '.join(missing)}")
+    params = {name: float(spec[name]) for name in DISTRIBUTIONS[distribution]}
+    cap = float(spec["max"]) if "max" in spec and distribution != "uniform" else None
+    return Latency(distribution, params, cap)
+
+
+def _compile_operation(config: dict, base: Optional[OperationProfile], where: str) -> OperationProfile:
+    profile = base or OperationProfile()
+    if "latency" in config:
+        profile = replace(profile, latency=compile_latency(config["latency"], where))
+    if "failure_latency" in config:
+        profile = replace(profile, failure_latency=compile_latency(config["failure_latency"], where))
+    if "failure_rate" in config:
+        rate = float(config["failure_rate"])
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"{where}: failure_rate must be between 0 and 1")
+        profile = replace(profile, failure_rate=rate)
+    return profile
+
+
+def compile_profile(config: dict) -> SimulationProfile:
+    """Validates a profile mapping; variants are stored as "operation.variant" over their operation."""
+    operations = {}
+    for name, op_config in config.get("operations", {}).items():
+        operations[name] = _compile_operation(op_config, None, name)
+        for variant, variant_config in op_config.get("variants", {}).items():
+            operations[f"{name}.{variant}"] = _compile_operation(
+                variant_config, operations[name], f"{name}.{variant}"
+            )
+    seed = config.get("seed")
+    return SimulationProfile(
+        version=str(config.get("version", "")),
+        seed=int(seed) if seed is not None else None,
+        latency_scale=float(config.get("latency_scale", 1.0)),
+        faults=bool(config.get("faults", True)),
+        operations=operations,
+    )
+
+
+def load_profile(path: Optional[str] = None) -> SimulationProfile:
+    """Loads the profile from path, SIMULATION_PROFILE_PATH or the bundled default, applying env overrides."""
+    path = path or os.getenv("SIMULATION_PROFILE_PATH", DEFAULT_PROFILE_PATH)
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+    profile = compile_profile(config)
+
+    seed = os.getenv("SIMULATION_SEED")
+    if seed is not None:
+        profile = replace(profile, seed=None if seed.lower() in ("", "none") else int(seed))
+    if os.getenv("SIMULATION_LATENCY_SCALE") is not None:
+        profile = replace(profile, latency_scale=float(os.environ["SIMULATION_LATENCY_SCALE"]))
+    if os.getenv("SIMULATION_FAULTS") is not None:
+        profile = replace(profile, faults=os.environ["SIMULATION_FAULTS"].lower() == "true")
+    return profile
+
+
+class Simulation:
+    """Draws latencies and faults from a profile, one random stream per operation and purpose."""
+
+    def __init__(self, profile: SimulationProfile):
+        self.profile = profile
+        self._streams: Dict[str, random.Random] = {}
+
+    def operation(self, name: str, variant: Optional[str] = None) -> OperationProfile:
+        operations = self.profile.operations
+        if variant is not None and f"{name}.{variant}" in operations:
+            return operations[f"{name}.{variant}"]
+        if name not in operations:
+            raise KeyError(f"Operation {name} is not in the simulation profile")
+        return operations[name]
+
+    def stream(self, name: str, purpose: str) -> random.Random:
+        """Random stream of one operation; seeded from the profile seed, operation and purpose."""
+        key = f"{name}:{purpose}"
+        rng = self._streams.get(key)
+        if rng is None:
+            seed = self.profile.seed
+            rng = random.Random(f"{seed}:{key}") if seed is not None else random.Random()
+            self._streams[key] = rng
+        return rng
+
+    def latency(self, name: str, variant: Optional[str] = None, failed: bool = False) -> float:
+        op = self.operation(name, variant)
+        if self.profile.latency_scale == 0:
+            return 0.0
+        model = op.failure_latency if failed and op.failure_latency is not None else op.latency
+        key = f"{name}.{variant}" if variant is not None else name
+        return model.sample(self.stream(key, "latency")) * self.profile.latency_scale
+
+    def fails(self, name: str, variant: Optional[str] = None) -> bool:
+        op = self.operation(name, variant)
+        if not self.profile.faults or op.failure_rate <= 0:
+            return False
+        key = f"{name}.{variant}" if variant is not None else name
+        return self.stream(key, "fault").random() < op.failure_rate
+
+
+_simulation: Optional[Simulation] = None
+
+
+def get_simulation() -> Simulation:
+    """Process-wide simulation, loaded once on first use."""
+    global _simulation
+    if _simulation is None:
+        _simulation = Simulation(load_profile())
+    return _simulation
+
+
+def configure(latency_scale: Optional[float] = None, faults: Optional[bool] = None,
+              seed: Optional[int] = None, path: Optional[str] = None):
+    """Reloads the profile with overrides for this process (used by tests); random streams restart."""
+    global _simulation
+    profile = load_profile(path)
+    if latency_scale is not None:
+        profile = replace(profile, latency_scale=latency_scale)
+    if faults is not None:
+        profile = replace(profile, faults=faults)
+    if seed is not None:
+        profile = replace(profile, seed=seed)
+    _simulation = Simulation(profile)
+
+
+async def delay(operation: str, step: str = "", variant: Optional[str] = None, failed: bool = False):
+    """Simulated latency of one call of `operation`, heartbeating while it waits."""
+    seconds = get_simulation().latency(operation, variant, failed)
+    if seconds > 0:
+        await sleep_with_heartbeat(seconds, step)
+
+
+def fails(operation: str, variant: Optional[str] = None) -> bool:
+    """Whether this call of `operation` fails, drawn from the operation's fault stream."""
+    return get_simulation().fails(operation, variant)
+
+
+def rng(operation: str) -> random.Random:
+    """Random stream for other simulated values of `operation` (ids, outcome kinds)."""
+    return get_simulation().stream(operation, "value")
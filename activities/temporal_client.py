@@ -0,0 +1,31 @@
+"""
+Temporal client cho các activity cần gửi signal tới workflow khác (vd. signal-with-start
+SkuReservationWorkflow). Worker gọi set_client với client đang dùng để poll, nên
+activities không mở thêm kết nối; ngoài worker (test, script) client được tạo theo
+TEMPORAL_HOST / TEMPORAL_PORT khi dùng lần đầu.
+"""
+import asyncio
+import os
+from typing import Optional
+
+from temporalio.client import Client
+
+_client: Optional[Client] = None
+_connect_lock = asyncio.Lock()
+
+
+def set_client(client: Client):
+    """Shares the worker's client with activities."""
+    global _client
+    _client = client
+
+
+async def get_client() -> Client:
+    """Process-wide Temporal client, connected on first use if the worker did not set one."""
+    global _client
+    async with _connect_lock:
+        if _client is None:
+            host = os.getenv("TEMPORAL_HOST", "localhost")
+            port = os.getenv("TEMPORAL_PORT", "7233")
+            _client = await Client.connect(f"{host}:{port}", namespace="default")
+    return _client
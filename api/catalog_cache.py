@@ -0,0 +1,110 @@
+"""
+Snapshot catalog trong process API, dùng để từ chối đơn hàng sai (400) trước khi gọi Temporal.
+
+Snapshot có version (inode + mtime + kích thước của file CATALOG_PATH) và được làm mới
+định kỳ (CATALOG_REFRESH_SECONDS, mặc định 30s): khi catalog/loader.py thay file mới,
+snapshot mở file mới rồi mới đóng file cũ. Không có CATALOG_PATH thì snapshot là các
+sản phẩm mẫu (version "default").
+
+Kiểm tra dùng chung rules/validation.py với activity validate_order, nên đơn bị API từ
+chối là đơn chắc chắn sẽ VALIDATION_FAILED — mỗi lần từ chối là một workflow start,
+một activity validate (kèm retry) và một history không phải tạo ra.
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from catalog.index import Catalog
+from metrics.api import REJECTED_ORDERS
+from rules.validation import price_lookup, validate_lines
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: str
+    loaded_at: float
+    products: int
+    lookup: Callable[[str], Optional[float]]
+    catalog: Optional[Catalog] = None
+
+
+def _file_version(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class CatalogCache:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else os.getenv("CATALOG_PATH")
+        self.snapshot: Optional[CatalogSnapshot] = None
+        # Số đơn bị từ chối trước khi start workflow
+        self.rejected_orders = 0
+
+    def refresh(self) -> bool:
+        """Loads a new snapshot if the catalog file changed; returns True when swapped."""
+        if not self.path:
+            if self.snapshot is None:
+                from storage.inventory_store import DEFAULT_INVENTORY
+                self.snapshot = CatalogSnapshot("default", time.time(), len(DEFAULT_INVENTORY), price_lookup(None))
+                return True
+            return False
+
+        version = _file_version(self.path)
+        if self.snapshot is not None and self.snapshot.version == version:
+            return False
+        catalog = Catalog(self.path)
+        previous = self.snapshot
+        self.snapshot = CatalogSnapshot(version, time.time(), len(catalog), price_lookup(catalog), catalog)
+        # Kiểm tra là đồng bộ (không await), nên không còn request nào đang đọc file cũ
+        if previous is not None and previous.catalog is not None:
+            previous.catalog.close()
+        logger.info(f"Loaded catalog snapshot {version} ({len(catalog)} products)")
+        return True
+
+    def validate(self, order: Dict) -> List[Dict]:
+        """Per-line errors for an order against the current snapshot."""
+        if self.snapshot is None:
+            self.refresh()
+        errors = validate_lines(order, self.snapshot.lookup)
+        if errors:
+            self.rejected_orders += 1
+            REJECTED_ORDERS.inc()
+        return errors
+
+    async def run(self, interval_seconds: float, stop_event: asyncio.Event):
+        """Refreshes the snapshot every interval until stop_event is set."""
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                self.refresh()
+            except Exception as e:
+                # Giữ snapshot cũ nếu file mới chưa đọc được
+                logger.error(f"Catalog refresh failed: {e}")
+
+    def status(self) -> Dict:
+        snapshot = self.snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "products": snapshot.products if snapshot else 0,
+            "rejected_orders": self.rejected_orders,
+        }
+
+
+_cache: Optional[CatalogCache] = None
+
+
+def get_catalog_cache() -> CatalogCache:
+    """Process-wide catalog cache for the API."""
+    global _cache
+    if _cache is None:
+        _cache = CatalogCache()
+    return _cache
@@ -17,6 +17,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from temporalio.client import Client
 from workflows.inventory_workflow import InventoryWorkflow
+from models.converter import data_converter
+from metrics.api import RpcMetricsInterceptor
+from tracing.otel import tracing_interceptors
 from models.inventory import (
     InventoryStatus,
     InventoryCheckRequest,
@@ -262,6 +265,16 @@ async def approve_inventory_update(order_id: str):
                     detail=f"Cannot approve inventory update in {current_status} state"
                 )
             
+            if current_status == "RESERVED":
+                # Workflow đã kết thúc và giữ hàng bằng lease: commit lease thay vì gửi signal
+                lease_result = await _settle_lease(client, order_id, handle, "commit")
+                return InventoryResponse(
+                    order_id=order_id,
+                    status="COMPLETED" if lease_result["status"] == "COMMITTED" else "FAILED",
+                    details=lease_result,
+                    message=lease_result.get("reason", "Inventory lease committed")
+                )
+
             # Gửi signal commit
             await handle.signal(InventoryWorkflow.commit)
             logger.debug(f"Sent commit signal to workflow {workflow_id}")
@@ -318,6 +331,16 @@ async def cancel_inventory_update(order_id: str):
                     detail=f"Cannot cancel inventory update in {current_status} state"
                 )
             
+            if current_status == "RESERVED":
+                # Workflow đã kết thúc và giữ hàng bằng lease: release lease thay vì gửi signal
+                lease_result = await _settle_lease(client, order_id, handle, "release")
+                return InventoryResponse(
+                    order_id=order_id,
+                    status="FAILED" if lease_result["status"] == "FAILED" else "CANCELLED",
+                    details=lease_result,
+                    message=lease_result.get("reason", "Inventory lease released")
+                )
+
             # Gửi signal cancel
             await handle.signal(InventoryWorkflow.cancel)
             logger.debug(f"Sent cancel signal to workflow {workflow_id}")
@@ -351,6 +374,16 @@ async def cancel_inventory_update(order_id: str):
             detail=f"Failed to cancel inventory update: {str(e)}"
         )
 
+async def _settle_lease(client: Client, order_id: str, handle, action: str) -> dict:
+    """Chạy InventoryLeaseWorkflow để commit/release lease của một đơn đã đặt trước"""
+    reservation = await handle.result()
+    return await client.execute_workflow(
+        "InventoryLeaseWorkflow",
+        {"lease_id": reservation["lease_id"], "action": action},
+        id=f"inventory_lease_{order_id}",
+        task_queue="inventory-task-queue"
+    )
+
 async def get_temporal_client() -> Client:
     """Get or create Temporal client"""
     host = os.getenv("TEMPORAL_HOST", "localhost")
@@ -358,7 +391,7 @@ async def get_temporal_client() -> Client:
     
     try:
         logger.debug(f"Connecting to Temporal server at {host}:{port}")
-        client = await Client.connect(f"{host}:{port}")
+        client = await Client.connect(f"{host}:{port}", data_converter=data_converter, interceptors=[RpcMetricsInterceptor(), *tracing_interceptors()])
         return client
     except Exception as e:
         logger.error(f"Failed to connect to Temporal server: {e}", exc_info=True)
@@ -1,10 +1,11 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
 from temporalio.client import Client, WorkflowFailureError, WorkflowHandle
 from temporalio import workflow
 from temporalio.common import RetryPolicy
 import os
 from dotenv import load_dotenv
 from typing import Dict
+from pydantic import ValidationError
 import uuid
 import asyncio
 import logging
@@ -26,15 +27,24 @@ import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from models.order import Order, OrderStatus, OrderItem # Import models
+from models.converter import data_converter
 # from workflows.order_workflow import OrderWorkflow # Import cũ
 from workflows.order_workflow import OrderApprovalWorkflow # Import workflow mới
 from api.inventory import router as inventory_router
+from api.catalog_cache import get_catalog_cache
 from api.payments import router as payments_router
 from api.shipping import router as shipping_router
+from metrics.api import RequestMetricsMiddleware, RpcMetricsInterceptor, render_metrics
+from tracing.otel import TracingMiddleware, configure_tracing, tracing_interceptors
 
 load_dotenv() # Load environment variables from .env file
 
 app = FastAPI()
+# Latency theo route cho GET /metrics
+app.add_middleware(RequestMetricsMiddleware)
+# Span gốc cho mỗi request khi bật TRACING_EXPORTER (tracing/otel.py)
+if configure_tracing("order-api"):
+    app.add_middleware(TracingMiddleware)
 
 # Include routers
 app.include_router(inventory_router, prefix="/inventory", tags=["inventory"])
@@ -44,14 +54,24 @@ app.include_router(shipping_router, prefix="/shipping", tags=["shipping"])
 # Temporal client initialization
 temporal_client: Client | None = None
 
+# Làm mới snapshot catalog định kỳ
+_catalog_refresh_stop = asyncio.Event()
+
 @app.on_event("startup")
 async def startup_event():
     global temporal_client
+    catalog_cache = get_catalog_cache()
+    catalog_cache.refresh()
+    refresh_seconds = float(os.getenv("CATALOG_REFRESH_SECONDS", "30"))
+    asyncio.create_task(catalog_cache.run(refresh_seconds, _catalog_refresh_stop))
     host = os.getenv("TEMPORAL_HOST", "localhost")
     port = os.getenv("TEMPORAL_PORT", "7233")
     namespace = "default"  # Use default namespace
     try:
-        temporal_client = await Client.connect(f"{host}:{port}", namespace=namespace)
+        temporal_client = await Client.connect(
+            f"{host}:{port}", namespace=namespace, data_converter=data_converter,
+            interceptors=[RpcMetricsInterceptor(), *tracing_interceptors()],
+        )
         print(f"Connected to Temporal server at {host}:{port} in namespace '{namespace}'")
     except Exception as e:
         print(f"Failed to connect to Temporal: {e}")
@@ -60,7 +80,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     # Không cần gọi close() vì Client không có phương thức này
-    pass
+    _catalog_refresh_stop.set()
 
 
 def calculate_total_amount(items: list[OrderItem]) -> float:
@@ -133,14 +153,26 @@ async def create_order(order_data: Dict):
     except Exception as e: # Catch potential Pydantic validation errors
         raise HTTPException(status_code=400, detail=f"Invalid item data: {e}")
 
+    # Từ chối đơn sai theo catalog trước khi tốn một workflow start
+    errors = get_catalog_cache().validate({
+        "items": [item.model_dump() for item in order_items],
+        "total_amount": total_amount,
+    })
+    if errors:
+        raise HTTPException(status_code=400, detail={"message": "Order failed validation", "errors": errors})
+
     order_id = str(uuid.uuid4())
-    order_input = Order(
-        id=order_id,
-        customer_id=order_data["customer_id"],
-        items=order_items,
-        total_amount=total_amount,
-        # status will be set by the workflow initially
-    )
+    try:
+        order_input = Order(
+            id=order_id,
+            customer_id=order_data["customer_id"],
+            items=order_items,
+            total_amount=total_amount,
+            payment_method=order_data.get("payment_method"),
+            # status will be set by the workflow initially
+        )
+    except ValidationError as e: # Unknown payment_method, wrong customer_id type...
+        raise HTTPException(status_code=400, detail=f"Invalid order data: {e}")
 
     try:
         # Start the workflow using temporal_client
@@ -157,6 +189,20 @@ async def create_order(order_data: Dict):
         raise HTTPException(status_code=500, detail="Failed to initiate order creation workflow")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics of this API process."""
+    body, content_type = render_metrics()
+    # Đặt header trực tiếp: với media_type="text/..." Starlette sẽ thêm charset lần nữa
+    return Response(content=body, headers={"Content-Type": content_type})
+
+
+@app.get("/catalog/status")
+async def get_catalog_status():
+    """Catalog snapshot version and how many orders were rejected before starting a workflow."""
+    return get_catalog_cache().status()
+
+
 @app.get("/orders/{order_id}/status")
 async def get_order_status(order_id: str):
     """Gets the current status of an order workflow."""
@@ -0,0 +1 @@
+# catalog package initialization
@@ -0,0 +1,143 @@
+"""
+Catalog sản phẩm dạng nhị phân trên đĩa, đọc qua mmap.
+
+Một file catalog gồm:
+    header   magic "SKUCAT01", version, số sản phẩm, số slot, offset của index và data
+    index    bảng băm địa chỉ mở (linear probing), mỗi slot 16 byte:
+             (hash 64-bit của SKU, offset bản ghi + 1); offset 0 = slot trống
+    data     các bản ghi nối tiếp nhau: header <HHIdq (độ dài SKU, độ dài tên,
+             độ dài JSON thuộc tính, giá, số lượng) rồi SKU, tên, JSON thuộc tính
+
+File được mmap chỉ đọc, nên mọi worker và API process trên cùng máy dùng chung
+page cache của OS: mở catalog không phải parse feed, chỉ các trang được tra cứu mới
+được đọc vào bộ nhớ, và mỗi lookup là một lần băm + vài lần probe (O(1)).
+
+File được tạo bởi catalog/loader.py; đường dẫn lấy từ CATALOG_PATH (get_catalog).
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+MAGIC = b"SKUCAT01"
+VERSION = 1
+# magic, version, flags, count, slots, index_offset, data_offset
+HEADER = struct.Struct("<8sIIQQQQ")
+SLOT = struct.Struct("<QQ")
+RECORD = struct.Struct("<HHIdq")
+
+
+def sku_hash(product_id: str) -> int:
+    """64-bit hash used by the index; never 0 so it cannot be mistaken for an empty slot."""
+    return int.from_bytes(hashlib.blake2b(product_id.encode(), digest_size=8).digest(), "little") or 1
+
+
+def slot_count(count: int) -> int:
+    """Power-of-two table size keeping the load factor at or below 0.5."""
+    slots = 8
+    while slots < 2 * count:
+        slots *= 2
+    return slots
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    product_id: str
+    name: str
+    price: float
+    quantity: int
+    attributes: Dict = field(default_factory=dict)
+
+
+class Catalog:
+    """Read-only view over a catalog file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self.slots, self._index_offset, self._data_offset = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a catalog file (magic {magic!r}, version {version})")
+        self._mask = self.slots - 1
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, product_id: str) -> bool:
+        return self._find(product_id) is not None
+
+    def _find(self, product_id: str) -> Optional[int]:
+        """Absolute offset of the record for product_id, or None."""
+        h = sku_hash(product_id)
+        encoded = product_id.encode()
+        slot = h & self._mask
+        while True:
+            stored_hash, offset = SLOT.unpack_from(self._mm, self._index_offset + slot * SLOT.size)
+            if offset == 0:
+                return None
+            if stored_hash == h:
+                record = self._data_offset + offset - 1
+                sku_len = RECORD.unpack_from(self._mm, record)[0]
+                start = record + RECORD.size
+                if self._mm[start:start + sku_len] == encoded:
+                    return record
+            slot = (slot + 1) & self._mask
+
+    def _entry(self, record: int) -> CatalogEntry:
+        sku_len, name_len, attrs_len, price, quantity = RECORD.unpack_from(self._mm, record)
+        start = record + RECORD.size
+        sku = self._mm[start:start + sku_len].decode()
+        start += sku_len
+        name = self._mm[start:start + name_len].decode()
+        start += name_len
+        attributes = json.loads(self._mm[start:start + attrs_len]) if attrs_len else {}
+        return CatalogEntry(sku, name, price, quantity, attributes)
+
+    def get(self, product_id: str) -> Optional[CatalogEntry]:
+        record = self._find(product_id)
+        return None if record is None else self._entry(record)
+
+    def price(self, product_id: str) -> Optional[float]:
+        """List price only (no name/attribute decoding), or None if the SKU is unknown."""
+        record = self._find(product_id)
+        return None if record is None else RECORD.unpack_from(self._mm, record)[3]
+
+    def __iter__(self) -> Iterator[CatalogEntry]:
+        """Entries in index order (one per SKU, the last occurrence in the feed)."""
+        for slot in range(self.slots):
+            stored_hash, offset = SLOT.unpack_from(self._mm, self._index_offset + slot * SLOT.size)
+            if offset:
+                yield self._entry(self._data_offset + offset - 1)
+
+    def inventory_rows(self) -> Iterator[dict]:
+        """Seed rows for an InventoryStore; skips decoding the attributes."""
+        mm = self._mm
+        for slot in range(self.slots):
+            _, offset = SLOT.unpack_from(mm, self._index_offset + slot * SLOT.size)
+            if offset:
+                record = self._data_offset + offset - 1
+                sku_len, name_len, _, _, quantity = RECORD.unpack_from(mm, record)
+                start = record + RECORD.size
+                product_id = mm[start:start + sku_len].decode()
+                name = mm[start + sku_len:start + sku_len + name_len].decode()
+                yield {"id": product_id, "product_id": product_id, "name": name, "quantity": quantity, "reserved": 0}
+
+    def close(self):
+        self._mm.close()
+
+
+_catalog: Optional[Catalog] = None
+
+
+def get_catalog() -> Optional[Catalog]:
+    """Process-wide catalog opened from CATALOG_PATH, or None when no catalog is configured."""
+    global _catalog
+    path = os.getenv("CATALOG_PATH")
+    if _catalog is None and path:
+        _catalog = Catalog(path)
+    return _catalog
@@ -0,0 +1,168 @@
+"""
+Nạp product feed (CSV hoặc JSONL) thành file catalog nhị phân (xem catalog/index.py).
+
+Feed được đọc tuần tự: mỗi dòng được mã hóa thành bản ghi và ghi thẳng ra file tạm,
+trong bộ nhớ chỉ giữ (hash, offset) của mỗi SKU (16 byte), nên nạp hàng triệu sản phẩm
+không cần dựng object cho từng dòng. Index được dựng sau khi đọc xong feed, rồi
+header + index + data được ghi ra file tạm và rename vào đích, nên process đang
+mmap file cũ không bao giờ thấy file dở dang.
+
+Cột của feed:
+    product_id (hoặc sku)   bắt buộc
+    name                    mặc định bằng product_id
+    price                   mặc định 0
+    quantity (hoặc stock)   số lượng tồn kho ban đầu, mặc định 0
+Các cột còn lại được giữ làm thuộc tính (JSON). SKU xuất hiện nhiều lần: dòng sau cùng thắng.
+
+Chạy:
+    python -m catalog.loader build products.csv more.jsonl -o catalog.bin
+    python -m catalog.loader get catalog.bin PROD-001
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog.index import HEADER, MAGIC, RECORD, SLOT, VERSION, Catalog, sku_hash, slot_count
+
+# Index bắt đầu ở offset này (header được pad tới 64 byte)
+INDEX_OFFSET = 64
+
+
+def read_feed(path: str) -> Iterator[Dict]:
+    """Rows of a .csv or .jsonl/.ndjson product feed."""
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    else:
+        raise ValueError(f"Unsupported feed format: {path} (expected .csv or .jsonl)")
+
+
+def encode_record(row: Dict) -> Tuple[str, bytes]:
+    """Returns (product_id, record bytes) for one feed row."""
+    row = dict(row)
+    product_id = row.pop("product_id", None) or row.pop("sku", None)
+    if not product_id:
+        raise ValueError(f"Feed row without product_id: {row}")
+    name = row.pop("name", None) or product_id
+    price = float(row.pop("price", None) or 0)
+    quantity = int(row.pop("quantity", None) or row.pop("stock", None) or 0)
+    row.pop("sku", None)
+    row.pop("stock", None)
+    sku_bytes = str(product_id).encode()
+    name_bytes = str(name).encode()
+    attrs = json.dumps(row, separators=(",", ":")).encode() if row else b""
+    record = RECORD.pack(len(sku_bytes), len(name_bytes), len(attrs), price, quantity) + sku_bytes + name_bytes + attrs
+    return str(product_id), record
+
+
+def _build_index(hashes: array, offsets: array, slots: int):
+    """Open-addressing table of (hash, offset + 1); returns (table bytes, distinct SKUs)."""
+    table = bytearray(slots * SLOT.size)
+    mask = slots - 1
+    distinct = 0
+    for h, offset in zip(hashes, offsets):
+        slot = h & mask
+        while True:
+            position = slot * SLOT.size
+            stored_hash, stored_offset = SLOT.unpack_from(table, position)
+            if stored_offset == 0:
+                distinct += 1
+                SLOT.pack_into(table, position, h, offset + 1)
+                break
+            if stored_hash == h:
+                # Cùng SKU xuất hiện lại trong feed: bản ghi sau thay thế bản trước
+                SLOT.pack_into(table, position, h, offset + 1)
+                break
+            slot = (slot + 1) & mask
+    return table, distinct
+
+
+def build_catalog(feed_paths: Iterable[str], output: str) -> Dict:
+    """Builds the catalog file at output from one or more feeds and returns load stats."""
+    started = time.perf_counter()
+    data_path = output + ".data.tmp"
+    hashes = array("Q")
+    offsets = array("Q")
+    rows = 0
+    with open(data_path, "wb") as data:
+        position = 0
+        for path in feed_paths:
+            for row in read_feed(path):
+                product_id, record = encode_record(row)
+                hashes.append(sku_hash(product_id))
+                offsets.append(position)
+                data.write(record)
+                position += len(record)
+                rows += 1
+
+    slots = slot_count(rows)
+    table, distinct = _build_index(hashes, offsets, slots)
+    data_offset = INDEX_OFFSET + len(table)
+
+    tmp_path = output + ".tmp"
+    try:
+        with open(tmp_path, "wb") as out:
+            header = HEADER.pack(MAGIC, VERSION, 0, distinct, slots, INDEX_OFFSET, data_offset)
+            out.write(header.ljust(INDEX_OFFSET, b"\0"))
+            out.write(table)
+            with open(data_path, "rb") as data:
+                shutil.copyfileobj(data, out, 1 << 20)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, output)
+    finally:
+        os.remove(data_path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "output": output,
+        "rows": rows,
+        "products": distinct,
+        "duplicates": rows - distinct,
+        "slots": slots,
+        "bytes": os.path.getsize(output),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build or query a memory-mapped product catalog")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build a catalog file from CSV/JSONL feeds")
+    build.add_argument("feeds", nargs="+")
+    build.add_argument("-o", "--output", required=True)
+    get = commands.add_parser("get", help="Look up products in a catalog file")
+    get.add_argument("catalog")
+    get.add_argument("product_ids", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(json.dumps(build_catalog(args.feeds, args.output), indent=2))
+        return
+
+    catalog = Catalog(args.catalog)
+    try:
+        for product_id in args.product_ids:
+            entry = catalog.get(product_id)
+            print(json.dumps(entry.__dict__ if entry else {"product_id": product_id, "found": False}))
+    finally:
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# integrations package initialization
@@ -0,0 +1,147 @@
+"""
+HTTP client dùng chung cho các service bên ngoài (payment gateway, inventory service,
+notification service).
+
+Mỗi service có một httpx.AsyncClient duy nhất trong worker process: connection pool
+keep-alive theo host được dùng lại giữa mọi activity, thay vì mỗi activity (hoặc mỗi
+module) tự mở kết nối. Mỗi service có timeout, giới hạn kết nối và giới hạn số request
+đồng thời riêng; request vượt giới hạn chờ trong semaphore thay vì mở thêm kết nối.
+
+Cấu hình qua biến môi trường, với PREFIX là PAYMENT_GATEWAY, INVENTORY_SERVICE hoặc
+NOTIFICATION_SERVICE:
+    <PREFIX>_URL                  base URL; không đặt = activity tiếp tục mô phỏng bằng sleep
+    <PREFIX>_TIMEOUT_SECONDS      timeout cho cả request (connect/read/write/pool)
+    <PREFIX>_MAX_CONNECTIONS      số kết nối tối đa tới host
+    <PREFIX>_MAX_CONCURRENCY      số request đồng thời tối đa
+
+Lỗi mạng, timeout, 429 và 5xx thành ServiceUnavailableError (ApplicationError retryable)
+để RetryPolicy của workflow backoff; 4xx khác là ServiceRequestError, lỗi nghiệp vụ,
+không retry và không làm mở circuit breaker.
+Chạy thử với stub server: python -m integrations.stub_server (xem integrations/stub_server.py).
+"""
+import asyncio
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+from temporalio.exceptions import ApplicationError
+
+SERVICE_UNAVAILABLE_ERROR_TYPE = "ServiceUnavailableError"
+SERVICE_REQUEST_ERROR_TYPE = "ServiceRequestError"
+
+# Tên service -> (tiền tố biến môi trường, timeout mặc định)
+SERVICES = {
+    "payment_gateway": ("PAYMENT_GATEWAY", 10.0),
+    "inventory_service": ("INVENTORY_SERVICE", 5.0),
+    "notification_service": ("NOTIFICATION_SERVICE", 5.0),
+}
+
+
+class ServiceUnavailableError(ApplicationError):
+    def __init__(self, service: str, reason: str):
+        super().__init__(f"{service} unavailable: {reason}", type=SERVICE_UNAVAILABLE_ERROR_TYPE)
+        self.service = service
+
+
+class ServiceRequestError(ApplicationError):
+    """4xx business rejection of a request: not retried, and not a failure of the service."""
+
+    def __init__(self, service: str, reason: str):
+        super().__init__(f"{service} rejected {reason}", type=SERVICE_REQUEST_ERROR_TYPE, non_retryable=True)
+        self.service = service
+
+
+@dataclass(frozen=True)
+class ServiceConfig:
+    name: str
+    base_url: Optional[str] = None
+    timeout_seconds: float = 5.0
+    max_connections: int = 100
+    max_concurrency: int = 100
+    keepalive_expiry_seconds: float = 30.0
+
+
+def load_service_config(name: str) -> ServiceConfig:
+    prefix, default_timeout = SERVICES[name]
+    return ServiceConfig(
+        name=name,
+        base_url=os.getenv(f"{prefix}_URL") or None,
+        timeout_seconds=float(os.getenv(f"{prefix}_TIMEOUT_SECONDS", str(default_timeout))),
+        max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", "100")),
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "100")),
+    )
+
+
+class ServiceClient:
+    """Pooled HTTP client for one external service."""
+
+    def __init__(self, config: ServiceConfig):
+        self.config = config
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def configured(self) -> bool:
+        return self.config.base_url is not None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            config = self.config
+            self._client = httpx.AsyncClient(
+                base_url=config.base_url,
+                timeout=httpx.Timeout(config.timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=config.max_connections,
+                    max_keepalive_connections=config.max_connections,
+                    keepalive_expiry=config.keepalive_expiry_seconds,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        return self._client
+
+    async def request(self, method: str, path: str, json: Any = None) -> Dict:
+        """Sends one request and returns the decoded JSON body ({} when empty)."""
+        if not self.configured:
+            raise RuntimeError(f"{self.config.name} has no base URL configured")
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                response = await client.request(method, path, json=json)
+            except httpx.TimeoutException as e:
+                raise ServiceUnavailableError(self.config.name, f"timeout on {method} {path}") from e
+            except httpx.TransportError as e:
+                raise ServiceUnavailableError(self.config.name, f"{type(e).__name__} on {method} {path}") from e
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ServiceUnavailableError(self.config.name, f"HTTP {response.status_code} on {method} {path}")
+        if response.status_code >= 400:
+            raise ServiceRequestError(
+                self.config.name, f"{method} {path}: HTTP {response.status_code} {response.text[:200]}"
+            )
+        return response.json() if response.content else {}
+
+    async def post(self, path: str, payload: Any = None) -> Dict:
+        return await self.request("POST", path, json=payload)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_services: Dict[str, ServiceClient] = {}
+
+
+def get_service(name: str) -> ServiceClient:
+    """Process-wide client for a service, shared by every activity in the worker."""
+    service = _services.get(name)
+    if service is None:
+        service = _services[name] = ServiceClient(load_service_config(name))
+    return service
+
+
+async def close_services():
+    """Closes every pooled connection; call once activities have drained."""
+    await asyncio.gather(*(service.close() for service in _services.values()))
+    _services.clear()
@@ -0,0 +1,126 @@
+"""
+Stub HTTP server cho payment gateway, inventory service và notification service,
+để chạy và load test tầng integrations mà không cần service thật.
+
+HTTP/1.1 keep-alive viết trên asyncio (không thêm dependency). Mọi request trả JSON sau
+--latency-ms; --error-rate là xác suất trả 503. Route:
+    POST /payments/...        {"approved": bool, "transaction_id": "..."} (--decline-rate)
+    GET  /stats               số kết nối đã mở và số request đã xử lý
+    còn lại                   {"ok": true, "path": ...}
+
+Chạy:
+    python -m integrations.stub_server --port 8081 --latency-ms 20
+    PAYMENT_GATEWAY_URL=http://localhost:8081 INVENTORY_SERVICE_URL=http://localhost:8081 \\
+        NOTIFICATION_SERVICE_URL=http://localhost:8081 python worker.py
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Dict, Optional, Tuple
+
+
+class StubServer:
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, decline_rate: float = 0.05,
+                 seed: Optional[int] = None):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.random = random.Random(seed)
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Starts listening and returns the bound port."""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def stats(self) -> Dict:
+        return {"connections": self.connections, "requests": self.requests}
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", "0")))
+        return method, path, headers, body
+
+    def _respond(self, method: str, path: str, body: bytes) -> Tuple[int, Dict]:
+        if path == "/stats":
+            return 200, self.stats()
+        if self.random.random() < self.error_rate:
+            return 503, {"error": "stub service unavailable"}
+        if method == "POST" and path.startswith("/payments"):
+            approved = self.random.random() >= self.decline_rate
+            return 200, {
+                "approved": approved,
+                "transaction_id": f"TXN-{self.random.randint(100000, 999999)}" if approved else None,
+            }
+        return 200, {"ok": True, "path": path}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, payload = self._respond(method, path, body)
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Service Unavailable'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(args):
+    server = StubServer(args.latency_ms, args.error_rate, args.decline_rate, args.seed)
+    port = await server.start(args.host, args.port)
+    print(f"Stub services listening on http://{args.host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub HTTP server for the external service integrations")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of answering 503")
+    parser.add_argument("--decline-rate", type=float, default=0.05, help="Probability a payment is declined")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# metrics package initialization
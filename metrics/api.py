@@ -0,0 +1,147 @@
+"""
+Prometheus metrics của API (GET /metrics).
+
+    api_request_duration_seconds{method, route}       histogram latency theo route (template,
+                                                      vd. /orders/{order_id}/status)
+    api_request_errors_total{method, route}           response 5xx hoặc exception
+    temporal_client_rpc_duration_seconds{operation}   latency các lời gọi Temporal của API
+                                                      (start_workflow, signal, query, describe...)
+    temporal_client_rpc_errors_total{operation}
+    api_orders_rejected_total                         đơn bị từ chối trước khi start workflow
+
+Label được bind trước: mỗi cặp (route, method) và mỗi operation chỉ gọi .labels() một lần,
+nên trên hot path chỉ còn một lần tra dict và một lần observe, không tạo dict label nào.
+"""
+import time
+from typing import Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from temporalio import client as temporal_client
+
+REQUEST_DURATION = Histogram(
+    "api_request_duration_seconds", "API request latency by route", ("method", "route"),
+)
+REQUEST_ERRORS = Counter(
+    "api_request_errors_total", "API requests that failed with 5xx or an exception", ("method", "route"),
+)
+RPC_DURATION = Histogram(
+    "temporal_client_rpc_duration_seconds", "Temporal client call latency from the API", ("operation",),
+)
+RPC_ERRORS = Counter(
+    "temporal_client_rpc_errors_total", "Temporal client calls from the API that raised", ("operation",),
+)
+REJECTED_ORDERS = Counter(
+    "api_orders_rejected", "Orders rejected by catalog validation before starting a workflow",
+)
+
+# Route không khớp (404) gom chung một label để số series không phụ thuộc URL
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _BoundRequestMetrics:
+    __slots__ = ("duration", "errors")
+
+    def __init__(self, method: str, route: str):
+        self.duration = REQUEST_DURATION.labels(method, route)
+        self.errors = REQUEST_ERRORS.labels(method, route)
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware recording latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+        # route path -> method -> metrics đã bind label
+        self._bound: Dict[str, Dict[str, _BoundRequestMetrics]] = {}
+
+    def _metrics_for(self, route_path: str, method: str) -> _BoundRequestMetrics:
+        by_method = self._bound.get(route_path)
+        if by_method is None:
+            by_method = self._bound[route_path] = {}
+        bound = by_method.get(method)
+        if bound is None:
+            bound = by_method[method] = _BoundRequestMetrics(method, route_path)
+        return bound
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Router của FastAPI ghi route đã khớp vào scope
+            route = scope.get("route")
+            bound = self._metrics_for(route.path if route is not None else UNMATCHED_ROUTE, scope["method"])
+            bound.duration.observe(time.perf_counter() - start)
+            if status >= 500:
+                bound.errors.inc()
+
+
+class _BoundRpcMetrics:
+    __slots__ = ("duration", "errors")
+
+    def __init__(self, operation: str):
+        self.duration = RPC_DURATION.labels(operation)
+        self.errors = RPC_ERRORS.labels(operation)
+
+
+_START_WORKFLOW = _BoundRpcMetrics("start_workflow")
+_SIGNAL_WORKFLOW = _BoundRpcMetrics("signal_workflow")
+_QUERY_WORKFLOW = _BoundRpcMetrics("query_workflow")
+_DESCRIBE_WORKFLOW = _BoundRpcMetrics("describe_workflow")
+_CANCEL_WORKFLOW = _BoundRpcMetrics("cancel_workflow")
+_TERMINATE_WORKFLOW = _BoundRpcMetrics("terminate_workflow")
+
+
+async def _timed(metrics: _BoundRpcMetrics, call):
+    start = time.perf_counter()
+    try:
+        return await call
+    except BaseException:
+        metrics.errors.inc()
+        raise
+    finally:
+        metrics.duration.observe(time.perf_counter() - start)
+
+
+class _RpcMetricsOutbound(temporal_client.OutboundInterceptor):
+    async def start_workflow(self, input):
+        return await _timed(_START_WORKFLOW, super().start_workflow(input))
+
+    async def signal_workflow(self, input):
+        return await _timed(_SIGNAL_WORKFLOW, super().signal_workflow(input))
+
+    async def query_workflow(self, input):
+        return await _timed(_QUERY_WORKFLOW, super().query_workflow(input))
+
+    async def describe_workflow(self, input):
+        return await _timed(_DESCRIBE_WORKFLOW, super().describe_workflow(input))
+
+    async def cancel_workflow(self, input):
+        return await _timed(_CANCEL_WORKFLOW, super().cancel_workflow(input))
+
+    async def terminate_workflow(self, input):
+        return await _timed(_TERMINATE_WORKFLOW, super().terminate_workflow(input))
+
+
+class RpcMetricsInterceptor(temporal_client.Interceptor):
+    """Client interceptor timing the Temporal calls the API makes."""
+
+    def intercept_client(self, next: temporal_client.OutboundInterceptor) -> temporal_client.OutboundInterceptor:
+        return _RpcMetricsOutbound(next)
+
+
+def render_metrics():
+    """(body, content type) for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
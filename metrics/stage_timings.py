@@ -0,0 +1,143 @@
+"""
+Sink JSONL cho thời gian từng giai đoạn của workflow (workflows/timings.py) và báo cáo
+p50/p95/p99 theo giai đoạn.
+
+Đặt STAGE_TIMINGS_PATH để mỗi worker process ghi thêm một dòng cho mỗi workflow run
+kết thúc (không đặt thì không ghi gì). Với supervisor.py, các process con ghi chung
+một file được: mỗi dòng được ghi bằng một lần write ở chế độ append.
+
+    {"workflow_type": "OrderApprovalWorkflow", "workflow_id": "order-...", "run_id": "...",
+     "outcome": "PROCESSING", "completed_at": 1760000000.0,
+     "stages": [["validation", 1760000000.0, 1760000001.2], ...]}
+
+Mốc thời gian là epoch seconds theo giờ của workflow (workflow.now()).
+
+Báo cáo các workflow kết thúc trong một khoảng thời gian:
+    python -m metrics.stage_timings stage_timings.jsonl [--since 2026-10-19T08:00] [--until ...]
+        [--last-minutes 60] [--workflow-type OrderApprovalWorkflow] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import orjson
+
+PERCENTILES = (50, 95, 99)
+# Giai đoạn giả: từ đầu giai đoạn đầu tiên tới cuối giai đoạn cuối cùng
+TOTAL_STAGE = "total"
+
+_lock = threading.Lock()
+_file = None
+
+
+def record(entry: Dict):
+    """Appends one finished workflow run to STAGE_TIMINGS_PATH, if set."""
+    global _file
+    path = os.getenv("STAGE_TIMINGS_PATH")
+    if not path:
+        return
+    line = orjson.dumps(entry) + b"\n"
+    with _lock:
+        if _file is None:
+            # Không buffer: mỗi dòng là một lần write(), các process ghi chung file không xen nhau
+            _file = open(path, "ab", buffering=0)
+        _file.write(line)
+
+
+def read_entries(path: str) -> Iterator[Dict]:
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield orjson.loads(line)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear interpolation between closest ranks; `sorted_values` must be non-empty."""
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def aggregate(entries: Iterable[Dict], since: Optional[float] = None, until: Optional[float] = None,
+              workflow_type: Optional[str] = None) -> Dict:
+    """p50/p95/p99 stage durations (ms) per workflow type for runs completed in [since, until)."""
+    durations: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    runs: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        completed_at = entry["completed_at"]
+        if since is not None and completed_at < since:
+            continue
+        if until is not None and completed_at >= until:
+            continue
+        if workflow_type is not None and entry["workflow_type"] != workflow_type:
+            continue
+        by_stage = durations[entry["workflow_type"]]
+        runs[entry["workflow_type"]] += 1
+        stages = entry["stages"]
+        for stage, start, end in stages:
+            by_stage[stage].append((end - start) * 1000)
+        if stages:
+            by_stage[TOTAL_STAGE].append((stages[-1][2] - stages[0][1]) * 1000)
+
+    report = {}
+    for wf_type in sorted(durations):
+        stages = {}
+        for stage, values in durations[wf_type].items():
+            values.sort()
+            stages[stage] = {
+                "count": len(values),
+                **{f"p{pct}_ms": round(percentile(values, pct), 3) for pct in PERCENTILES},
+                "max_ms": round(values[-1], 3),
+            }
+        report[wf_type] = {"runs": runs[wf_type], "stages": stages}
+    return report
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def print_report(report: Dict):
+    for wf_type, result in report.items():
+        print(f"{wf_type} ({result['runs']} runs)")
+        print(f"  {'stage':<20} {'count':>7} {'p50 ms':>11} {'p95 ms':>11} {'p99 ms':>11} {'max ms':>11}")
+        for stage, row in result["stages"].items():
+            print(
+                f"  {stage:<20} {row['count']:>7} {row['p50_ms']:>11.1f} {row['p95_ms']:>11.1f} "
+                f"{row['p99_ms']:>11.1f} {row['max_ms']:>11.1f}"
+            )
+        print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage workflow latency percentiles from a stage timings file")
+    parser.add_argument("path", help="JSONL file written through STAGE_TIMINGS_PATH")
+    parser.add_argument("--since", help="Only runs completed at or after this ISO time (local time unless offset given)")
+    parser.add_argument("--until", help="Only runs completed before this ISO time")
+    parser.add_argument("--last-minutes", type=float, help="Only runs completed in the last N minutes")
+    parser.add_argument("--workflow-type", help="Only this workflow type")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    since = _timestamp(args.since)
+    if args.last_minutes is not None:
+        since = time.time() - args.last_minutes * 60
+    report = aggregate(read_entries(args.path), since, _timestamp(args.until), args.workflow_type)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif not report:
+        print("No workflow runs in the selected window", file=sys.stderr)
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
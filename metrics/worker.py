@@ -0,0 +1,102 @@
+"""
+Prometheus metrics của worker process, xuất qua exporter của Temporal core SDK.
+
+Đặt WORKER_METRICS_PORT để mỗi worker process mở một cổng metrics (GET /metrics);
+supervisor.py gán cho mỗi process con một cổng riêng (WORKER_METRICS_PORT + thứ tự process).
+Không đặt thì không mở cổng nào.
+
+Core SDK ghi sẵn các metrics sau (tiền tố temporal_, label namespace/task_queue):
+    worker_task_slots_available{worker_type}           slot còn trống
+    workflow_task_execution_latency                    latency workflow task
+    workflow_task_schedule_to_start_latency
+    sticky_cache_hit / sticky_cache_miss / sticky_cache_size
+    activity_execution_latency{activity_type}          thời gian chạy activity
+    activity_execution_failed{activity_type}           activity thất bại
+    request_latency{operation}                         RPC tới Temporal server
+Dự án thêm:
+    worker_task_slots_max{task_queue, worker_type}     giới hạn slot đã cấu hình;
+                                                       utilisation = 1 - available / max
+    circuit_breaker_state{breaker}                     0 CLOSED, 1 HALF_OPEN, 2 OPEN
+    circuit_breaker_failure_rate{breaker}              % lỗi trong cửa sổ của breaker
+    circuit_breaker_calls / _failures / _rejected / _opened{breaker}
+                                                       counter của activities/circuit_breaker.py,
+                                                       chép sang mỗi WORKER_BREAKER_METRICS_SECONDS (mặc định 5)
+
+Mọi metrics được ghi trong Rust, không tốn gì trên hot path Python của activity/workflow.
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
+
+from activities.circuit_breaker import all_breaker_metrics
+
+logger = logging.getLogger(__name__)
+
+_runtime: Optional[Runtime] = None
+
+
+def get_runtime() -> Optional[Runtime]:
+    """Process-wide Temporal runtime exporting Prometheus metrics, or None when disabled."""
+    global _runtime
+    port = os.getenv("WORKER_METRICS_PORT")
+    if _runtime is None and port:
+        bind_address = f"{os.getenv('WORKER_METRICS_HOST', '0.0.0.0')}:{port}"
+        _runtime = Runtime(telemetry=TelemetryConfig(metrics=PrometheusConfig(bind_address=bind_address)))
+        logger.info(f"Serving worker metrics on http://{bind_address}/metrics")
+    return _runtime
+
+
+def record_slot_limits(task_queue: str, role: str, max_workflow_tasks: int, max_activities: int):
+    """Exports the configured slot limits next to core's slots-available gauge."""
+    runtime = get_runtime()
+    if runtime is None:
+        return
+    gauge = runtime.metric_meter.create_gauge(
+        "worker_task_slots_max", "Configured task slots per worker type", "slots",
+    ).with_additional_attributes({"task_queue": task_queue})
+    if role != "activity":
+        gauge.set(max_workflow_tasks, {"worker_type": "WorkflowWorker"})
+    if role != "workflow":
+        gauge.set(max_activities, {"worker_type": "ActivityWorker"})
+
+
+# Trạng thái breaker -> giá trị gauge circuit_breaker_state
+BREAKER_STATE_VALUES = {"CLOSED": 0, "HALF_OPEN": 1, "OPEN": 2}
+# Counter của CircuitBreaker.metrics() -> tên metrics
+BREAKER_COUNTERS = {
+    "calls": "circuit_breaker_calls",
+    "failures": "circuit_breaker_failures",
+    "rejected": "circuit_breaker_rejected",
+    "times_opened": "circuit_breaker_opened",
+}
+
+
+async def run_breaker_metrics(interval_seconds: float, stop_event: asyncio.Event):
+    """Copies every circuit breaker's state and counters into the worker metrics until stop_event is set."""
+    runtime = get_runtime()
+    if runtime is None:
+        return
+    meter = runtime.metric_meter
+    state_gauge = meter.create_gauge("circuit_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)")
+    rate_gauge = meter.create_gauge("circuit_breaker_failure_rate", "Failure rate in the breaker window", "percent")
+    counters = {key: meter.create_counter(name, f"Circuit breaker {key}") for key, name in BREAKER_COUNTERS.items()}
+    # Giá trị đã chép: counter của core SDK chỉ cộng thêm phần chênh lệch
+    exported: Dict[Tuple[str, str], int] = {}
+
+    while not stop_event.is_set():
+        for breaker in all_breaker_metrics():
+            attributes = {"breaker": breaker["name"]}
+            state_gauge.set(BREAKER_STATE_VALUES[breaker["state"]], attributes)
+            rate_gauge.set(round(breaker["failure_rate"] * 100), attributes)
+            for key, counter in counters.items():
+                delta = breaker[key] - exported.get((breaker["name"], key), 0)
+                if delta > 0:
+                    counter.add(delta, attributes)
+                exported[(breaker["name"], key)] = breaker[key]
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=interval_seconds)
+        except asyncio.TimeoutError:
+            pass
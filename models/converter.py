@@ -0,0 +1,111 @@
+"""
+Data converter của Temporal cho các model pydantic (Order, Payment, InventoryUpdate...).
+
+Converter mặc định của SDK encode bằng json.dumps (pydantic model đi qua .dict()) và
+decode ra dict, nên workflow và activity phải tự dựng lại model ở cả hai đầu
+(Payment(**result), InventoryUpdate(**update), .to_dict()...). Converter này:
+    - encode bằng orjson; model pydantic được serialise thẳng bằng serializer của
+      pydantic-core, không qua dict trung gian
+    - decode theo type hint của tham số / giá trị trả về bằng TypeAdapter được cache
+      theo type, validate thẳng từ bytes JSON (validate_json)
+nên activity và workflow có thể khai báo tham số và giá trị trả về là model.
+
+Payload vẫn là "json/plain" như converter mặc định: history cũ replay được, và client
+dùng converter mặc định vẫn đọc/ghi được payload của worker.
+
+Dùng: Client.connect(..., data_converter=data_converter)
+"""
+import functools
+from typing import Any, Dict, List, Optional, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter
+from pydantic.errors import PydanticSchemaGenerationError
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    BinaryNullPayloadConverter,
+    BinaryPlainPayloadConverter,
+    BinaryProtoPayloadConverter,
+    CompositePayloadConverter,
+    DataConverter,
+    EncodingPayloadConverter,
+    JSONProtoPayloadConverter,
+    value_to_type,
+)
+
+JSON_ENCODING = "json/plain"
+_ENCODING_METADATA = {"encoding": JSON_ENCODING.encode()}
+# Giống json.dumps: khóa int/enum của dict được chuyển thành chuỗi
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+# Type hint không cần validate: orjson.loads nhanh hơn TypeAdapter nhiều lần
+_PLAIN_TYPE_HINTS = frozenset((None, Any, dict, list, Dict, List))
+
+
+def _default(value: Any) -> Any:
+    # orjson tự xử lý dict/list/str/số/enum/datetime/dataclass/UUID
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if hasattr(value, "__iter__"):
+        # set, generator... như AdvancedJSONEncoder của SDK
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@functools.lru_cache(maxsize=None)
+def _type_adapter(type_hint: Any) -> Optional[TypeAdapter]:
+    """Cached adapter for a type hint, or None when pydantic cannot build one."""
+    try:
+        return TypeAdapter(type_hint)
+    except (PydanticSchemaGenerationError, TypeError):
+        return None
+
+
+def encode_json(value: Any) -> bytes:
+    """JSON bytes for a payload value."""
+    if isinstance(value, BaseModel):
+        return value.__pydantic_serializer__.to_json(value)
+    return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+
+
+def decode_json(data: bytes, type_hint: Optional[Type] = None) -> Any:
+    """Value of type_hint decoded from JSON bytes (plain JSON types without a hint)."""
+    try:
+        if type_hint in _PLAIN_TYPE_HINTS:
+            return orjson.loads(data)
+        adapter = _type_adapter(type_hint)
+    except TypeError:
+        # Type hint không hash được (hiếm): dùng cách chuyển kiểu của SDK
+        adapter = None
+    if adapter is None:
+        return value_to_type(type_hint, orjson.loads(data), [])
+    return adapter.validate_json(data)
+
+
+class ModelJSONPayloadConverter(EncodingPayloadConverter):
+    """'json/plain' converter backed by orjson and cached pydantic TypeAdapters."""
+
+    @property
+    def encoding(self) -> str:
+        return JSON_ENCODING
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        return Payload(metadata=_ENCODING_METADATA, data=encode_json(value))
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        return decode_json(payload.data, type_hint)
+
+
+class ModelPayloadConverter(CompositePayloadConverter):
+    """Default converter chain with the JSON step replaced by ModelJSONPayloadConverter."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            BinaryNullPayloadConverter(),
+            BinaryPlainPayloadConverter(),
+            JSONProtoPayloadConverter(),
+            BinaryProtoPayloadConverter(),
+            ModelJSONPayloadConverter(),
+        )
+
+
+data_converter = DataConverter(payload_converter_class=ModelPayloadConverter)
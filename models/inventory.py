@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
 from typing import List, Dict, Optional
+from typing_extensions import TypedDict
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -47,6 +48,16 @@ class InventoryUpdate(BaseModel):
             "order_id": self.order_id
         }
 
+class InventoryUpdateDict(TypedDict):
+    """Shape of InventoryUpdate.to_dict()."""
+    product_id: str
+    quantity_change: int
+    order_id: Optional[str]
+
+# Validate cả danh sách dòng trong một lần gọi pydantic-core, ra thẳng dict
+# (không dựng một InventoryUpdate cho mỗi dòng); khóa thừa như reason bị bỏ như to_dict()
+inventory_update_list = TypeAdapter(List[InventoryUpdateDict])
+
 class InventoryCheckItem(BaseModel):
     product_id: str
     quantity: int
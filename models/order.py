@@ -3,6 +3,8 @@ from typing import List, Optional
 from enum import Enum
 import uuid
 
+from models.payment import PaymentMethod
+
 class OrderStatus(str, Enum):
     CREATED = "CREATED"
     VALIDATION_PENDING = "VALIDATION_PENDING"
@@ -17,6 +19,7 @@ class OrderStatus(str, Enum):
     SHIPPED = "SHIPPED"
     DELIVERED = "DELIVERED"
     CANCELLED = "CANCELLED"
+    FULFILLMENT_FAILED = "FULFILLMENT_FAILED"
 
 class OrderItem(BaseModel):
     product_id: str
@@ -33,6 +36,7 @@ class Order(BaseModel):
     total_amount: float
     status: OrderStatus = OrderStatus.CREATED
     payment_id: Optional[str] = None
+    payment_method: Optional[PaymentMethod] = None
     shipping_id: Optional[str] = None
     
     # Cho phép các kiểu bất kỳ, bao gồm datetime
@@ -0,0 +1,79 @@
+"""
+Trạng thái gọn của đơn hàng mà OrderApprovalWorkflow giữ trong sticky cache của worker.
+
+Một Order pydantic giữ mỗi dòng là một OrderItem (object + __dict__ + 3 field), nên với
+hàng nghìn workflow đang chờ duyệt, bộ nhớ worker chủ yếu là các object này. OrderState
+là dataclass __slots__; các dòng được lưu theo cột: product_id (chuỗi được intern, SKU
+trùng nhau dùng chung một object), số lượng và giá trong array.array. Dict của từng dòng
+chỉ được dựng khi cần (query, kết quả workflow, tham số activity).
+
+Input vẫn được validate bằng model Order, nên dữ liệu sai bị từ chối như trước.
+"""
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from models.order import Order, OrderStatus
+from models.payment import PaymentMethod
+
+
+@dataclass(slots=True)
+class OrderState:
+    id: str
+    customer_id: str
+    total_amount: float
+    status: OrderStatus
+    product_ids: Tuple[str, ...]
+    quantities: array
+    prices: array
+    payment_id: Optional[str] = None
+    payment_method: Optional[PaymentMethod] = None
+    shipping_id: Optional[str] = None
+
+    @classmethod
+    def from_order(cls, order: Order) -> "OrderState":
+        return cls(
+            id=order.id,
+            customer_id=order.customer_id,
+            total_amount=order.total_amount,
+            status=order.status,
+            product_ids=tuple(sys.intern(item.product_id) for item in order.items),
+            quantities=array("q", (item.quantity for item in order.items)),
+            prices=array("d", (item.price for item in order.items)),
+            payment_id=order.payment_id,
+            payment_method=order.payment_method,
+            shipping_id=order.shipping_id,
+        )
+
+    @classmethod
+    def from_input(cls, order_input: dict) -> "OrderState":
+        """Validates the workflow input as an Order and keeps only the compact state."""
+        return cls.from_order(Order(**order_input))
+
+    def item_dicts(self) -> List[Dict]:
+        """Order lines as dicts, built on every call."""
+        return [
+            {"product_id": product_id, "quantity": quantity, "price": price}
+            for product_id, quantity, price in zip(self.product_ids, self.quantities, self.prices)
+        ]
+
+    def quantities_by_product(self) -> Dict[str, int]:
+        """Total quantity per product, in first-seen order."""
+        quantities: Dict[str, int] = {}
+        for product_id, quantity in zip(self.product_ids, self.quantities):
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        return quantities
+
+    def to_dict(self) -> Dict:
+        """Same shape as Order.model_dump()."""
+        return {
+            "id": self.id,
+            "customer_id": self.customer_id,
+            "items": self.item_dicts(),
+            "total_amount": self.total_amount,
+            "status": self.status,
+            "payment_id": self.payment_id,
+            "payment_method": self.payment_method,
+            "shipping_id": self.shipping_id,
+        }
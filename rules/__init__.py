@@ -0,0 +1 @@
+# rules package initialization
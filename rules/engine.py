@@ -0,0 +1,177 @@
+"""
+Rule engine cho auto-approval đơn hàng rủi ro thấp.
+
+Cấu hình (JSON, xem approval_rules.json) được compile một lần thành ApprovalRules:
+các ngưỡng và danh sách được chuyển sang frozenset/float, và chỉ các rule được
+bật mới nằm trong danh sách check. evaluate() là hàm thuần (không I/O, không
+random, không đọc đồng hồ).
+
+Rule được đánh giá trong activity evaluate_approval_rules: quyết định (kèm
+"version" của rule) nằm trong history, nên đổi cấu hình không làm thay đổi
+quyết định của các workflow đang chạy khi replay. Chỉ các workflow bắt đầu trước
+patch "approval-rules-activity" còn gọi evaluate() trong workflow; với chúng, worker
+và replayer phải nạp rule (get_rules()) trước khi chạy workflow task.
+
+Velocity được đếm trong bộ nhớ của từng worker process (VelocityTracker), không
+dùng chung giữa các process và mất khi restart: giới hạn velocity chỉ là best-effort.
+"""
+import json
+import os
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), "approval_rules.json")
+
+
+@dataclass(frozen=True)
+class Velocity:
+    """Số đơn và tổng tiền của khách hàng trong cửa sổ velocity, trước đơn hiện tại."""
+    order_count: int = 0
+    total_amount: float = 0.0
+
+
+@dataclass(frozen=True)
+class Decision:
+    auto_approve: bool
+    reasons: Tuple[str, ...] = ()
+    failed_rules: Tuple[str, ...] = ()
+    rules_version: str = ""
+
+
+@dataclass(frozen=True)
+class ApprovalRules:
+    version: str
+    checks: Tuple[Tuple[str, Callable[[dict, Optional[Velocity]], Optional[str]]], ...]
+    velocity_window: Optional[timedelta] = None
+
+    @property
+    def needs_velocity(self) -> bool:
+        return self.velocity_window is not None
+
+    def evaluate(self, order: dict, velocity: Optional[Velocity] = None) -> Decision:
+        """Runs every compiled check; the order is auto-approved only if none fails."""
+        reasons = []
+        failed_rules = []
+        for name, check in self.checks:
+            reason = check(order, velocity)
+            if reason:
+                reasons.append(reason)
+                failed_rules.append(name)
+        return Decision(auto_approve=bool(self.checks) and not reasons, reasons=tuple(reasons),
+                        failed_rules=tuple(failed_rules), rules_version=self.version)
+
+
+def compile_rules(config: dict) -> ApprovalRules:
+    """Compiles a rules config dict into an ApprovalRules instance."""
+    version = str(config.get("version", "0"))
+    if not config.get("enabled", True):
+        # Không có check nào -> không đơn nào được auto-approve
+        return ApprovalRules(version=version, checks=())
+
+    checks = []
+
+    blocked_customers = frozenset(config.get("blocked_customers", []))
+    if blocked_customers:
+        def check_blocked_customer(order, velocity):
+            if order.get("customer_id") in blocked_customers:
+                return "customer is blocked"
+        checks.append(("blocked_customers", check_blocked_customer))
+
+    allowed_customers = frozenset(config.get("allowed_customers", []))
+    max_total = config.get("max_total_amount")
+    allow_list_max_total = config.get("allow_list_max_total_amount", max_total)
+    if max_total is not None:
+        max_total = float(max_total)
+        allow_list_max_total = float(allow_list_max_total)
+
+        def check_amount(order, velocity):
+            limit = allow_list_max_total if order.get("customer_id") in allowed_customers else max_total
+            total = float(order.get("total_amount", 0))
+            if total > limit:
+                return f"total amount {total:.2f} exceeds {limit:.2f}"
+        checks.append(("amount", check_amount))
+
+    max_line_quantity = config.get("max_line_quantity")
+    if max_line_quantity is not None:
+        max_line_quantity = int(max_line_quantity)
+
+        def check_line_quantity(order, velocity):
+            for item in order.get("items", []):
+                if item["quantity"] > max_line_quantity:
+                    return f"quantity {item['quantity']} of {item['product_id']} exceeds {max_line_quantity}"
+        checks.append(("line_quantity", check_line_quantity))
+
+    product_categories: Dict[str, str] = dict(config.get("product_categories", {}))
+    blocked_categories = frozenset(config.get("blocked_categories", []))
+    if blocked_categories:
+        def check_categories(order, velocity):
+            for item in order.get("items", []):
+                category = product_categories.get(item["product_id"])
+                if category in blocked_categories:
+                    return f"product {item['product_id']} is in blocked category {category}"
+        checks.append(("categories", check_categories))
+
+    velocity_config = config.get("velocity")
+    velocity_window = None
+    if velocity_config:
+        velocity_window = timedelta(minutes=float(velocity_config.get("window_minutes", 60)))
+        max_orders = velocity_config.get("max_orders")
+        max_amount = velocity_config.get("max_amount")
+
+        def check_velocity(order, velocity):
+            if velocity is None:
+                return "velocity data unavailable"
+            if max_orders is not None and velocity.order_count >= int(max_orders):
+                return f"{velocity.order_count} orders in velocity window"
+            total = velocity.total_amount + float(order.get("total_amount", 0))
+            if max_amount is not None and total > float(max_amount):
+                return f"amount {total:.2f} in velocity window exceeds {float(max_amount):.2f}"
+        checks.append(("velocity", check_velocity))
+
+    return ApprovalRules(version=version, checks=tuple(checks), velocity_window=velocity_window)
+
+
+def load_rules(path: Optional[str] = None) -> ApprovalRules:
+    """Loads and compiles rules from path, APPROVAL_RULES_PATH or the bundled default."""
+    path = path or os.getenv("APPROVAL_RULES_PATH", DEFAULT_RULES_PATH)
+    with open(path) as f:
+        return compile_rules(json.load(f))
+
+
+_rules: Optional[ApprovalRules] = None
+
+
+def get_rules() -> ApprovalRules:
+    """Process-wide compiled rules, loaded once on first use."""
+    global _rules
+    if _rules is None:
+        _rules = load_rules()
+    return _rules
+
+
+class VelocityTracker:
+    """Sliding window of recent orders per customer, keyed by order id."""
+
+    def __init__(self, window: timedelta):
+        self.window = window
+        self._orders: Dict[str, Deque[Tuple[datetime, str, float]]] = defaultdict(deque)
+
+    def record(self, customer_id: str, order_id: str, amount: float, at: datetime) -> Velocity:
+        """
+        Returns the customer's velocity before this order, then records the order.
+        Recording an order again (activity retry) returns the same velocity without counting it twice.
+        """
+        orders = self._orders[customer_id]
+        cutoff = at - self.window
+        while orders and orders[0][0] < cutoff:
+            orders.popleft()
+        prior = []
+        for recorded_at, recorded_id, recorded_amount in orders:
+            if recorded_id == order_id:
+                break
+            prior.append(recorded_amount)
+        else:
+            orders.append((at, order_id, amount))
+        return Velocity(order_count=len(prior), total_amount=sum(prior))
@@ -0,0 +1,106 @@
+"""
+Đánh giá offline rule auto-approval trên dữ liệu đơn hàng lịch sử.
+
+Input là file JSON (list) hoặc JSONL, mỗi đơn hàng có dạng:
+    {"id": "...", "customer_id": "...", "items": [...], "total_amount": 120.0,
+     "created_at": "2026-01-01T10:00:00"}
+Đơn hàng được sắp theo created_at để tính velocity như khi chạy thật; created_at không
+có múi giờ được hiểu là UTC, nên file trộn cả hai dạng vẫn so sánh được. Đơn không có
+created_at được đánh giá trước, không có dữ liệu velocity (như khi tra velocity lỗi:
+rule velocity đưa đơn về duyệt thủ công).
+
+Chạy:
+    python -m rules.evaluate orders.jsonl [--rules rules/approval_rules.json] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from rules.engine import ApprovalRules, VelocityTracker, load_rules
+
+
+def read_orders(path: str) -> List[dict]:
+    with open(path) as f:
+        content = f.read().strip()
+    if content.startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def _created_at(order: dict) -> Optional[datetime]:
+    """created_at as an aware UTC datetime (naive values are taken as UTC), or None."""
+    value = order.get("created_at")
+    if not value:
+        return None
+    created_at = datetime.fromisoformat(value)
+    if created_at.tzinfo is None:
+        return created_at.replace(tzinfo=timezone.utc)
+    return created_at.astimezone(timezone.utc)
+
+
+def evaluate_orders(rules: ApprovalRules, orders: Iterable[dict]) -> dict:
+    """Replays orders through the rules and returns auto-approval statistics."""
+    # Đơn không có created_at đứng trước (không tính velocity cho chúng)
+    orders = sorted(orders, key=lambda order: (_created_at(order) is not None, _created_at(order) or 0))
+    tracker = VelocityTracker(rules.velocity_window) if rules.needs_velocity else None
+
+    approved = 0
+    approved_amount = 0.0
+    total_amount = 0.0
+    failed_rules = Counter()
+    for index, order in enumerate(orders):
+        velocity = None
+        created_at = _created_at(order)
+        if tracker is not None and created_at is not None:
+            velocity = tracker.record(order["customer_id"], order.get("id") or f"#{index}",
+                                      float(order.get("total_amount", 0)), created_at)
+        decision = rules.evaluate(order, velocity)
+
+        amount = float(order.get("total_amount", 0))
+        total_amount += amount
+        if decision.auto_approve:
+            approved += 1
+            approved_amount += amount
+        failed_rules.update(decision.failed_rules)
+
+    total = len(orders)
+    return {
+        "rules_version": rules.version,
+        "orders": total,
+        "auto_approved": approved,
+        "auto_approval_rate": approved / total if total else 0.0,
+        "auto_approved_amount_share": approved_amount / total_amount if total_amount else 0.0,
+        "failed_rules": dict(failed_rules.most_common()),
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Evaluate auto-approval rules against historical orders")
+    parser.add_argument("orders", help="JSON or JSONL file with historical orders")
+    parser.add_argument("--rules", help="Rules config (default: APPROVAL_RULES_PATH or bundled rules)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = evaluate_orders(load_rules(args.rules), read_orders(args.orders))
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Rules version:          {report['rules_version']}")
+    print(f"Orders evaluated:       {report['orders']}")
+    print(f"Auto-approved:          {report['auto_approved']} ({report['auto_approval_rate'] * 100:.1f}%)")
+    print(f"Auto-approved amount:   {report['auto_approved_amount_share'] * 100:.1f}% of total")
+    if report["failed_rules"]:
+        print("Orders sent to manual approval, by rule:")
+        for rule, count in report["failed_rules"].items():
+            print(f"  {count:>8}  {rule}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Kiểm tra tất cả các dòng của đơn hàng trong một lượt, so với catalog.
+
+Mỗi SKU khác nhau chỉ được tra catalog một lần; các phép kiểm tra còn lại chạy
+vector hóa bằng NumPy trên toàn bộ dòng, nên đơn hàng hàng chục nghìn dòng vẫn được
+kiểm tra trong một activity, và mọi lỗi được trả về cùng lúc (không dừng ở lỗi đầu tiên):
+    UNKNOWN_PRODUCT   SKU không có trong catalog
+    INVALID_QUANTITY  số lượng không nguyên hoặc ngoài [1, ORDER_MAX_LINE_QUANTITY]
+    INVALID_PRICE     giá âm hoặc không phải số
+    PRICE_DRIFT       giá lệch giá niêm yết quá ORDER_MAX_PRICE_DRIFT (tỷ lệ)
+    TOTAL_MISMATCH    total_amount âm hoặc khác tổng các dòng quá ORDER_TOTAL_TOLERANCE
+    EMPTY_ORDER       đơn không có dòng nào
+
+Nguồn tra cứu là catalog (CATALOG_PATH); khi không có catalog, dùng các sản phẩm mẫu
+DEFAULT_INVENTORY (không có giá niêm yết nên bỏ qua PRICE_DRIFT).
+"""
+import math
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Lỗi ở cấp đơn hàng (không thuộc dòng nào) dùng line = -1
+ORDER_LEVEL = -1
+
+
+@dataclass(frozen=True)
+class ValidationLimits:
+    max_line_quantity: int = 1000
+    # Tỷ lệ lệch tối đa so với giá niêm yết, vd. 0.05 = 5%
+    max_price_drift: float = 0.05
+    # Sai lệch tuyệt đối cho phép giữa total_amount và tổng các dòng
+    total_tolerance: float = 0.01
+
+
+def load_limits() -> ValidationLimits:
+    return ValidationLimits(
+        max_line_quantity=int(os.getenv("ORDER_MAX_LINE_QUANTITY", "1000")),
+        max_price_drift=float(os.getenv("ORDER_MAX_PRICE_DRIFT", "0.05")),
+        total_tolerance=float(os.getenv("ORDER_TOTAL_TOLERANCE", "0.01")),
+    )
+
+
+_limits: Optional[ValidationLimits] = None
+
+
+def get_limits() -> ValidationLimits:
+    """Process-wide validation limits, read from the environment on first use."""
+    global _limits
+    if _limits is None:
+        _limits = load_limits()
+    return _limits
+
+
+def price_lookup(catalog) -> Callable[[str], Optional[float]]:
+    """
+    product_id -> list price (NaN when the product has no list price), or None if the
+    product does not exist. Backed by the given Catalog, or DEFAULT_INVENTORY when None.
+    """
+    if catalog is not None:
+        def lookup(product_id: str) -> Optional[float]:
+            price = catalog.price(product_id)
+            if price is None:
+                return None
+            return price if price > 0 else math.nan
+        return lookup
+
+    from storage.inventory_store import DEFAULT_INVENTORY
+    known = {item["product_id"] for item in DEFAULT_INVENTORY}
+    return lambda product_id: math.nan if product_id in known else None
+
+
+def catalog_price_lookup() -> Callable[[str], Optional[float]]:
+    """Price lookup over the process-wide catalog (CATALOG_PATH)."""
+    from catalog.index import get_catalog
+    return price_lookup(get_catalog())
+
+
+def _error(line: int, product_id: Optional[str], code: str, message: str) -> Dict:
+    return {"line": line, "product_id": product_id, "code": code, "message": message}
+
+
+def validate_lines(order: Dict, lookup: Callable[[str], Optional[float]],
+                   limits: Optional[ValidationLimits] = None) -> List[Dict]:
+    """Every problem with the order's lines and total, ordered by line; empty when valid."""
+    limits = limits or get_limits()
+    items = order.get("items") or []
+    total_amount = order.get("total_amount", 0)
+    if not items:
+        return [_error(ORDER_LEVEL, None, "EMPTY_ORDER", "Order has no items")]
+
+    product_ids = [item["product_id"] for item in items]
+    # Tra catalog một lần cho mỗi SKU khác nhau
+    distinct = {product_id: None for product_id in product_ids}
+    for product_id in distinct:
+        distinct[product_id] = lookup(product_id)
+    found_prices = [distinct[product_id] for product_id in product_ids]
+
+    known = np.fromiter((p is not None for p in found_prices), dtype=bool, count=len(items))
+    list_price = np.fromiter((math.nan if p is None else p for p in found_prices), dtype=np.float64, count=len(items))
+    quantity = np.fromiter((item.get("quantity", 0) for item in items), dtype=np.float64, count=len(items))
+    price = np.fromiter((item.get("price", 0) for item in items), dtype=np.float64, count=len(items))
+
+    bad_quantity = (quantity != np.floor(quantity)) | (quantity < 1) | (quantity > limits.max_line_quantity)
+    bad_price = ~np.isfinite(price) | (price < 0)
+    has_list_price = known & np.isfinite(list_price) & ~bad_price
+    drift = np.zeros(len(items))
+    np.divide(np.abs(price - list_price), list_price, out=drift, where=has_list_price)
+    drifted = has_list_price & (drift > limits.max_price_drift)
+
+    errors = []
+    for line in np.flatnonzero(~known).tolist():
+        errors.append(_error(line, product_ids[line], "UNKNOWN_PRODUCT", f"Product {product_ids[line]} not found"))
+    for line in np.flatnonzero(bad_quantity).tolist():
+        errors.append(_error(line, product_ids[line], "INVALID_QUANTITY",
+                             f"Quantity {items[line].get('quantity')} outside 1..{limits.max_line_quantity}"))
+    for line in np.flatnonzero(bad_price).tolist():
+        errors.append(_error(line, product_ids[line], "INVALID_PRICE", f"Invalid price {items[line].get('price')}"))
+    for line in np.flatnonzero(drifted).tolist():
+        errors.append(_error(line, product_ids[line], "PRICE_DRIFT",
+                             f"Price {price[line]:.2f} differs from list price {list_price[line]:.2f} by {drift[line]:.1%}"))
+    errors.sort(key=lambda error: error["line"])
+
+    lines_total = float(np.dot(quantity, np.where(bad_price, 0.0, price)))
+    # Với đơn rất lớn, sai số làm tròn float có thể vượt ngưỡng tuyệt đối
+    tolerance = max(limits.total_tolerance, 1e-9 * abs(lines_total))
+    if total_amount < 0 or abs(total_amount - lines_total) > tolerance:
+        errors.append(_error(ORDER_LEVEL, None, "TOTAL_MISMATCH",
+                             f"Order total ${total_amount:.2f} does not match line total ${lines_total:.2f}"))
+    return errors
@@ -0,0 +1 @@
+# storage package initialization
@@ -0,0 +1,264 @@
+"""
+Interface lưu trữ tồn kho dùng chung cho inventory activities.
+
+Mọi thao tác làm thay đổi tồn kho đều là một bước kiểm tra-và-cập nhật nguyên tử
+trong store (không phải đọc trong activity rồi ghi sau một lời gọi service), nên
+nhiều activity chạy song song, kể cả ở nhiều worker process, không thể bán vượt
+số lượng còn lại.
+
+Chọn backend qua biến môi trường INVENTORY_STORE:
+    memory    (mặc định) dữ liệu trong bộ nhớ của process, khóa theo SKU
+    array     bảng dạng cột NumPy trong bộ nhớ, cho số lượng SKU lớn (xem storage/inventory_table.py)
+Với memory/array, đặt INVENTORY_JOURNAL_DIR để ghi journal mọi thay đổi và phục hồi
+trạng thái khi worker khởi động lại (xem storage/journal.py).
+    postgres  bảng inventory trong Postgres qua asyncpg pool (xem storage/postgres.py)
+"""
+import asyncio
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+from models.inventory import InventoryItem, InventoryStatus
+from storage.leases import Lease, LeaseBook, LeaseNotFoundError, merge_lines
+
+LOW_STOCK_THRESHOLD = 10
+
+# Dữ liệu kho mẫu, dùng để seed các backend khi không có catalog
+DEFAULT_INVENTORY = [
+    {"id": "INV-001", "product_id": "PROD-001", "name": "Laptop XPS 15", "quantity": 50, "reserved": 5},
+    {"id": "INV-002", "product_id": "PROD-002", "name": "iPhone 15 Pro", "quantity": 100, "reserved": 10},
+    {"id": "INV-003", "product_id": "PROD-003", "name": "Sony Headphones XM5", "quantity": 30, "reserved": 2},
+    {"id": "INV-004", "product_id": "PROD-004", "name": "Samsung TV 65\"", "quantity": 12, "reserved": 2},
+    {"id": "INV-005", "product_id": "PROD-005", "name": "Gaming Mouse", "quantity": 5, "reserved": 0},
+]
+
+
+def seed_inventory() -> Iterable[dict]:
+    """Rows a new store starts from: the product catalog (CATALOG_PATH) if set, else DEFAULT_INVENTORY."""
+    from catalog.index import get_catalog
+    catalog = get_catalog()
+    return DEFAULT_INVENTORY if catalog is None else catalog.inventory_rows()
+
+
+class ProductNotFoundError(LookupError):
+    def __init__(self, product_id: str):
+        super().__init__(f"Product {product_id} not found")
+        self.product_id = product_id
+
+
+class InsufficientInventoryError(Exception):
+    def __init__(self, product_id: str, requested: int, available: int):
+        super().__init__(
+            f"Insufficient inventory for product {product_id}. Requested: {requested}, Available: {available}"
+        )
+        self.product_id = product_id
+        self.requested = requested
+        self.available = available
+
+
+def stock_status(quantity: int) -> InventoryStatus:
+    if quantity == 0:
+        return InventoryStatus.OUT_OF_STOCK
+    if quantity < LOW_STOCK_THRESHOLD:
+        return InventoryStatus.LOW_STOCK
+    return InventoryStatus.IN_STOCK
+
+
+class InventoryStore(ABC):
+    """
+    Atomic stock operations. All quantities are positive unit counts; order_id
+    identifies who made the change and is kept by backends that record history.
+
+    Lease methods have an in-process implementation here (LeaseBook) for the
+    memory and array backends; Postgres overrides them with a leases table.
+    """
+
+    def __init__(self):
+        self._lease_book = LeaseBook()
+        # Khóa theo lease_id khi đang cấp lease, kèm số lời gọi đang giữ/chờ khóa (để xóa khóa
+        # khi không còn ai dùng): activity retry sau heartbeat timeout có thể gọi lại cùng
+        # lease_id trong khi lần gọi đầu vẫn đang đặt trước từng SKU
+        self._lease_locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    @abstractmethod
+    async def get(self, product_id: str) -> InventoryItem:
+        """Returns a snapshot of the item. Raises ProductNotFoundError."""
+
+    async def check_batch(self, lines: Sequence[Tuple[str, int]]) -> List[dict]:
+        """
+        Availability of a whole order given (product_id, quantity) lines. Lines for
+        the same SKU are summed. Returns one dict per distinct SKU with requested,
+        available, is_available and status. Raises ProductNotFoundError.
+        """
+        requested = {}
+        for product_id, quantity in lines:
+            requested[product_id] = requested.get(product_id, 0) + quantity
+        results = []
+        for product_id, quantity in requested.items():
+            item = await self.get(product_id)
+            available = item.available_quantity()
+            results.append({
+                "product_id": product_id,
+                "requested": quantity,
+                "available": available,
+                "is_available": available >= quantity,
+                "status": item.status,
+            })
+        return results
+
+    @abstractmethod
+    async def reserve(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        """
+        Reserves quantity units only if that many are available, in one step.
+        Raises InsufficientInventoryError otherwise, leaving the item unchanged.
+        """
+
+    @abstractmethod
+    async def commit(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        """Removes quantity units from stock, consuming up to that many reserved units."""
+
+    @abstractmethod
+    async def release(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        """Returns up to quantity reserved units to available stock."""
+
+    @abstractmethod
+    async def restock(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        """Adds quantity units to stock."""
+
+    @abstractmethod
+    async def dump(self) -> List[dict]:
+        """All items as seed-style dicts (product_id, id, name, quantity, reserved), for snapshots."""
+
+    async def reserve_lease(self, lease_id: str, lines: Sequence[Tuple[str, int]], ttl_seconds: float,
+                            order_id: Optional[str] = None) -> Lease:
+        """
+        Reserves every line under one lease that lapses after ttl_seconds, or nothing
+        (raising InsufficientInventoryError). Granting an existing lease_id returns it;
+        concurrent calls for one lease_id are serialized, so its units are reserved once.
+        """
+        lock, users = self._lease_locks.get(lease_id) or (asyncio.Lock(), 0)
+        self._lease_locks[lease_id] = (lock, users + 1)
+        try:
+            async with lock:
+                return await self._grant_lease(lease_id, lines, ttl_seconds, order_id)
+        finally:
+            lock, users = self._lease_locks[lease_id]
+            if users == 1:
+                del self._lease_locks[lease_id]
+            else:
+                self._lease_locks[lease_id] = (lock, users - 1)
+
+    async def _grant_lease(self, lease_id: str, lines: Sequence[Tuple[str, int]], ttl_seconds: float,
+                           order_id: Optional[str]) -> Lease:
+        existing = self._lease_book.get(lease_id)
+        if existing is not None:
+            return existing
+        lease = Lease(lease_id, order_id, time.time() + ttl_seconds)
+        try:
+            for product_id, quantity in merge_lines(lines):
+                await self.reserve(product_id, quantity, order_id=lease_id)
+                lease.lines.append((product_id, quantity))
+        except BaseException:
+            for product_id, quantity in lease.lines:
+                await self.release(product_id, quantity, order_id=lease_id)
+            raise
+        self._lease_book.add(lease)
+        return lease
+
+    async def reserve_lease_batch(
+        self, requests: Sequence[Tuple[str, Sequence[Tuple[str, int]], float, Optional[str]]]
+    ) -> List[Union[Lease, ProductNotFoundError, InsufficientInventoryError]]:
+        """
+        Grants (lease_id, lines, ttl_seconds, order_id) requests strictly in order.
+        Each entry of the result is the granted Lease or the error that refused it.
+        """
+        outcomes = []
+        for lease_id, lines, ttl_seconds, order_id in requests:
+            try:
+                outcomes.append(await self.reserve_lease(lease_id, lines, ttl_seconds, order_id=order_id))
+            except (ProductNotFoundError, InsufficientInventoryError) as e:
+                outcomes.append(e)
+        return outcomes
+
+    async def commit_lease(self, lease_id: str) -> Lease:
+        """Removes the leased units from stock. Raises LeaseNotFoundError if it lapsed."""
+        lease = self._lease_book.pop(lease_id)
+        if lease is None:
+            raise LeaseNotFoundError(lease_id)
+        if lease.expires_at <= time.time():
+            # Hết hạn nhưng sweeper chưa chạy tới: xử lý như đã hết hạn
+            await self._release_lines(lease)
+            raise LeaseNotFoundError(lease_id)
+        for product_id, quantity in lease.lines:
+            await self.commit(product_id, quantity, order_id=lease_id)
+        return lease
+
+    async def release_lease(self, lease_id: str) -> Optional[Lease]:
+        """Returns the leased units to available stock. No-op (None) if already gone."""
+        lease = self._lease_book.pop(lease_id)
+        if lease is not None:
+            await self._release_lines(lease)
+        return lease
+
+    async def expire_leases(self, now: Optional[float] = None) -> List[Lease]:
+        """Releases every lease whose expiry has passed, in bulk."""
+        expired = self._lease_book.pop_expired(time.time() if now is None else now)
+        for lease in expired:
+            await self._release_lines(lease)
+        return expired
+
+    async def get_lease(self, lease_id: str) -> Optional[Lease]:
+        return self._lease_book.get(lease_id)
+
+    async def leases(self) -> List[Lease]:
+        return self._lease_book.all()
+
+    def restore_lease(self, lease: Lease):
+        """Re-registers a lease whose units are already reserved (recovery only)."""
+        self._lease_book.add(lease)
+
+    async def _release_lines(self, lease: Lease):
+        for product_id, quantity in lease.lines:
+            await self.release(product_id, quantity, order_id=lease.lease_id)
+
+    async def close(self):
+        pass
+
+
+_store: Optional[InventoryStore] = None
+
+
+def create_inventory_store(backend: Optional[str] = None) -> InventoryStore:
+    backend = (backend or os.getenv("INVENTORY_STORE", "memory")).lower()
+    if os.getenv("INVENTORY_JOURNAL_DIR") and backend in ("memory", "array"):
+        # Backend trong bộ nhớ + journal trên đĩa, phục hồi trạng thái khi khởi động lại
+        from storage.journal import create_journaled_store
+        if backend == "array":
+            from storage.inventory_table import ArrayInventoryStore as inner_store
+        else:
+            from storage.memory import InMemoryInventoryStore as inner_store
+        return create_journaled_store(inner_store)
+    if backend == "memory":
+        from storage.memory import InMemoryInventoryStore
+        return InMemoryInventoryStore()
+    if backend == "postgres":
+        from storage.postgres import PostgresInventoryStore
+        return PostgresInventoryStore()
+    if backend == "array":
+        from storage.inventory_table import ArrayInventoryStore
+        return ArrayInventoryStore()
+    raise ValueError(f"Unknown INVENTORY_STORE backend '{backend}' (expected 'memory', 'array' or 'postgres')")
+
+
+def get_inventory_store() -> InventoryStore:
+    """Process-wide inventory store, created on first use."""
+    global _store
+    if _store is None:
+        _store = create_inventory_store()
+    return _store
+
+
+def get_hot_skus() -> FrozenSet[str]:
+    """SKUs whose reservations go through a per-SKU SkuReservationWorkflow (INVENTORY_HOT_SKUS)."""
+    return frozenset(p.strip() for p in os.getenv("INVENTORY_HOT_SKUS", "").split(",") if p.strip())
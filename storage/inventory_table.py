@@ -0,0 +1,220 @@
+"""
+Bảng tồn kho dạng cột trong bộ nhớ: quantity, reserved và status nằm trong các
+mảng NumPy, tra cứu qua map SKU -> dòng.
+
+So với một InventoryItem pydantic cho mỗi SKU:
+    - kiểm tra cả đơn hàng (hàng trăm dòng) là một phép so sánh vector hóa
+    - LOW_STOCK/OUT_OF_STOCK của toàn bộ SKU được tính lại trong một lượt
+    - mỗi SKU tốn 25 byte cho số liệu (quantity, reserved, updated_at + status int8),
+      thay vì một object pydantic
+
+ArrayInventoryStore (INVENTORY_STORE=array) dùng bảng này làm backend. Mọi thao tác
+đều đồng bộ, không có await ở giữa, nên nguyên tử trong event loop của worker mà
+không cần khóa. Như backend memory, dữ liệu chỉ nằm trong một process.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.inventory import InventoryItem, InventoryStatus
+from storage.inventory_store import (
+    LOW_STOCK_THRESHOLD,
+    InsufficientInventoryError,
+    InventoryStore,
+    ProductNotFoundError,
+    seed_inventory,
+)
+
+# Mã status lưu trong mảng int8 là chỉ số trong tuple này
+STATUSES = (InventoryStatus.IN_STOCK, InventoryStatus.LOW_STOCK, InventoryStatus.OUT_OF_STOCK)
+IN_STOCK, LOW_STOCK, OUT_OF_STOCK = range(len(STATUSES))
+
+
+class InventoryTable:
+    def __init__(self, capacity: int = 1024):
+        self._rows: Dict[str, int] = {}
+        self.product_ids: List[str] = []
+        self.item_ids: List[str] = []
+        self.names: List[str] = []
+        self.size = 0
+        self.quantity = np.zeros(capacity, dtype=np.int64)
+        self.reserved = np.zeros(capacity, dtype=np.int64)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        # Epoch seconds của lần cập nhật gần nhất
+        self.updated_at = np.zeros(capacity, dtype=np.float64)
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict]) -> "InventoryTable":
+        items = list(items)
+        table = cls(capacity=max(len(items), 1))
+        for data in items:
+            table.add(data["product_id"], data["quantity"], data.get("reserved", 0),
+                      item_id=data.get("id"), name=data.get("name"))
+        table.recompute_status()
+        return table
+
+    def _grow(self, capacity: int):
+        self.quantity = np.resize(self.quantity, capacity)
+        self.reserved = np.resize(self.reserved, capacity)
+        self.status = np.resize(self.status, capacity)
+        self.updated_at = np.resize(self.updated_at, capacity)
+
+    def add(self, product_id: str, quantity: int, reserved: int = 0,
+            item_id: Optional[str] = None, name: Optional[str] = None) -> int:
+        """Appends a SKU and returns its row. Call recompute_status() after bulk loads."""
+        if product_id in self._rows:
+            raise ValueError(f"Product {product_id} already exists")
+        if self.size == len(self.quantity):
+            self._grow(max(2 * self.size, 1))
+        row = self.size
+        self._rows[product_id] = row
+        self.product_ids.append(product_id)
+        self.item_ids.append(item_id or product_id)
+        self.names.append(name or product_id)
+        self.quantity[row] = quantity
+        self.reserved[row] = reserved
+        self.updated_at[row] = datetime.now().timestamp()
+        self.size += 1
+        return row
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._rows
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns (the SKU map and name lists are extra)."""
+        return sum(column[:self.size].nbytes for column in (self.quantity, self.reserved, self.status, self.updated_at))
+
+    def row(self, product_id: str) -> int:
+        row = self._rows.get(product_id)
+        if row is None:
+            raise ProductNotFoundError(product_id)
+        return row
+
+    def rows(self, product_ids: Sequence[str]) -> np.ndarray:
+        return np.fromiter((self.row(p) for p in product_ids), dtype=np.int64, count=len(product_ids))
+
+    def recompute_status(self, rows: Optional[np.ndarray] = None):
+        """Recomputes IN/LOW/OUT_OF_STOCK for the given rows, or for every SKU in one pass."""
+        if rows is None:
+            rows = slice(0, self.size)
+        quantity = self.quantity[rows]
+        self.status[rows] = np.where(
+            quantity <= 0, OUT_OF_STOCK, np.where(quantity < LOW_STOCK_THRESHOLD, LOW_STOCK, IN_STOCK)
+        )
+
+    def check_batch(self, product_ids: Sequence[str], quantities: Sequence[int]):
+        """
+        Vectorized availability check for a whole order. Lines for the same SKU are
+        summed first. Returns (rows, requested, available, ok), one entry per distinct SKU.
+        """
+        line_rows = self.rows(product_ids)
+        rows, inverse = np.unique(line_rows, return_inverse=True)
+        requested = np.bincount(inverse, weights=np.asarray(quantities, dtype=np.int64)).astype(np.int64)
+        available = self.quantity[rows] - self.reserved[rows]
+        return rows, requested, available, available >= requested
+
+    def reserve_batch(self, product_ids: Sequence[str], quantities: Sequence[int]) -> np.ndarray:
+        """Reserves every line or none of them. Returns the affected rows."""
+        rows, requested, available, ok = self.check_batch(product_ids, quantities)
+        if not ok.all():
+            first = int(np.argmin(ok))
+            raise InsufficientInventoryError(
+                self.product_ids[rows[first]], int(requested[first]), int(available[first])
+            )
+        self.reserved[rows] += requested
+        self._touch(rows)
+        return rows
+
+    def reserve(self, product_id: str, quantity: int) -> int:
+        row = self.row(product_id)
+        available = int(self.quantity[row] - self.reserved[row])
+        if available < quantity:
+            raise InsufficientInventoryError(product_id, quantity, available)
+        self.reserved[row] += quantity
+        self._touch(row)
+        return row
+
+    def commit(self, product_id: str, quantity: int) -> int:
+        row = self.row(product_id)
+        self.reserved[row] -= min(quantity, int(self.reserved[row]))
+        self.quantity[row] = max(int(self.quantity[row]) - quantity, 0)
+        self._touch(row)
+        return row
+
+    def release(self, product_id: str, quantity: int) -> int:
+        row = self.row(product_id)
+        self.reserved[row] -= min(quantity, int(self.reserved[row]))
+        self._touch(row)
+        return row
+
+    def restock(self, product_id: str, quantity: int) -> int:
+        row = self.row(product_id)
+        self.quantity[row] += quantity
+        self._touch(row)
+        return row
+
+    def _touch(self, rows):
+        self.recompute_status(rows)
+        self.updated_at[rows] = datetime.now().timestamp()
+
+    def to_rows(self) -> List[dict]:
+        quantity = self.quantity[:self.size].tolist()
+        reserved = self.reserved[:self.size].tolist()
+        return [
+            {"product_id": product_id, "id": item_id, "name": name, "quantity": q, "reserved": r}
+            for product_id, item_id, name, q, r in zip(self.product_ids, self.item_ids, self.names, quantity, reserved)
+        ]
+
+    def item(self, row: int) -> InventoryItem:
+        return InventoryItem(
+            id=self.item_ids[row],
+            product_id=self.product_ids[row],
+            name=self.names[row],
+            quantity=int(self.quantity[row]),
+            reserved=int(self.reserved[row]),
+            status=STATUSES[self.status[row]],
+            last_updated=datetime.fromtimestamp(self.updated_at[row]),
+        )
+
+
+class ArrayInventoryStore(InventoryStore):
+    def __init__(self, items: Optional[Iterable[dict]] = None):
+        super().__init__()
+        self.table = InventoryTable.from_items(seed_inventory() if items is None else items)
+
+    async def get(self, product_id: str) -> InventoryItem:
+        return self.table.item(self.table.row(product_id))
+
+    async def check_batch(self, lines: Sequence[Tuple[str, int]]) -> List[dict]:
+        table = self.table
+        rows, requested, available, ok = table.check_batch([p for p, _ in lines], [q for _, q in lines])
+        return [
+            {
+                "product_id": table.product_ids[row],
+                "requested": int(req),
+                "available": int(avail),
+                "is_available": bool(is_ok),
+                "status": STATUSES[table.status[row]],
+            }
+            for row, req, avail, is_ok in zip(rows.tolist(), requested.tolist(), available.tolist(), ok.tolist())
+        ]
+
+    async def reserve(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return self.table.item(self.table.reserve(product_id, quantity))
+
+    async def commit(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return self.table.item(self.table.commit(product_id, quantity))
+
+    async def release(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return self.table.item(self.table.release(product_id, quantity))
+
+    async def restock(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return self.table.item(self.table.restock(product_id, quantity))
+
+    async def dump(self) -> List[dict]:
+        return self.table.to_rows()
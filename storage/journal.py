@@ -0,0 +1,650 @@
+"""
+Journal append-only cho các thay đổi tồn kho, cộng snapshot định kỳ.
+
+Mỗi thay đổi (reserve, release, commit, restock) được ghi thành một bản ghi nhị phân
+vào segment file được mmap. Bản ghi lưu số lượng sau thay đổi (quantity_after,
+reserved_after) chứ không chỉ delta, nên replay chỉ cần gán lại giá trị cuối cùng
+của mỗi SKU. order_id đi kèm cho biết ai đã giữ/trả hàng.
+
+Lease (storage/leases.py) được ghi thành một bản ghi duy nhất cho mỗi lần cấp/commit/
+trả/hết hạn, chứa mọi dòng của lease cùng số lượng sau thay đổi, nên một lease không
+bao giờ được phục hồi dở dang.
+
+Group commit: append() ghi ngay vào mmap (không chặn); commit(seq) chờ tới khi một
+lần flush (msync) trong thread riêng bao trùm seq đó. Các activity chạy đồng thời
+trong cùng khoảng INVENTORY_JOURNAL_GROUP_COMMIT_MS dùng chung một lần fsync.
+
+Snapshot: cứ mỗi snapshot_every bản ghi, trạng thái đầy đủ được ghi ra
+snapshot-<seq>.snap (ghi file tạm, fsync, rename), journal chuyển sang segment mới và
+các segment/snapshot cũ bị xóa. Khởi động lại = nạp snapshot mới nhất + replay phần
+đuôi journal. Bản ghi cuối bị ghi dở (crash giữa chừng) được phát hiện bằng CRC và bỏ qua.
+
+Một thư mục journal chỉ dành cho một process (khóa bằng flock), dùng với backend
+memory hoặc array:
+    INVENTORY_JOURNAL_DIR              bật journal, thư mục chứa segment và snapshot
+    INVENTORY_JOURNAL_GROUP_COMMIT_MS  thời gian gom các lần commit (mặc định 2)
+    INVENTORY_JOURNAL_SEGMENT_BYTES    kích thước mỗi segment (mặc định 16 MiB)
+    INVENTORY_JOURNAL_SNAPSHOT_EVERY   số bản ghi giữa hai snapshot (mặc định 10000)
+    INVENTORY_JOURNAL_ARCHIVE          1 = chuyển segment cũ vào archive/ thay vì xóa, để giữ lịch sử
+
+Xem lịch sử:
+    python -m storage.journal /path/to/journal [--product PROD-001] [--order ORD-1]
+"""
+import argparse
+import array
+import asyncio
+import fcntl
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from models.inventory import InventoryItem
+from storage.inventory_store import InventoryStore, seed_inventory
+from storage.leases import Lease, LeaseNotFoundError
+
+OP_RESERVE, OP_RELEASE, OP_COMMIT, OP_RESTOCK = 1, 2, 3, 4
+OP_LEASE_GRANT, OP_LEASE_COMMIT, OP_LEASE_RELEASE, OP_LEASE_EXPIRE = 5, 6, 7, 8
+LEASE_OPS = (OP_LEASE_GRANT, OP_LEASE_COMMIT, OP_LEASE_RELEASE, OP_LEASE_EXPIRE)
+OP_NAMES = {
+    OP_RESERVE: "reserve", OP_RELEASE: "release", OP_COMMIT: "commit", OP_RESTOCK: "restock",
+    OP_LEASE_GRANT: "lease", OP_LEASE_COMMIT: "lease-commit",
+    OP_LEASE_RELEASE: "lease-release", OP_LEASE_EXPIRE: "lease-expire",
+}
+
+# Khung bản ghi: độ dài payload, crc32 của payload. Độ dài 0 = hết dữ liệu (phần mmap chưa ghi).
+_FRAME = struct.Struct("<II")
+# seq, op, quantity, quantity_after, reserved_after, timestamp, độ dài product_id, độ dài order_id
+_BODY = struct.Struct("<QBqqqdHH")
+# Bản ghi lease: seq, op, timestamp, expires_at, độ dài lease_id, độ dài phần JSON (order_id, lines)
+_LEASE_BODY = struct.Struct("<QBddHI")
+
+SNAPSHOT_MAGIC = b"INVSNAP2"
+SNAPSHOT_MAGIC_V1 = b"INVSNAP1"  # không có phần lease
+_SNAPSHOT_HEADER = struct.Struct("<8sQI")
+_SNAPSHOT_LEASES = struct.Struct("<I")
+_FIELD_SEP, _ROW_SEP = "\x1f", "\x1e"
+
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class JournalRecord:
+    seq: int
+    op: int
+    product_id: str
+    quantity: int
+    quantity_after: int
+    reserved_after: int
+    order_id: Optional[str]
+    timestamp: float
+
+    @property
+    def op_name(self) -> str:
+        return OP_NAMES.get(self.op, str(self.op))
+
+
+@dataclass(frozen=True)
+class LeaseRecord:
+    seq: int
+    op: int
+    lease_id: str
+    order_id: Optional[str]
+    expires_at: float
+    # (product_id, quantity, quantity_after, reserved_after)
+    lines: Tuple[Tuple[str, int, int, int], ...]
+    timestamp: float
+
+    @property
+    def op_name(self) -> str:
+        return OP_NAMES.get(self.op, str(self.op))
+
+
+def encode_record(record: JournalRecord) -> bytes:
+    product_id = record.product_id.encode()
+    order_id = (record.order_id or "").encode()
+    payload = _BODY.pack(
+        record.seq, record.op, record.quantity, record.quantity_after, record.reserved_after,
+        record.timestamp, len(product_id), len(order_id),
+    ) + product_id + order_id
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def encode_lease_record(record: LeaseRecord) -> bytes:
+    lease_id = record.lease_id.encode()
+    data = json.dumps({"order_id": record.order_id, "lines": record.lines}, separators=(",", ":")).encode()
+    payload = _LEASE_BODY.pack(
+        record.seq, record.op, record.timestamp, record.expires_at, len(lease_id), len(data)
+    ) + lease_id + data
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def _decode_lease(payload: bytes) -> LeaseRecord:
+    seq, op, timestamp, expires_at, id_len, data_len = _LEASE_BODY.unpack_from(payload)
+    pos = _LEASE_BODY.size
+    data = json.loads(payload[pos + id_len:pos + id_len + data_len])
+    return LeaseRecord(
+        seq, op, payload[pos:pos + id_len].decode(), data["order_id"], expires_at,
+        tuple(tuple(line) for line in data["lines"]), timestamp,
+    )
+
+
+def decode_records(buf, offset: int = 0) -> Iterator[Tuple[object, int]]:
+    """Yields (record, end offset) until the end of written data or a torn record."""
+    end = len(buf)
+    while offset + _FRAME.size <= end:
+        length, crc = _FRAME.unpack_from(buf, offset)
+        start = offset + _FRAME.size
+        if length < _BODY.size or start + length > end:
+            return
+        payload = bytes(buf[start:start + length])
+        if zlib.crc32(payload) != crc:
+            return
+        if payload[8] in LEASE_OPS:
+            yield _decode_lease(payload), start + length
+            offset = start + length
+            continue
+        seq, op, quantity, quantity_after, reserved_after, timestamp, pid_len, oid_len = _BODY.unpack_from(payload)
+        pos = _BODY.size
+        product_id = payload[pos:pos + pid_len].decode()
+        order_id = payload[pos + pid_len:pos + pid_len + oid_len].decode() or None
+        offset = start + length
+        yield JournalRecord(seq, op, product_id, quantity, quantity_after, reserved_after, order_id, timestamp), offset
+
+
+def encode_snapshot(rows: Sequence[dict], seq: int, leases: Sequence[Lease] = ()) -> bytes:
+    quantity = array.array("q", (row["quantity"] for row in rows))
+    reserved = array.array("q", (row["reserved"] for row in rows))
+    strings = _ROW_SEP.join(
+        _FIELD_SEP.join((row["product_id"], row.get("id") or row["product_id"], row.get("name") or row["product_id"]))
+        for row in rows
+    ).encode()
+    lease_data = json.dumps([lease.to_dict() for lease in leases], separators=(",", ":")).encode()
+    body = (
+        _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, seq, len(rows)) + _SNAPSHOT_LEASES.pack(len(lease_data))
+        + quantity.tobytes() + reserved.tobytes() + lease_data + strings
+    )
+    return body + struct.pack("<I", zlib.crc32(body))
+
+
+def decode_snapshot(data: bytes) -> Tuple[int, List[dict], List[Lease]]:
+    body, (crc,) = data[:-4], struct.unpack("<I", data[-4:])
+    if zlib.crc32(body) != crc:
+        raise ValueError("snapshot checksum mismatch")
+    magic, seq, count = _SNAPSHOT_HEADER.unpack_from(body)
+    if magic not in (SNAPSHOT_MAGIC, SNAPSHOT_MAGIC_V1):
+        raise ValueError("not an inventory snapshot")
+    pos = _SNAPSHOT_HEADER.size
+    lease_len = 0
+    if magic == SNAPSHOT_MAGIC:
+        (lease_len,) = _SNAPSHOT_LEASES.unpack_from(body, pos)
+        pos += _SNAPSHOT_LEASES.size
+    quantity, reserved = array.array("q"), array.array("q")
+    quantity.frombytes(body[pos:pos + 8 * count])
+    reserved.frombytes(body[pos + 8 * count:pos + 16 * count])
+    pos += 16 * count
+    leases = [Lease.from_dict(data) for data in json.loads(body[pos:pos + lease_len])] if lease_len else []
+    strings = body[pos + lease_len:].decode()
+    rows = []
+    if count:
+        for fields, q, r in zip(strings.split(_ROW_SEP), quantity, reserved):
+            product_id, item_id, name = fields.split(_FIELD_SEP)
+            rows.append({"product_id": product_id, "id": item_id, "name": name, "quantity": q, "reserved": r})
+    return seq, rows, leases
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"journal-{first_seq:020d}.log"
+
+
+def _snapshot_name(seq: int) -> str:
+    return f"snapshot-{seq:020d}.snap"
+
+
+def _fsync_dir(directory: str):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _Segment:
+    """One preallocated, memory-mapped journal file."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        exists = os.path.exists(path)
+        self._file = open(path, "r+b" if exists else "w+b")
+        if os.fstat(self._file.fileno()).st_size < size:
+            self._file.truncate(size)
+        self.mm = mmap.mmap(self._file.fileno(), 0)
+        self.offset = 0
+        if exists:
+            for _, end in decode_records(self.mm):
+                self.offset = end
+            if any(self.mm[self.offset:self.offset + _FRAME.size]):
+                # Xóa phần đuôi bị ghi dở để bản ghi mới không nối sau rác
+                self.mm[self.offset:] = bytes(len(self.mm) - self.offset)
+
+    def append(self, data: bytes) -> bool:
+        end = self.offset + len(data)
+        if end > len(self.mm):
+            return False
+        self.mm[self.offset:end] = data
+        self.offset = end
+        return True
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        if not self.mm.closed:
+            self.mm.flush()
+            self.mm.close()
+        self._file.close()
+
+
+class InventoryJournal:
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES, group_commit_ms: float = 2.0,
+                 archive: bool = False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.group_commit_seconds = group_commit_ms / 1000
+        self.archive_dir = os.path.join(directory, "archive") if archive else None
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock_file = open(os.path.join(directory, "LOCK"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            raise RuntimeError(f"Inventory journal {directory} is in use by another process")
+
+        self.last_seq = 0
+        self.snapshot_seq = 0
+        self._flushed_seq = 0
+        self._segment: Optional[_Segment] = None
+        self._retired: List[_Segment] = []
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _files(self, prefix: str) -> List[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.startswith(prefix))
+
+    def recover(self, seed_rows: Sequence[dict]) -> Tuple[List[dict], bool, List[Lease]]:
+        """
+        Loads the newest valid snapshot (or seed_rows if there is none) and replays
+        the journal tail on top of it. Returns (rows, whether a snapshot was found,
+        outstanding leases).
+        """
+        rows = None
+        leases = {}
+        for name in reversed(self._files("snapshot-")):
+            try:
+                with open(os.path.join(self.directory, name), "rb") as f:
+                    self.snapshot_seq, snapshot_rows, snapshot_leases = decode_snapshot(f.read())
+                rows = {row["product_id"]: row for row in snapshot_rows}
+                leases = {lease.lease_id: lease for lease in snapshot_leases}
+                break
+            except (ValueError, struct.error):
+                continue
+        has_snapshot = rows is not None
+        if rows is None:
+            rows = {row["product_id"]: dict(row) for row in seed_rows}
+        self.last_seq = self.snapshot_seq
+
+        segments = self._files("journal-")
+        for name in segments:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                data = f.read()
+            for record, _ in decode_records(data):
+                if record.seq <= self.snapshot_seq:
+                    continue
+                if isinstance(record, LeaseRecord):
+                    lines = record.lines
+                    if record.op == OP_LEASE_GRANT:
+                        leases[record.lease_id] = Lease(
+                            record.lease_id, record.order_id, record.expires_at,
+                            [(product_id, quantity) for product_id, quantity, _, _ in lines],
+                        )
+                    else:
+                        leases.pop(record.lease_id, None)
+                else:
+                    lines = [(record.product_id, record.quantity, record.quantity_after, record.reserved_after)]
+                for product_id, _, quantity_after, reserved_after in lines:
+                    row = rows.get(product_id)
+                    if row is not None:
+                        row["quantity"] = quantity_after
+                        row["reserved"] = reserved_after
+                self.last_seq = max(self.last_seq, record.seq)
+        self._flushed_seq = self.last_seq
+
+        # Tiếp tục ghi vào segment cuối cùng (hoặc tạo segment mới)
+        if segments:
+            self._segment = _Segment(os.path.join(self.directory, segments[-1]), self.segment_bytes)
+        else:
+            self._segment = _Segment(os.path.join(self.directory, _segment_name(self.last_seq + 1)), self.segment_bytes)
+        return list(rows.values()), has_snapshot, list(leases.values())
+
+    def _write(self, seq: int, data: bytes):
+        if not self._segment.append(data):
+            # Segment mới mang tên seq của bản ghi đầu tiên của nó (bản ghi này)
+            self.rotate(seq)
+            if not self._segment.append(data):
+                raise ValueError(f"Journal record of {len(data)} bytes does not fit in a segment")
+
+    def append(self, op: int, product_id: str, quantity: int, quantity_after: int, reserved_after: int,
+               order_id: Optional[str] = None) -> int:
+        """Writes a record into the mmap and returns its seq. Not durable until commit(seq)."""
+        self.last_seq += 1
+        self._write(self.last_seq, encode_record(JournalRecord(
+            self.last_seq, op, product_id, quantity, quantity_after, reserved_after, order_id, time.time()
+        )))
+        return self.last_seq
+
+    def append_lease(self, op: int, lease: Lease, lines: Sequence[Tuple[str, int, int, int]]) -> int:
+        """Writes one record for a whole lease operation; lines carry each SKU's values after it."""
+        self.last_seq += 1
+        self._write(self.last_seq, encode_lease_record(LeaseRecord(
+            self.last_seq, op, lease.lease_id, lease.order_id, lease.expires_at, tuple(lines), time.time()
+        )))
+        return self.last_seq
+
+    def rotate(self, first_seq: Optional[int] = None):
+        """
+        Starts a new segment named after the seq of its first record (by default the
+        next one); the old one is flushed and closed by the next group commit.
+        """
+        path = os.path.join(self.directory, _segment_name(self.last_seq + 1 if first_seq is None else first_seq))
+        if path == self._segment.path:
+            # Segment hiện tại chưa có bản ghi nào: ghi tiếp vào nó
+            return
+        self._retired.append(self._segment)
+        self._segment = _Segment(path, self.segment_bytes)
+
+    async def commit(self, seq: int):
+        """Waits until every record up to seq is flushed to disk."""
+        if seq <= self._flushed_seq:
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((seq, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        await future
+
+    async def _flush_loop(self):
+        while self._waiters:
+            # Gom các bản ghi tới trong khoảng này vào cùng một lần fsync
+            await asyncio.sleep(self.group_commit_seconds)
+            target = self.last_seq
+            segments, retired = [*self._retired, self._segment], self._retired
+            self._retired = []
+            try:
+                await asyncio.to_thread(self._flush_segments, segments)
+            except Exception as e:
+                for _, future in self._waiters:
+                    if not future.done():
+                        future.set_exception(e)
+                self._waiters = []
+                raise
+            for segment in retired:
+                segment.close()
+            self._flushed_seq = target
+            pending = []
+            for seq, future in self._waiters:
+                if seq <= target:
+                    if not future.done():
+                        future.set_result(None)
+                else:
+                    pending.append((seq, future))
+            self._waiters = pending
+
+    @staticmethod
+    def _flush_segments(segments: Iterable[_Segment]):
+        for segment in segments:
+            segment.flush()
+
+    def write_snapshot(self, rows: Sequence[dict], seq: int, leases: Sequence[Lease] = ()):
+        """Atomically writes a snapshot of the state as of seq, then prunes older files."""
+        path = os.path.join(self.directory, _snapshot_name(seq))
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(encode_snapshot(rows, seq, leases))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(self.directory)
+        self.snapshot_seq = seq
+        self._prune(seq)
+
+    def _prune(self, seq: int):
+        """Deletes snapshots older than seq and segments whose records are all covered by it."""
+        for name in self._files("snapshot-"):
+            if name != _snapshot_name(seq) and not name.endswith(".tmp"):
+                os.remove(os.path.join(self.directory, name))
+        segments = self._files("journal-")
+        for name, next_name in zip(segments, segments[1:]):
+            # Segment chỉ chứa các seq nhỏ hơn seq đầu của segment kế tiếp
+            next_first = int(next_name[len("journal-"):-len(".log")])
+            path = os.path.join(self.directory, name)
+            if next_first <= seq + 1 and path != self._segment.path:
+                if self.archive_dir:
+                    os.makedirs(self.archive_dir, exist_ok=True)
+                    os.replace(path, os.path.join(self.archive_dir, name))
+                else:
+                    os.remove(path)
+
+    async def close(self):
+        if self._waiters and self._flusher is not None:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+        for segment in [*self._retired, self._segment]:
+            if segment is not None:
+                segment.close()
+        self._retired = []
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+
+
+class JournaledInventoryStore(InventoryStore):
+    """
+    Wraps a single-process store (memory or array): every mutation is journaled and
+    only returns once durable. State is rebuilt from the journal on construction.
+    """
+
+    def __init__(self, journal: InventoryJournal, create_inner: Callable[[List[dict]], InventoryStore],
+                 snapshot_every: int = 10000):
+        super().__init__()
+        self.journal = journal
+        self.snapshot_every = snapshot_every
+        rows, has_snapshot, leases = journal.recover(list(seed_inventory()))
+        if not has_snapshot:
+            # Thư mục mới: ghi trạng thái seed làm snapshot gốc để replay luôn có điểm bắt đầu
+            journal.write_snapshot(rows, journal.last_seq)
+        self.inner = create_inner(rows)
+        for lease in leases:
+            self.inner.restore_lease(lease)
+        # Thay đổi trong store và append bản ghi tương ứng nằm trong cùng một khóa: bản ghi
+        # lưu giá trị tuyệt đối, nên không được phép chứa thay đổi dở dang của thao tác khác.
+        # Chỉ phần chờ fsync (commit) nằm ngoài khóa, nên group commit vẫn gom được.
+        self._lock = asyncio.Lock()
+        self._snapshotting = False
+
+    async def get(self, product_id: str) -> InventoryItem:
+        return await self.inner.get(product_id)
+
+    async def check_batch(self, lines):
+        return await self.inner.check_batch(lines)
+
+    async def dump(self) -> List[dict]:
+        return await self.inner.dump()
+
+    async def _durable(self, seq: int):
+        await self.journal.commit(seq)
+        if seq - self.journal.snapshot_seq >= self.snapshot_every and not self._snapshotting:
+            await self.snapshot()
+
+    async def _mutate(self, op: int, mutation, product_id: str, quantity: int, order_id: Optional[str]) -> InventoryItem:
+        async with self._lock:
+            item = await mutation(product_id, quantity, order_id)
+            seq = self.journal.append(op, product_id, quantity, item.quantity, item.reserved, order_id)
+        await self._durable(seq)
+        return item
+
+    async def reserve(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return await self._mutate(OP_RESERVE, self.inner.reserve, product_id, quantity, order_id)
+
+    async def commit(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return await self._mutate(OP_COMMIT, self.inner.commit, product_id, quantity, order_id)
+
+    async def release(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return await self._mutate(OP_RELEASE, self.inner.release, product_id, quantity, order_id)
+
+    async def restock(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        return await self._mutate(OP_RESTOCK, self.inner.restock, product_id, quantity, order_id)
+
+    async def _append_lease(self, op: int, lease: Lease) -> int:
+        """Journals a lease operation with each SKU's current values. Caller holds self._lock."""
+        lines = []
+        for product_id, quantity in lease.lines:
+            item = await self.inner.get(product_id)
+            lines.append((product_id, quantity, item.quantity, item.reserved))
+        return self.journal.append_lease(op, lease, lines)
+
+    async def get_lease(self, lease_id: str) -> Optional[Lease]:
+        return await self.inner.get_lease(lease_id)
+
+    async def reserve_lease(self, lease_id: str, lines, ttl_seconds: float, order_id: Optional[str] = None) -> Lease:
+        async with self._lock:
+            existing = await self.inner.get_lease(lease_id)
+            if existing is not None:
+                return existing
+            lease = await self.inner.reserve_lease(lease_id, lines, ttl_seconds, order_id)
+            seq = await self._append_lease(OP_LEASE_GRANT, lease)
+        await self._durable(seq)
+        return lease
+
+    async def commit_lease(self, lease_id: str) -> Lease:
+        async with self._lock:
+            lease = await self.inner.get_lease(lease_id)
+            try:
+                lease = await self.inner.commit_lease(lease_id)
+                expired = False
+            except LeaseNotFoundError:
+                if lease is None:
+                    raise
+                # Lease quá hạn đã bị inner trả hàng khi commit
+                expired = True
+            seq = await self._append_lease(OP_LEASE_EXPIRE if expired else OP_LEASE_COMMIT, lease)
+        await self._durable(seq)
+        if expired:
+            raise LeaseNotFoundError(lease_id)
+        return lease
+
+    async def release_lease(self, lease_id: str) -> Optional[Lease]:
+        async with self._lock:
+            lease = await self.inner.release_lease(lease_id)
+            if lease is None:
+                return None
+            seq = await self._append_lease(OP_LEASE_RELEASE, lease)
+        await self._durable(seq)
+        return lease
+
+    async def expire_leases(self, now: Optional[float] = None) -> List[Lease]:
+        async with self._lock:
+            expired = await self.inner.expire_leases(now)
+            seq = 0
+            for lease in expired:
+                seq = await self._append_lease(OP_LEASE_EXPIRE, lease)
+        if expired:
+            await self._durable(seq)
+        return expired
+
+    async def leases(self) -> List[Lease]:
+        return await self.inner.leases()
+
+    async def snapshot(self):
+        self._snapshotting = True
+        try:
+            async with self._lock:
+                rows = await self.inner.dump()
+                leases = await self.inner.leases()
+                seq = self.journal.last_seq
+                self.journal.rotate()
+            await self.journal.commit(seq)
+            await asyncio.to_thread(self.journal.write_snapshot, rows, seq, leases)
+        finally:
+            self._snapshotting = False
+
+    async def close(self):
+        await self.snapshot()
+        await self.journal.close()
+        await self.inner.close()
+
+
+def create_journaled_store(create_inner: Callable[[List[dict]], InventoryStore],
+                           directory: Optional[str] = None) -> JournaledInventoryStore:
+    journal = InventoryJournal(
+        directory or os.environ["INVENTORY_JOURNAL_DIR"],
+        segment_bytes=int(os.getenv("INVENTORY_JOURNAL_SEGMENT_BYTES", str(DEFAULT_SEGMENT_BYTES))),
+        group_commit_ms=float(os.getenv("INVENTORY_JOURNAL_GROUP_COMMIT_MS", "2")),
+        archive=os.getenv("INVENTORY_JOURNAL_ARCHIVE", "0") == "1",
+    )
+    return JournaledInventoryStore(
+        journal, create_inner, snapshot_every=int(os.getenv("INVENTORY_JOURNAL_SNAPSHOT_EVERY", "10000"))
+    )
+
+
+def read_history(directory: str) -> Iterator[object]:
+    """All journal records still on disk, archived segments first, in seq order."""
+    paths = []
+    for folder in (os.path.join(directory, "archive"), directory):
+        if os.path.isdir(folder):
+            paths += [os.path.join(folder, n) for n in os.listdir(folder) if n.startswith("journal-")]
+    # Tên segment chứa seq đầu tiên, nên sắp theo tên file là đúng thứ tự
+    for path in sorted(paths, key=os.path.basename):
+        with open(path, "rb") as f:
+            for record, _ in decode_records(f.read()):
+                yield record
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Print inventory journal history")
+    parser.add_argument("directory", help="INVENTORY_JOURNAL_DIR of the worker")
+    parser.add_argument("--product", help="Only records for this product_id")
+    parser.add_argument("--order", help="Only records for this order_id")
+    args = parser.parse_args(argv)
+
+    for record in read_history(args.directory):
+        if isinstance(record, LeaseRecord):
+            if args.product and all(line[0] != args.product for line in record.lines):
+                continue
+            if args.order and args.order not in (record.order_id, record.lease_id):
+                continue
+            lines = ", ".join(f"{product_id} x{quantity}" for product_id, quantity, _, _ in record.lines)
+            print(
+                f"{record.seq:>10}  {datetime.fromtimestamp(record.timestamp).isoformat(timespec='milliseconds')}  "
+                f"{record.op_name:<13} {record.lease_id}  [{lines}]  order {record.order_id or '-'}"
+            )
+            continue
+        if args.product and record.product_id != args.product:
+            continue
+        if args.order and record.order_id != args.order:
+            continue
+        print(
+            f"{record.seq:>10}  {datetime.fromtimestamp(record.timestamp).isoformat(timespec='milliseconds')}  "
+            f"{record.op_name:<8} {record.product_id:<12} {record.quantity:>6}  "
+            f"-> qty {record.quantity_after}, reserved {record.reserved_after}  order {record.order_id or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
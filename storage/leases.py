@@ -0,0 +1,102 @@
+"""
+Lease đặt trước tồn kho.
+
+Một lease giữ số lượng của một hoặc nhiều SKU cho một đơn hàng tới expires_at. Việc
+giữ hàng chỉ tốn một bản ghi trong store (không cần một workflow chờ tín hiệu):
+commit_lease trừ kho, release_lease trả hàng, và sweeper trả hàng của các lease quá hạn
+theo lô.
+
+LeaseBook là bảng lease trong bộ nhớ dùng cho các backend memory/array (hạn được theo
+dõi bằng TimingWheel); backend Postgres lưu lease trong bảng riêng (xem storage/postgres.py).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from storage.timing_wheel import TimingWheel
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseNotFoundError(LookupError):
+    """The lease does not exist: never granted, already settled, or expired."""
+
+    def __init__(self, lease_id: str):
+        super().__init__(f"Lease {lease_id} not found (expired or already settled)")
+        self.lease_id = lease_id
+
+
+@dataclass
+class Lease:
+    lease_id: str
+    order_id: Optional[str]
+    expires_at: float  # epoch seconds
+    lines: List[Tuple[str, int]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "lease_id": self.lease_id,
+            "order_id": self.order_id,
+            "expires_at": self.expires_at,
+            "lines": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in self.lines],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Lease":
+        return cls(
+            data["lease_id"], data.get("order_id"), data["expires_at"],
+            [(line["product_id"], line["quantity"]) for line in data.get("lines", [])],
+        )
+
+
+def merge_lines(lines: Sequence[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    """Sums quantities per SKU; sorted so multi-SKU locking happens in a fixed order."""
+    merged: Dict[str, int] = {}
+    for product_id, quantity in lines:
+        merged[product_id] = merged.get(product_id, 0) + quantity
+    return sorted(merged.items())
+
+
+class LeaseBook:
+    def __init__(self, tick_seconds: float = 1.0):
+        self._leases: Dict[str, Lease] = {}
+        self._wheel = TimingWheel(tick_seconds=tick_seconds, start=time.time())
+
+    def __len__(self) -> int:
+        return len(self._leases)
+
+    def get(self, lease_id: str) -> Optional[Lease]:
+        return self._leases.get(lease_id)
+
+    def add(self, lease: Lease):
+        self._leases[lease.lease_id] = lease
+        self._wheel.schedule(lease.lease_id, lease.expires_at)
+
+    def pop(self, lease_id: str) -> Optional[Lease]:
+        lease = self._leases.pop(lease_id, None)
+        if lease is not None:
+            self._wheel.cancel(lease_id)
+        return lease
+
+    def pop_expired(self, now: float) -> List[Lease]:
+        return [self._leases.pop(lease_id) for lease_id in self._wheel.advance(now)]
+
+    def all(self) -> List[Lease]:
+        return list(self._leases.values())
+
+
+async def run_lease_sweeper(store, interval_seconds: float, stop_event: asyncio.Event):
+    """Releases expired leases every interval until stop_event is set."""
+    while not stop_event.is_set():
+        try:
+            expired = await store.expire_leases()
+            if expired:
+                logger.info(f"Released {len(expired)} expired inventory leases")
+        except Exception as e:
+            logger.error(f"Inventory lease sweep failed: {e}")
+        try:
+            await asyncio.wait_for(stop_event.wait(), timeout=interval_seconds)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,82 @@
+"""
+Backend tồn kho trong bộ nhớ: mỗi SKU có một asyncio.Lock riêng, nên các đơn hàng
+khác sản phẩm không chờ nhau. Chỉ an toàn trong một process; dùng cho dev/test.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from models.inventory import InventoryItem
+from storage.inventory_store import (
+    InsufficientInventoryError,
+    InventoryStore,
+    ProductNotFoundError,
+    seed_inventory,
+    stock_status,
+)
+
+
+class InMemoryInventoryStore(InventoryStore):
+    def __init__(self, items: Optional[Iterable[dict]] = None):
+        super().__init__()
+        self._items: Dict[str, InventoryItem] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        for data in seed_inventory() if items is None else items:
+            item = InventoryItem(**data)
+            item.status = stock_status(item.quantity)
+            self._items[item.product_id] = item
+            self._locks[item.product_id] = asyncio.Lock()
+
+    def _item(self, product_id: str) -> InventoryItem:
+        item = self._items.get(product_id)
+        if item is None:
+            raise ProductNotFoundError(product_id)
+        return item
+
+    def _lock(self, product_id: str) -> asyncio.Lock:
+        self._item(product_id)
+        return self._locks[product_id]
+
+    @staticmethod
+    def _touch(item: InventoryItem) -> InventoryItem:
+        item.status = stock_status(item.quantity)
+        item.last_updated = datetime.now()
+        return item.model_copy()
+
+    async def get(self, product_id: str) -> InventoryItem:
+        return self._item(product_id).model_copy()
+
+    async def reserve(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        async with self._lock(product_id):
+            item = self._items[product_id]
+            available = item.quantity - item.reserved
+            if available < quantity:
+                raise InsufficientInventoryError(product_id, quantity, available)
+            item.reserved += quantity
+            return self._touch(item)
+
+    async def commit(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        async with self._lock(product_id):
+            item = self._items[product_id]
+            item.reserved -= min(quantity, item.reserved)
+            item.quantity = max(item.quantity - quantity, 0)
+            return self._touch(item)
+
+    async def release(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        async with self._lock(product_id):
+            item = self._items[product_id]
+            item.reserved -= min(quantity, item.reserved)
+            return self._touch(item)
+
+    async def restock(self, product_id: str, quantity: int, order_id: Optional[str] = None) -> InventoryItem:
+        async with self._lock(product_id):
+            item = self._items[product_id]
+            item.quantity += quantity
+            return self._touch(item)
+
+    async def dump(self) -> List[dict]:
+        return [
+            {"product_id": item.product_id, "id": item.id, "name": item.name,
+             "quantity": item.quantity, "reserved": item.reserved}
+            for item in self._items.values()
+        ]
@@ -0,0 +1,56 @@
+"""
+Hashed timing wheel cho hạn của lease.
+
+Mỗi deadline được làm tròn lên thành một tick (tick_seconds) và đặt vào slot
+tick % slots. advance(now) chỉ duyệt các slot của những tick vừa trôi qua, nên chi phí
+mỗi lần quét tỷ lệ với số lease hết hạn chứ không phải tổng số lease đang giữ.
+Deadline xa hơn một vòng wheel vẫn nằm chung slot và chỉ được trả về khi tới tick của nó.
+"""
+import math
+from typing import Dict, Hashable, List
+
+
+class TimingWheel:
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 3600, start: float = 0.0):
+        self.tick_seconds = tick_seconds
+        self._slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._ticks: Dict[Hashable, int] = {}
+        self._current = math.floor(start / tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._ticks)
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Schedules (or reschedules) key to expire at deadline (same clock as advance)."""
+        self.cancel(key)
+        # Không bao giờ xếp vào tick đã qua, nếu không key sẽ chờ thêm một vòng wheel
+        tick = max(math.ceil(deadline / self.tick_seconds), self._current + 1)
+        self._slots[tick % len(self._slots)][key] = tick
+        self._ticks[key] = tick
+
+    def cancel(self, key: Hashable) -> bool:
+        tick = self._ticks.pop(key, None)
+        if tick is None:
+            return False
+        del self._slots[tick % len(self._slots)][key]
+        return True
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Moves the wheel to now and returns every key whose deadline has passed."""
+        target = math.floor(now / self.tick_seconds)
+        if target <= self._current:
+            return []
+        # Khoảng nhảy dài hơn một vòng: mỗi slot chỉ cần duyệt một lần
+        ticks = range(self._current + 1, target + 1)
+        if len(ticks) > len(self._slots):
+            ticks = range(target - len(self._slots) + 1, target + 1)
+        expired = []
+        for tick in ticks:
+            slot = self._slots[tick % len(self._slots)]
+            due = [key for key, key_tick in slot.items() if key_tick <= target]
+            for key in due:
+                del slot[key]
+                del self._ticks[key]
+            expired.extend(due)
+        self._current = target
+        return expired
@@ -0,0 +1,243 @@
+"""
+Supervisor chạy nhiều worker process cho mỗi task queue.
+
+Mỗi process con chạy worker.run_workers() cho đúng một task queue và một role,
+nên workflow replay và activity của các queue không còn chia sẻ một core.
+
+Ví dụ:
+    # 2 process cho mỗi queue, payment được 4 process
+    python supervisor.py --processes 2 --queue-processes payment-task-queue=4
+
+    # Metrics Prometheus: process con thứ i mở cổng WORKER_METRICS_PORT + i
+    WORKER_METRICS_PORT=9100 python supervisor.py --processes 2
+
+    # Tách riêng workflow worker (1 process/queue) và activity worker (4 process/queue)
+    python supervisor.py --split-roles --workflow-processes 1 --processes 4
+
+Store tồn kho memory/array nằm trong bộ nhớ của từng process (tồn kho và lease riêng),
+nên inventory-task-queue chỉ chạy một process activity trừ khi INVENTORY_STORE=postgres.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("supervisor")
+
+ALL_TASK_QUEUES = ["order-task-queue", "payment-task-queue", "inventory-task-queue"]
+INVENTORY_TASK_QUEUE = "inventory-task-queue"
+# Backend tồn kho mà nhiều process dùng chung được (xem storage/inventory_store.py)
+SHARED_INVENTORY_STORES = ("postgres",)
+
+# Restart backoff cho process con bị crash
+RESTART_BACKOFF_INITIAL = 1.0
+RESTART_BACKOFF_MAX = 60.0
+# Process chạy ổn định lâu hơn ngưỡng này thì reset backoff
+STABLE_RUN_SECONDS = 60.0
+
+
+@dataclass
+class ChildSpec:
+    task_queue: str
+    role: str
+    index: int
+    process: Optional[multiprocessing.Process] = None
+    started_at: float = 0.0
+    restarts: int = 0
+    backoff: float = RESTART_BACKOFF_INITIAL
+    next_start_at: float = 0.0
+    metrics_port: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.task_queue}/{self.role}/{self.index}"
+
+
+def _child_main(task_queue: str, role: str, metrics_port: Optional[int] = None):
+    """Entry point của process con: chạy worker và drain khi nhận SIGTERM."""
+    if metrics_port is not None:
+        # Mỗi process con một cổng metrics riêng (metrics/worker.py)
+        os.environ["WORKER_METRICS_PORT"] = str(metrics_port)
+    # Import trong process con để mỗi process có Temporal runtime riêng
+    import worker
+
+    async def run():
+        shutdown_event = asyncio.Event()
+        worker.install_shutdown_handlers(asyncio.get_running_loop(), shutdown_event)
+        await worker.run_workers([task_queue], role, shutdown_event)
+
+    asyncio.run(run())
+
+
+def build_specs(
+    task_queues: List[str],
+    processes: int,
+    queue_processes: Dict[str, int],
+    split_roles: bool,
+    workflow_processes: int,
+    inventory_store: str = "memory",
+) -> List[ChildSpec]:
+    specs = []
+    for task_queue in task_queues:
+        count = queue_processes.get(task_queue, processes)
+        if task_queue == INVENTORY_TASK_QUEUE and count > 1 and inventory_store.lower() not in SHARED_INVENTORY_STORES:
+            # Mỗi process có tồn kho và lease riêng: lease cấp ở process này không commit được
+            # ở process khác, và các process bán vượt tồn kho độc lập với nhau
+            logger.warning(
+                f"INVENTORY_STORE={inventory_store} keeps stock and leases in each process; "
+                f"running 1 activity process for {task_queue} instead of {count} (use INVENTORY_STORE=postgres to scale it)"
+            )
+            count = 1
+        if split_roles:
+            specs += [ChildSpec(task_queue, "workflow", i) for i in range(workflow_processes)]
+            specs += [ChildSpec(task_queue, "activity", i) for i in range(count)]
+        else:
+            specs += [ChildSpec(task_queue, "all", i) for i in range(count)]
+    return specs
+
+
+class Supervisor:
+    def __init__(self, specs: List[ChildSpec], shutdown_timeout: float):
+        self._specs = specs
+        self._shutdown_timeout = shutdown_timeout
+        self._stopping = False
+        # spawn thay vì fork: Temporal core runtime có thread riêng, không an toàn khi fork
+        self._ctx = multiprocessing.get_context("spawn")
+
+    def _start(self, spec: ChildSpec):
+        spec.process = self._ctx.Process(
+            target=_child_main,
+            args=(spec.task_queue, spec.role, spec.metrics_port),
+            name=spec.name,
+        )
+        spec.process.start()
+        spec.started_at = time.monotonic()
+        metrics = f", metrics on :{spec.metrics_port}" if spec.metrics_port is not None else ""
+        logger.info(f"Started worker {spec.name} (pid {spec.process.pid}{metrics})")
+
+    def _check_children(self):
+        now = time.monotonic()
+        for spec in self._specs:
+            if spec.process is None:
+                if now >= spec.next_start_at:
+                    self._start(spec)
+                continue
+            if spec.process.is_alive():
+                if now - spec.started_at > STABLE_RUN_SECONDS:
+                    spec.backoff = RESTART_BACKOFF_INITIAL
+                continue
+
+            # Process con đã thoát ngoài ý muốn -> lên lịch restart với backoff
+            exitcode = spec.process.exitcode
+            spec.process.close()
+            spec.process = None
+            spec.restarts += 1
+            spec.next_start_at = now + spec.backoff
+            logger.warning(
+                f"Worker {spec.name} exited with code {exitcode}, "
+                f"restarting in {spec.backoff:.0f}s (restart #{spec.restarts})"
+            )
+            spec.backoff = min(spec.backoff * 2, RESTART_BACKOFF_MAX)
+
+    def request_stop(self, signum, frame):
+        if not self._stopping:
+            logger.info(f"Received signal {signum}, draining workers...")
+        self._stopping = True
+
+    def _stop_children(self):
+        running = [s for s in self._specs if s.process is not None and s.process.is_alive()]
+        for spec in running:
+            spec.process.terminate()  # SIGTERM -> worker drains in-flight tasks
+
+        deadline = time.monotonic() + self._shutdown_timeout
+        for spec in running:
+            spec.process.join(max(0.0, deadline - time.monotonic()))
+            if spec.process.is_alive():
+                logger.warning(f"Worker {spec.name} did not drain in time, killing")
+                spec.process.kill()
+                spec.process.join()
+        logger.info("All workers stopped")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+
+        logger.info(f"Supervising {len(self._specs)} worker processes")
+        while not self._stopping:
+            self._check_children()
+            time.sleep(1)
+        self._stop_children()
+
+
+def _parse_queue_processes(values: List[str]) -> Dict[str, int]:
+    result = {}
+    for value in values:
+        task_queue, _, count = value.partition("=")
+        if task_queue not in ALL_TASK_QUEUES or not count.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid --queue-processes value: {value}")
+        result[task_queue] = int(count)
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run and supervise Temporal worker processes")
+    parser.add_argument(
+        "--task-queues", nargs="+", default=ALL_TASK_QUEUES, choices=ALL_TASK_QUEUES,
+        help="Task queues to serve (default: all)",
+    )
+    parser.add_argument(
+        "--processes", type=int,
+        default=int(os.getenv("WORKER_PROCESSES", os.cpu_count() or 1)),
+        help="Processes per task queue (activity processes when --split-roles)",
+    )
+    parser.add_argument(
+        "--queue-processes", nargs="*", default=[], metavar="QUEUE=N",
+        help="Override the process count for individual task queues",
+    )
+    parser.add_argument(
+        "--split-roles", action="store_true",
+        default=os.getenv("WORKER_SPLIT_ROLES", "false").lower() == "true",
+        help="Run workflow-only and activity-only processes separately",
+    )
+    parser.add_argument(
+        "--workflow-processes", type=int,
+        default=int(os.getenv("WORKER_WORKFLOW_PROCESSES", "1")),
+        help="Workflow-only processes per task queue when --split-roles",
+    )
+    args = parser.parse_args(argv)
+
+    specs = build_specs(
+        args.task_queues,
+        args.processes,
+        _parse_queue_processes(args.queue_processes),
+        args.split_roles,
+        args.workflow_processes,
+        os.getenv("INVENTORY_STORE", "memory"),
+    )
+    if not specs:
+        parser.error("No worker processes configured")
+    base_metrics_port = os.getenv("WORKER_METRICS_PORT")
+    if base_metrics_port:
+        for ordinal, spec in enumerate(specs):
+            spec.metrics_port = int(base_metrics_port) + ordinal
+
+    # Chờ thêm một chút so với graceful_shutdown_timeout của từng worker
+    shutdown_timeout = int(os.getenv("WORKER_GRACEFUL_SHUTDOWN_SECONDS", "30")) + 10
+    Supervisor(specs, shutdown_timeout).run()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
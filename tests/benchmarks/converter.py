@@ -0,0 +1,137 @@
+"""
+Benchmark chi phí CPU cho mỗi lần truyền dữ liệu workflow <-> activity, so sánh
+converter mặc định của SDK (dict + dựng lại model ở hai đầu) với data converter
+của models/converter.py (model encode/decode trực tiếp bằng orjson + TypeAdapter).
+
+Mỗi kịch bản đo một vòng: workflow encode tham số -> activity decode -> activity
+encode kết quả -> workflow decode, đúng như các lời gọi trong code:
+    order      validate_order với đơn N dòng (Order -> dict)
+    inventory  N dòng InventoryUpdate: chuẩn hóa danh sách trong InventoryWorkflow rồi
+               truyền các dòng cho check_inventory_batch
+    payment    process_payment (Payment -> Payment)
+
+Chạy:
+    python -m tests.benchmarks.converter --lines 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from temporalio.converter import DataConverter
+
+from models.converter import data_converter
+from models.inventory import InventoryUpdate, inventory_update_list
+from models.order import Order
+from models.payment import Payment, PaymentMethod
+
+default_converter = DataConverter.default.payload_converter
+model_converter = data_converter.payload_converter
+
+
+def _order(lines: int) -> Order:
+    items = [{"product_id": f"PROD-{i % 500:05d}", "quantity": i % 5 + 1, "price": 9.99} for i in range(lines)]
+    return Order(id="ORD-1", customer_id="CUST-1", items=items, total_amount=sum(i["quantity"] * 9.99 for i in items))
+
+
+def order_default(order: Order):
+    payloads = default_converter.to_payloads([order.model_dump()])
+    order_data = default_converter.from_payloads(payloads, [dict])[0]
+    result = default_converter.to_payloads([True])
+    return order_data, default_converter.from_payloads(result, [bool])
+
+
+def order_model(order: Order):
+    payloads = model_converter.to_payloads([order])
+    order_data = model_converter.from_payloads(payloads, [dict])[0]
+    result = model_converter.to_payloads([True])
+    return order_data, model_converter.from_payloads(result, [bool])
+
+
+def _batch_lines(prepared: List[dict]) -> List[dict]:
+    return [{"product_id": update["product_id"], "quantity": abs(update["quantity_change"])} for update in prepared]
+
+
+def inventory_default(updates: List[dict]):
+    # Trước đây: một InventoryUpdate cho mỗi dòng trong workflow
+    prepared = []
+    for update in updates:
+        update_copy = update.copy()
+        if "order_id" not in update_copy:
+            update_copy["order_id"] = "ORD-1"
+        prepared.append(InventoryUpdate(**update_copy).to_dict())
+    payloads = default_converter.to_payloads([_batch_lines(prepared)])
+    return default_converter.from_payloads(payloads, [list])[0]
+
+
+def inventory_model(updates: List[dict]):
+    prepared = inventory_update_list.validate_python([{"order_id": "ORD-1", **update} for update in updates])
+    payloads = model_converter.to_payloads([_batch_lines(prepared)])
+    return model_converter.from_payloads(payloads, [list])[0]
+
+
+def payment_default(payment: Payment):
+    payloads = default_converter.to_payloads([payment.to_dict()])
+    activity_payment = Payment(**default_converter.from_payloads(payloads, [dict])[0])
+    result = default_converter.to_payloads([activity_payment.to_dict()])
+    return Payment(**default_converter.from_payloads(result, [dict])[0])
+
+
+def payment_model(payment: Payment):
+    payloads = model_converter.to_payloads([payment])
+    activity_payment = model_converter.from_payloads(payloads, [Payment])[0]
+    result = model_converter.to_payloads([activity_payment])
+    return model_converter.from_payloads(result, [Payment])[0]
+
+
+def cpu_timed(fn, repeat: int) -> dict:
+    fn()  # Warm up (TypeAdapter cache, schema build)
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        samples.append((time.process_time() - start) * 1_000_000)
+    return {"median_us": statistics.median(samples), "min_us": min(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the typed orjson data converter against the SDK default")
+    parser.add_argument("--lines", type=int, default=1000, help="Lines per order")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    order = _order(args.lines)
+    updates = [{"product_id": item.product_id, "quantity_change": -item.quantity} for item in order.items]
+    payment = Payment(order_id=order.id, amount=order.total_amount, method=PaymentMethod.CREDIT_CARD)
+
+    scenarios = {
+        "order": (lambda: order_default(order), lambda: order_model(order)),
+        "inventory": (lambda: inventory_default(updates), lambda: inventory_model(updates)),
+        "payment": (lambda: payment_default(payment), lambda: payment_model(payment)),
+    }
+    report = {"lines": args.lines}
+    for name, (default_fn, model_fn) in scenarios.items():
+        default_result = cpu_timed(default_fn, args.repeat)
+        model_result = cpu_timed(model_fn, args.repeat)
+        report[name] = {
+            "default_converter": default_result,
+            "model_converter": model_result,
+            "cpu_saved_us": default_result["median_us"] - model_result["median_us"],
+            "speedup": default_result["median_us"] / model_result["median_us"],
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Load test tầng integrations (integrations/http.py) với stub server chạy trong cùng process.
+
+So sánh:
+    pooled      một ServiceClient dùng chung (keep-alive pool, giới hạn đồng thời)
+    per_call    mỗi request tự mở một httpx.AsyncClient (như khi mỗi activity tự kết nối)
+
+Báo cáo throughput, latency p50/p99 và số kết nối TCP stub server đã nhận.
+
+Chạy:
+    python -m tests.benchmarks.integrations --requests 5000 --concurrency 200 --latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import httpx
+
+from integrations.http import ServiceClient, ServiceConfig
+from integrations.stub_server import StubServer
+
+
+async def _run(call, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests_per_second": requests / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "errors": errors,
+    }
+
+
+async def main_async(args) -> dict:
+    report = {"requests": args.requests, "concurrency": args.concurrency, "latency_ms": args.latency_ms}
+    for mode in ("pooled", "per_call"):
+        server = StubServer(latency_ms=args.latency_ms, seed=1)
+        port = await server.start()
+        base_url = f"http://127.0.0.1:{port}"
+
+        if mode == "pooled":
+            service = ServiceClient(ServiceConfig(
+                "inventory_service", base_url,
+                max_connections=args.max_connections, max_concurrency=args.concurrency,
+            ))
+
+            async def call(i: int):
+                await service.post("/inventory/reserve", {"product_id": f"PROD-{i % 5 + 1:03d}"})
+        else:
+            async def call(i: int):
+                async with httpx.AsyncClient(base_url=base_url) as client:
+                    response = await client.post("/inventory/reserve", json={"product_id": f"PROD-{i % 5 + 1:03d}"})
+                    response.raise_for_status()
+
+        result = await _run(call, args.requests, args.concurrency)
+        result.update(server.stats())
+        report[mode] = result
+        if mode == "pooled":
+            await service.close()
+        await server.stop()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the pooled service clients against the stub server")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark bảng tồn kho dạng cột (storage/inventory_table.py) so với một
+InventoryItem pydantic cho mỗi SKU (cách lưu cũ của inventory activities).
+
+Đo:
+    - bộ nhớ cho N SKU (tracemalloc, gồm cả map SKU -> dòng và tên sản phẩm)
+    - kiểm tra tồn kho một đơn hàng nhiều dòng
+    - tính lại LOW_STOCK/OUT_OF_STOCK cho toàn bộ SKU
+
+Chạy:
+    python -m tests.benchmarks.inventory_table --skus 1000000 --lines 500
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from models.inventory import InventoryItem
+from storage.inventory_store import stock_status
+from storage.inventory_table import InventoryTable
+
+
+def _rows(skus: int):
+    rng = random.Random(42)
+    for i in range(skus):
+        yield {
+            "id": f"INV-{i:07d}",
+            "product_id": f"PROD-{i:07d}",
+            "name": f"Product {i}",
+            "quantity": rng.randint(0, 200),
+            "reserved": rng.randint(0, 5),
+        }
+
+
+def build_items(skus: int) -> dict:
+    return {data["product_id"]: InventoryItem(**data) for data in _rows(skus)}
+
+
+def build_table(skus: int) -> InventoryTable:
+    return InventoryTable.from_items(_rows(skus))
+
+
+def measure_memory(build, skus: int):
+    tracemalloc.start()
+    result = build(skus)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def check_items(items: dict, lines):
+    requested = {}
+    for product_id, quantity in lines:
+        requested[product_id] = requested.get(product_id, 0) + quantity
+    results = {}
+    for product_id, quantity in requested.items():
+        item = items[product_id]
+        available = item.quantity - item.reserved
+        results[product_id] = (available >= quantity, stock_status(item.quantity))
+    return results
+
+
+def recompute_items(items: dict):
+    for item in items.values():
+        item.status = stock_status(item.quantity)
+
+
+def timed(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the array-backed inventory table")
+    parser.add_argument("--skus", type=int, default=200_000)
+    parser.add_argument("--lines", type=int, default=500, help="Lines per order for the batch check")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    lines = [(f"PROD-{rng.randrange(args.skus):07d}", rng.randint(1, 3)) for _ in range(args.lines)]
+    product_ids = [p for p, _ in lines]
+    quantities = [q for _, q in lines]
+
+    items, items_bytes = measure_memory(build_items, args.skus)
+    pydantic_report = {
+        "memory_bytes": items_bytes,
+        "bytes_per_sku": items_bytes / args.skus,
+        "batch_check": timed(lambda: check_items(items, lines), args.repeat),
+        "recompute_status": timed(lambda: recompute_items(items), max(args.repeat // 10, 1)),
+    }
+    del items
+
+    table, table_bytes = measure_memory(build_table, args.skus)
+    table_report = {
+        "memory_bytes": table_bytes,
+        "bytes_per_sku": table_bytes / args.skus,
+        "numeric_column_bytes": table.nbytes,
+        "batch_check": timed(lambda: table.check_batch(product_ids, quantities), args.repeat),
+        "recompute_status": timed(table.recompute_status, args.repeat),
+    }
+
+    report = {"skus": args.skus, "lines": args.lines, "pydantic_items": pydantic_report, "inventory_table": table_report}
+    print(json.dumps(report, indent=2))
+    print(f"\nMemory: {table_bytes / items_bytes * 100:.1f}% of per-SKU pydantic objects")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
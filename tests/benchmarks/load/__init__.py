@@ -0,0 +1 @@
+# load generator package initialization
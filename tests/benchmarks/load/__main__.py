@@ -0,0 +1,159 @@
+"""
+Load generator open loop cho các endpoint FastAPI (mặc định POST /orders).
+
+Khác với benchmark closed loop (tests/benchmarks/orders), request được gửi theo lịch cố
+định bất kể API trả lời nhanh hay chậm, nên thời gian xếp hàng khi quá tải hiện ra trong
+latency thay vì bị che đi (coordinated omission). Latency được ghi vào HdrHistogram tính
+từ thời điểm dự định gửi.
+
+Profile:
+    constant  --rate 50 --duration 60
+    ramp      --start-rate 10 --end-rate 300 --duration 120 [--windows 10]
+    step      --start-rate 10 --step-rate 20 --steps 10 --step-seconds 20
+    trace     FILE [--speed 2] [--rate 50] [--interval 10]   phát lại trace JSONL (profiles.py)
+    knee      --start-rate 10 --step-rate 20 --max-rate 2000 --step-seconds 20 --slo-p99-ms 1000
+              tăng tải từng bậc tới khi throughput không theo kịp tải, lỗi > 1% hoặc p99 vượt SLO;
+              báo cáo bậc cao nhất còn đạt (điểm gãy throughput của API + worker)
+
+Chạy (API, worker và Temporal server đang chạy):
+    python -m tests.benchmarks.load constant --rate 50 --duration 30
+    python -m tests.benchmarks.load --templates orders.jsonl step --start-rate 20 --step-rate 20 --steps 5
+    python -m tests.benchmarks.load knee --slo-p99-ms 500 --output knee.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from tests.benchmarks.load import profiles
+from tests.benchmarks.load.generator import LoadGenerator, knee_reached
+
+
+def print_phases(summaries):
+    print(f"\n{'phase':>5}{'offered/s':>11}{'achieved/s':>12}{'sent':>8}{'4xx':>7}{'err%':>7}"
+          f"{'p50 ms':>10}{'p99 ms':>10}{'p99.9 ms':>10}{'max ms':>10}{'svc p99':>10}")
+    for i, s in enumerate(summaries):
+        print(
+            f"{i:>5}{s['offered_rate']:>11.1f}{s['achieved_rate']:>12.1f}{s['sent']:>8}{s['rejected']:>7}{s['error_rate'] * 100:>7.2f}"
+            f"{s.get('response_p50_ms', 0):>10.1f}{s.get('response_p99_ms', 0):>10.1f}"
+            f"{s.get('response_p99.9_ms', 0):>10.1f}{s.get('response_max_ms', 0):>10.1f}{s.get('service_p99_ms', 0):>10.1f}"
+        )
+
+
+async def find_knee(generator: LoadGenerator, args, templates) -> dict:
+    """Runs steps of increasing rate, each drained before the next, until the deployment stops keeping up."""
+    summaries = []
+    knee = None
+    rate = args.start_rate
+    while rate <= args.max_rate:
+        phase = profiles.Phase(args.step_seconds, rate, rate)
+        print(f"Step {len(summaries)}: {rate:.1f} req/s for {args.step_seconds:.0f}s...")
+        summary = (await generator.run([phase], profiles.arrivals([phase], args.poisson), templates))[0]
+        summaries.append(summary)
+        reason = knee_reached(summary, args.slo_p99_ms)
+        if reason is not None:
+            knee = {"rate": rate, "reason": reason}
+            break
+        rate += args.step_rate
+
+    sustained = [s["offered_rate"] for s in summaries if knee_reached(s, args.slo_p99_ms) is None]
+    return {
+        "phases": summaries,
+        "knee": knee,
+        "max_sustained_rate": max(sustained, default=None),
+    }
+
+
+async def run(args) -> dict:
+    generator = LoadGenerator(args.url, args.max_connections, args.timeout)
+    templates = profiles.read_trace(args.templates) if args.templates else None
+
+    if args.profile == "knee":
+        result = await find_knee(generator, args, templates)
+    else:
+        if args.profile == "constant":
+            phases = profiles.constant(args.rate, args.duration)
+            schedule = profiles.arrivals(phases, args.poisson)
+        elif args.profile == "ramp":
+            phases = profiles.ramp(args.start_rate, args.end_rate, args.duration, args.windows)
+            schedule = profiles.arrivals(phases, args.poisson)
+        elif args.profile == "step":
+            phases = profiles.step(args.start_rate, args.step_rate, args.steps, args.step_seconds)
+            schedule = profiles.arrivals(phases, args.poisson)
+        else:
+            phases, schedule = profiles.trace_arrivals(
+                profiles.read_trace(args.file), args.interval, args.speed, args.rate,
+            )
+        print(f"Running {args.profile} profile: {len(phases)} phase(s), {sum(p.duration for p in phases):.0f}s")
+        result = {"phases": await generator.run(phases, schedule, templates)}
+
+    result["profile"] = args.profile
+    result["max_schedule_lag_ms"] = round(generator.max_schedule_lag_ms, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("API_URL", "http://localhost:8000"), help="API base URL")
+    parser.add_argument("--templates", help="JSONL trace whose requests are cycled through instead of generated orders")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times instead of evenly spaced")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the per-phase results (with HDR histograms) as JSON")
+    profiles_parser = parser.add_subparsers(dest="profile", required=True)
+
+    constant = profiles_parser.add_parser("constant", help="Fixed arrival rate")
+    constant.add_argument("--rate", type=float, required=True)
+    constant.add_argument("--duration", type=float, default=60.0)
+
+    ramp = profiles_parser.add_parser("ramp", help="Linearly increasing arrival rate")
+    ramp.add_argument("--start-rate", type=float, default=1.0)
+    ramp.add_argument("--end-rate", type=float, required=True)
+    ramp.add_argument("--duration", type=float, default=120.0)
+    ramp.add_argument("--windows", type=int, default=10, help="Report windows")
+
+    step = profiles_parser.add_parser("step", help="Arrival rate increased in steps")
+    step.add_argument("--start-rate", type=float, default=10.0)
+    step.add_argument("--step-rate", type=float, default=10.0)
+    step.add_argument("--steps", type=int, default=5)
+    step.add_argument("--step-seconds", type=float, default=20.0)
+
+    trace = profiles_parser.add_parser("trace", help="Replay a recorded JSONL request trace")
+    trace.add_argument("file")
+    trace.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier for recorded offsets")
+    trace.add_argument("--rate", type=float, help="Send lines without offset_ms at this rate")
+    trace.add_argument("--interval", type=float, default=10.0, help="Report window in seconds")
+
+    knee = profiles_parser.add_parser("knee", help="Step the rate up until the deployment stops keeping up")
+    knee.add_argument("--start-rate", type=float, default=10.0)
+    knee.add_argument("--step-rate", type=float, default=10.0)
+    knee.add_argument("--max-rate", type=float, default=2000.0)
+    knee.add_argument("--step-seconds", type=float, default=20.0)
+    knee.add_argument("--slo-p99-ms", type=float, default=1000.0)
+
+    args = parser.parse_args()
+    result = asyncio.run(run(args))
+
+    print_phases(result["phases"])
+    if args.profile == "knee":
+        if result["knee"]:
+            sustained = result["max_sustained_rate"]
+            print(f"\nKnee at {result['knee']['rate']:.1f} req/s ({result['knee']['reason']}); "
+                  + (f"max sustained rate {sustained:.1f} req/s" if sustained is not None else "no step was sustained"))
+        else:
+            print(f"\nNo knee up to {args.max_rate:.1f} req/s")
+    if result["max_schedule_lag_ms"] > 10:
+        print(f"Warning: the generator fell up to {result['max_schedule_lag_ms']:.0f} ms behind schedule "
+              f"(latencies still include that delay)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Load generator open loop cho API: mỗi request được gửi đúng thời điểm đã lên lịch,
+không chờ các response trước đó.
+
+Latency được tính từ thời điểm *dự định* gửi chứ không phải lúc thực sự gửi, nên khi API
+(hoặc chính generator, hoặc pool kết nối) bị nghẽn, thời gian request phải xếp hàng vẫn
+được tính vào latency (hiệu chỉnh coordinated omission, như wrk2). Thời gian phục vụ (từ
+lúc thực sự gửi) được ghi riêng để thấy phần chênh lệch là do xếp hàng.
+
+Mỗi phase có hai HdrHistogram (micro giây, 3 chữ số có nghĩa): response (từ lúc dự định)
+và service (từ lúc gửi). Request được tính vào phase mà nó được lên lịch.
+
+Chỉ response 2xx được tính là thành công (ok, achieved_rate). Response 4xx (vd. dữ liệu
+đơn không hợp lệ, hoặc 429 khi API từ chối vì quá tải) được đếm riêng là rejected, còn
+5xx và lỗi kết nối/timeout là errors; error_rate tính cả hai vì đều không phải đơn đã nhận.
+"""
+import asyncio
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+from hdrh.histogram import HdrHistogram
+
+from tests.benchmarks.load.profiles import DEFAULT_METHOD, DEFAULT_PATH, Phase
+
+# 1µs .. 10 phút
+HISTOGRAM_MAX_US = 600_000_000
+PERCENTILES = (50, 90, 99, 99.9)
+DEFAULT_PRODUCTS = ("PROD-001", "PROD-002", "PROD-003", "PROD-005")
+
+
+def _histogram() -> HdrHistogram:
+    return HdrHistogram(1, HISTOGRAM_MAX_US, 3)
+
+
+@dataclass
+class PhaseStats:
+    phase: Phase
+    response: HdrHistogram = field(default_factory=_histogram)
+    service: HdrHistogram = field(default_factory=_histogram)
+    sent: int = 0
+    ok: int = 0
+    rejected: int = 0
+    errors: int = 0
+    # Thời điểm (loop time) response cuối cùng của phase về tới
+    last_done: float = 0.0
+
+    def summary(self, started_at: float) -> Dict:
+        done = self.ok + self.rejected + self.errors
+        # Throughput đạt được: response 2xx trên thời gian từ đầu phase tới response cuối
+        elapsed = max(self.phase.duration, self.last_done - started_at) if done else self.phase.duration
+        result = {
+            "offered_rate": round(self.phase.offered_rate, 3),
+            "duration_seconds": self.phase.duration,
+            "sent": self.sent,
+            "ok": self.ok,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "error_rate": round((self.rejected + self.errors) / done, 4) if done else 0.0,
+            "achieved_rate": round(self.ok / elapsed, 3),
+        }
+        for name, histogram in (("response", self.response), ("service", self.service)):
+            if histogram.get_total_count() == 0:
+                continue
+            for pct in PERCENTILES:
+                result[f"{name}_p{pct:g}_ms"] = histogram.get_value_at_percentile(pct) / 1000
+            result[f"{name}_max_ms"] = histogram.get_max_value() / 1000
+        # Histogram đầy đủ (HdrHistogram base64), để gộp nhiều lần chạy hoặc vẽ lại phân phối
+        result["response_hdr"] = self.response.encode().decode()
+        return result
+
+
+def order_request(rng: random.Random, run_id: str, i: int, products: Sequence[str] = DEFAULT_PRODUCTS) -> Dict:
+    """A small valid POST /orders request, one customer per order so velocity rules stay quiet."""
+    lines = rng.randint(1, 3)
+    return {
+        "method": DEFAULT_METHOD,
+        "path": DEFAULT_PATH,
+        "json": {
+            "customer_id": f"LOAD-{run_id}-{i:07d}",
+            "items": [{"product_id": rng.choice(products), "quantity": 1, "price": 10.0} for _ in range(lines)],
+            "payment_method": "CREDIT_CARD",
+        },
+    }
+
+
+class LoadGenerator:
+    def __init__(self, base_url: str, max_connections: int = 1000, timeout: float = 30.0):
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        # Độ trễ lớn nhất của chính generator so với lịch (generator không theo kịp tải)
+        self.max_schedule_lag_ms = 0.0
+
+    async def run(self, phases: Sequence[Phase], schedule: Iterable[Tuple[float, int, Optional[Dict]]],
+                  templates: Optional[List[Dict]] = None, seed: int = 42) -> List[Dict]:
+        """
+        Sends every scheduled request at its offset and returns one summary per phase.
+        A schedule entry without a request uses the next of `templates` (cycled), or a generated order.
+        """
+        rng = random.Random(seed)
+        run_id = uuid.uuid4().hex[:8]
+        stats = [PhaseStats(phase) for phase in phases]
+        loop = asyncio.get_running_loop()
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        in_flight = set()
+
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout) as client:
+            async def send(request: Dict, phase_stats: PhaseStats, intended: float):
+                actual = loop.time()
+                try:
+                    response = await client.request(request["method"], request["path"], json=request.get("json"))
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = None
+                done = loop.time()
+                phase_stats.response.record_value(max(1, int((done - intended) * 1e6)))
+                phase_stats.service.record_value(max(1, int((done - actual) * 1e6)))
+                if status is not None and 200 <= status < 300:
+                    phase_stats.ok += 1
+                elif status is not None and 400 <= status < 500:
+                    phase_stats.rejected += 1
+                else:
+                    phase_stats.errors += 1
+                phase_stats.last_done = max(phase_stats.last_done, done)
+
+            start = loop.time() + 0.1
+            phase_starts = []
+            offset_sum = 0.0
+            for phase in phases:
+                phase_starts.append(start + offset_sum)
+                offset_sum += phase.duration
+
+            for i, (offset, index, request) in enumerate(schedule):
+                intended = start + offset
+                delay = intended - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.max_schedule_lag_ms = max(self.max_schedule_lag_ms, -delay * 1000)
+                if request is None:
+                    request = templates[i % len(templates)] if templates else order_request(rng, run_id, i)
+                stats[index].sent += 1
+                task = asyncio.create_task(send(request, stats[index], intended))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+
+            if in_flight:
+                await asyncio.wait(in_flight, timeout=self.timeout)
+
+        return [phase_stats.summary(phase_start) for phase_stats, phase_start in zip(stats, phase_starts)]
+
+
+def knee_reached(summary: Dict, slo_p99_ms: float, min_achieved_ratio: float = 0.95,
+                 max_error_rate: float = 0.01) -> Optional[str]:
+    """Why this step is past the throughput knee, or None if the deployment kept up."""
+    if summary["achieved_rate"] < summary["offered_rate"] * min_achieved_ratio:
+        return f"achieved {summary['achieved_rate']:.1f}/s of {summary['offered_rate']:.1f}/s offered"
+    if summary["error_rate"] > max_error_rate:
+        return f"error rate {summary['error_rate']:.1%}"
+    p99 = summary.get("response_p99_ms")
+    if p99 is not None and p99 > slo_p99_ms:
+        return f"p99 {p99:.0f} ms > {slo_p99_ms:.0f} ms"
+    return None
@@ -0,0 +1,134 @@
+"""
+Lịch gửi request (open loop) cho load generator.
+
+Mỗi profile là một dãy Phase; trong một phase tốc độ đến (request/giây) đi tuyến tính
+từ start_rate tới end_rate. Lịch được tính trước từ thời gian, không phụ thuộc việc
+response về nhanh hay chậm:
+    constant   một phase, tốc độ cố định
+    ramp       tốc độ tăng dần từ --start-rate tới --end-rate, chia thành --windows phase
+               để báo cáo theo từng đoạn
+    step       --steps phase dài --step-seconds, mỗi phase tăng thêm --step-rate
+    trace      thời điểm gửi lấy từ file trace (offset_ms của từng dòng), chia theo --interval
+
+File trace là JSONL, mỗi dòng một request:
+    {"offset_ms": 12.5, "method": "POST", "path": "/orders", "json": {...}}
+offset_ms là thời điểm gửi tính từ đầu trace; dòng không có offset_ms được gửi theo
+--rate. Thiếu method/path thì mặc định POST /orders với "json" (hoặc chính dòng đó) làm body.
+"""
+import math
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import orjson
+
+DEFAULT_METHOD = "POST"
+DEFAULT_PATH = "/orders"
+
+
+@dataclass(frozen=True)
+class Phase:
+    duration: float
+    start_rate: float
+    end_rate: float
+
+    @property
+    def offered_rate(self) -> float:
+        return (self.start_rate + self.end_rate) / 2
+
+    def rate_at(self, t: float) -> float:
+        return self.start_rate + (self.end_rate - self.start_rate) * (t / self.duration)
+
+
+def constant(rate: float, duration: float) -> List[Phase]:
+    return [Phase(duration, rate, rate)]
+
+
+def ramp(start_rate: float, end_rate: float, duration: float, windows: int = 10) -> List[Phase]:
+    window = duration / windows
+    step = (end_rate - start_rate) / windows
+    return [Phase(window, start_rate + i * step, start_rate + (i + 1) * step) for i in range(windows)]
+
+
+def step(start_rate: float, step_rate: float, steps: int, step_seconds: float) -> List[Phase]:
+    return [Phase(step_seconds, start_rate + i * step_rate, start_rate + i * step_rate) for i in range(steps)]
+
+
+def _arrival_time(phase: Phase, area: float) -> Optional[float]:
+    """Time within the phase at which the integral of its rate reaches `area`, or None past its end."""
+    a = phase.start_rate
+    b = (phase.end_rate - phase.start_rate) / phase.duration
+    if b == 0:
+        t = area / a if a > 0 else math.inf
+    else:
+        t = (-a + math.sqrt(a * a + 2 * b * area)) / b
+    return t if t < phase.duration else None
+
+
+def arrivals(phases: Sequence[Phase], poisson: bool = False, seed: int = 42) -> Iterator[Tuple[float, int, None]]:
+    """(offset seconds from the start, phase index, None) of every request of the profile; None = generated request."""
+    rng = random.Random(seed)
+    # Request tiếp theo được gửi khi tích phân tốc độ đạt `target` (1 mỗi request, hoặc
+    # phân phối mũ với --poisson); phần dư chuyển sang phase sau nên ramp bắt đầu từ 0 vẫn đúng
+    draw = (lambda: rng.expovariate(1.0)) if poisson else (lambda: 1.0)
+    target = draw()
+    phase_start = 0.0
+    for index, phase in enumerate(phases):
+        consumed = 0.0
+        while True:
+            t = _arrival_time(phase, consumed + target)
+            if t is None:
+                target -= phase.offered_rate * phase.duration - consumed
+                break
+            consumed += target
+            target = draw()
+            yield phase_start + t, index, None
+        phase_start += phase.duration
+
+
+def read_trace(path: str) -> List[Dict]:
+    """Requests of a JSONL trace file, as dicts with method, path, json and optional offset_ms."""
+    requests = []
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = orjson.loads(line)
+            if "method" in entry or "path" in entry or "json" in entry:
+                requests.append({
+                    "method": entry.get("method", DEFAULT_METHOD),
+                    "path": entry.get("path", DEFAULT_PATH),
+                    "json": entry.get("json"),
+                    "offset_ms": entry.get("offset_ms"),
+                })
+            else:
+                # Dòng chỉ có body đơn hàng
+                requests.append({"method": DEFAULT_METHOD, "path": DEFAULT_PATH, "json": entry, "offset_ms": None})
+    return requests
+
+
+def trace_arrivals(requests: Sequence[Dict], interval: float, speed: float = 1.0,
+                   rate: Optional[float] = None) -> Tuple[List[Phase], List[Tuple[float, int, Dict]]]:
+    """Phases of `interval` seconds and (offset, phase index, request) sorted by offset, from recorded offsets or `rate`."""
+    offsets = []
+    for i, request in enumerate(requests):
+        if request.get("offset_ms") is not None:
+            offsets.append(request["offset_ms"] / 1000 / speed)
+        elif rate:
+            offsets.append(i / rate)
+        else:
+            raise ValueError(f"Trace line {i + 1} has no offset_ms; pass --rate to replay it at a fixed rate")
+    origin = min(offsets, default=0.0)
+    offsets = [offset - origin for offset in offsets]
+
+    windows = int(max(offsets, default=0.0) // interval) + 1
+    counts = [0] * windows
+    schedule = []
+    for offset, request in zip(offsets, requests):
+        index = int(offset // interval)
+        counts[index] += 1
+        schedule.append((offset, index, request))
+    schedule.sort(key=lambda entry: entry[0])
+    phases = [Phase(interval, count / interval, count / interval) for count in counts]
+    return phases, schedule
@@ -0,0 +1 @@
+# order benchmarks package initialization
@@ -0,0 +1,119 @@
+"""
+Benchmark end-to-end luồng đơn hàng (OrderApprovalWorkflow -> PaymentWorkflow/InventoryWorkflow)
+theo các kịch bản khai báo trong scenarios.py, thay cho các script performance_test cũ.
+
+Với mỗi kịch bản: latency hoàn tất p50/p95/p99 (tới khi có kết quả workflow), throughput,
+số đơn theo trạng thái cuối. Kết quả được ghi ra JSON và có thể so với một baseline;
+exit code 1 khi có regression.
+
+Chạy (cần Temporal server và worker đang chạy, hoặc --local để khởi động dev server và
+worker trong cùng process):
+    python -m tests.benchmarks.orders --list
+    python -m tests.benchmarks.orders --scenarios concurrent_orders approval_storm --output results.json
+    python -m tests.benchmarks.orders --baseline baseline.json --tolerance 0.2
+    python -m tests.benchmarks.orders --local --orders 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import uuid
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from temporalio.client import Client
+
+from models.converter import data_converter
+from tests.benchmarks.orders.baseline import compare, print_comparison
+from tests.benchmarks.orders.runner import ScenarioRunner
+from tests.benchmarks.orders.scenarios import SCENARIOS, select
+
+
+async def _connect(local: bool):
+    """Client plus, with --local, the dev server and in-process workers to stop afterwards."""
+    if not local:
+        host = os.getenv("TEMPORAL_HOST", "localhost")
+        port = os.getenv("TEMPORAL_PORT", "7233")
+        return await Client.connect(f"{host}:{port}", data_converter=data_converter), None
+
+    from temporalio.testing import WorkflowEnvironment
+    from worker import run_workers
+
+    env = await WorkflowEnvironment.start_local(data_converter=data_converter)
+    host, port = env.client.service_client.config.target_host.rsplit(":", 1)
+    os.environ["TEMPORAL_HOST"], os.environ["TEMPORAL_PORT"] = host, port
+    stop = asyncio.Event()
+    workers = asyncio.create_task(run_workers(shutdown_event=stop))
+
+    async def shutdown():
+        stop.set()
+        await workers
+        await env.shutdown()
+
+    return env.client, shutdown
+
+
+def print_results(results):
+    print(f"\n{'scenario':<20}{'done':>8}{'orders/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  outcomes")
+    for r in results:
+        latencies = [r[f"latency_p{pct}_ms"] or 0.0 for pct in (50, 95, 99)]
+        outcomes = ", ".join(f"{status}={count}" for status, count in r["outcomes"].items())
+        print(
+            f"{r['scenario']:<20}{r['completed']:>5}/{r['orders']:<3}{r['throughput_per_second']:>9.1f}"
+            f"{latencies[0]:>10.1f}{latencies[1]:>10.1f}{latencies[2]:>10.1f}  {outcomes}"
+        )
+
+
+async def run(args) -> int:
+    scenarios = [s.scaled(args.orders, args.concurrency) for s in select(args.scenarios)]
+    client, shutdown = await _connect(args.local)
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+    try:
+        runner = ScenarioRunner(client)
+        for scenario in scenarios:
+            print(f"Running {scenario.name}: {scenario.orders} orders, concurrency {scenario.concurrency}...")
+            results.append(await runner.run(scenario, run_id))
+    finally:
+        if shutdown is not None:
+            await shutdown()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(results, json.load(f), args.tolerance)
+        print_comparison(rows, args.tolerance)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), help="Scenarios to run (default: all)")
+    parser.add_argument("--orders", type=int, help="Override the number of orders of every scenario")
+    parser.add_argument("--concurrency", type=int, help="Override the concurrency of every scenario")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare with results previously written by --output")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative change beyond which a metric counts as a regression (default 0.2)")
+    parser.add_argument("--local", action="store_true", help="Start a local Temporal dev server and the workers")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for scenario in SCENARIOS.values():
+            print(f"{scenario.name:<20}{scenario.orders:>5} orders  {scenario.description}")
+        return
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
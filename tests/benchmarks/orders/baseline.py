@@ -0,0 +1,55 @@
+"""
+So sánh kết quả benchmark với một baseline đã lưu (file JSON do lần chạy trước ghi ra).
+
+Một metric bị coi là regression khi xấu hơn baseline quá `tolerance` (tỷ lệ):
+latency p50/p95/p99 tăng, hoặc throughput giảm. Kịch bản không có trong baseline,
+hoặc có số đơn/độ đồng thời khác, bị bỏ qua vì không so sánh được.
+"""
+from typing import Dict, List
+
+# metric -> True nếu giá trị lớn hơn là tốt hơn
+COMPARED_METRICS = {
+    "latency_p50_ms": False,
+    "latency_p95_ms": False,
+    "latency_p99_ms": False,
+    "throughput_per_second": True,
+}
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[Dict]:
+    """One row per compared metric, with `regression` set when it is worse than baseline beyond tolerance."""
+    baseline_by_name = {entry["scenario"]: entry for entry in baseline}
+    rows = []
+    for result in results:
+        base = baseline_by_name.get(result["scenario"])
+        if base is None or (base["orders"], base["concurrency"]) != (result["orders"], result["concurrency"]):
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            current, previous = result.get(metric), base.get(metric)
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous
+            worse = -change if higher_is_better else change
+            rows.append({
+                "scenario": result["scenario"],
+                "metric": metric,
+                "baseline": previous,
+                "current": current,
+                "change": round(change, 4),
+                "regression": worse > tolerance,
+            })
+    return rows
+
+
+def print_comparison(rows: List[Dict], tolerance: float):
+    if not rows:
+        print("No scenarios comparable with the baseline")
+        return
+    print(f"\nComparison with baseline (tolerance {tolerance:.0%})")
+    print(f"{'scenario':<20}{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['scenario']:<20}{row['metric']:<24}{row['baseline']:>12.1f}{row['current']:>12.1f}"
+            f"{row['change']:>+10.1%}{flag}"
+        )
@@ -0,0 +1,153 @@
+"""
+Chạy một Scenario trên Temporal và đo thời gian hoàn tất thật của từng đơn.
+
+Latency của một đơn = từ lúc gửi start_workflow tới lúc nhận kết quả workflow
+(handle.result()), tức thời gian khách hàng chờ tới khi đơn có trạng thái cuối. Với
+kịch bản storm, latency tính từ lúc gửi quyết định duyệt. Trạng thái cuối lấy từ kết quả
+workflow (PROCESSING, FULFILLMENT_FAILED, VALIDATION_FAILED...).
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from temporalio.client import Client, WorkflowHandle
+
+from tests.benchmarks.orders.scenarios import APPROVAL_STORM, Scenario
+
+ORDER_TASK_QUEUE = "order-task-queue"
+PERCENTILES = (50, 95, 99)
+# Khoảng thời gian giữa hai lần query trạng thái khi chờ các đơn tới PENDING_APPROVAL
+PENDING_POLL_SECONDS = 0.2
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear interpolation between closest ranks; `sorted_values` must be non-empty."""
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(scenario: Scenario, latencies_ms: List[float], outcomes: Counter, elapsed: float) -> Dict:
+    latencies_ms = sorted(latencies_ms)
+    summary = {
+        "scenario": scenario.name,
+        "orders": scenario.orders,
+        "concurrency": scenario.concurrency,
+        "completed": len(latencies_ms),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(len(latencies_ms) / elapsed, 3) if elapsed > 0 else 0.0,
+        "outcomes": dict(sorted(outcomes.items())),
+    }
+    for pct in PERCENTILES:
+        summary[f"latency_p{pct}_ms"] = round(percentile(latencies_ms, pct), 3) if latencies_ms else None
+    summary["latency_max_ms"] = round(latencies_ms[-1], 3) if latencies_ms else None
+    return summary
+
+
+class ScenarioRunner:
+    def __init__(self, client: Client, task_queue: str = ORDER_TASK_QUEUE):
+        self.client = client
+        self.task_queue = task_queue
+
+    async def run(self, scenario: Scenario, run_id: str) -> Dict:
+        if scenario.approval == APPROVAL_STORM:
+            return await self._run_storm(scenario, run_id)
+        return await self._run_preapproved(scenario, run_id)
+
+    async def _start(self, order: Dict, preapproved: bool) -> WorkflowHandle:
+        return await self.client.start_workflow(
+            "OrderApprovalWorkflow",
+            order,
+            id=f"order-{order['id']}",
+            task_queue=self.task_queue,
+            # Quyết định duyệt đi cùng lệnh start: không cần thêm một round trip signal
+            start_signal="provide_decision" if preapproved else None,
+            start_signal_args=["approved"] if preapproved else [],
+        )
+
+    async def _result(self, handle: WorkflowHandle, timeout: float, outcomes: Counter) -> bool:
+        try:
+            result = await asyncio.wait_for(handle.result(), timeout)
+        except asyncio.TimeoutError:
+            outcomes["TIMEOUT"] += 1
+            return False
+        except Exception as e:
+            outcomes[f"ERROR:{type(e).__name__}"] += 1
+            return False
+        outcomes[result.get("status", "UNKNOWN") if isinstance(result, dict) else "UNKNOWN"] += 1
+        return True
+
+    async def _run_preapproved(self, scenario: Scenario, run_id: str) -> Dict:
+        """Closed loop: at most `concurrency` orders in flight, each from start to workflow result."""
+        semaphore = asyncio.Semaphore(scenario.concurrency)
+        latencies: List[float] = []
+        outcomes: Counter = Counter()
+
+        async def one(order: Dict):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    handle = await self._start(order, preapproved=True)
+                except Exception as e:
+                    outcomes[f"START_ERROR:{type(e).__name__}"] += 1
+                    return
+                if await self._result(handle, scenario.timeout_seconds, outcomes):
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(order) for order in scenario.generate_orders(run_id)))
+        return summarize(scenario, latencies, outcomes, time.perf_counter() - started)
+
+    async def _wait_pending(self, handle: WorkflowHandle, deadline: float) -> Optional[str]:
+        """Polls the order status until it leaves validation; returns it, or None at the deadline."""
+        while time.monotonic() < deadline:
+            try:
+                status = await handle.query("get_status")
+            except Exception:
+                # Workflow task đầu tiên chưa chạy xong
+                status = None
+            if status not in (None, "CREATED", "VALIDATION_PENDING"):
+                return status
+            await asyncio.sleep(PENDING_POLL_SECONDS)
+        return None
+
+    async def _run_storm(self, scenario: Scenario, run_id: str) -> Dict:
+        """Parks every order at PENDING_APPROVAL, then approves them all at once."""
+        semaphore = asyncio.Semaphore(scenario.concurrency)
+        outcomes: Counter = Counter()
+        deadline = time.monotonic() + scenario.timeout_seconds
+
+        async def park(order: Dict) -> Optional[WorkflowHandle]:
+            async with semaphore:
+                try:
+                    handle = await self._start(order, preapproved=False)
+                except Exception as e:
+                    outcomes[f"START_ERROR:{type(e).__name__}"] += 1
+                    return None
+                status = await self._wait_pending(handle, deadline)
+            if status == "PENDING_APPROVAL":
+                return handle
+            # Bị từ chối ở validation, được auto-approve hoặc không tới kịp bước duyệt
+            outcomes[f"NOT_PARKED:{status or 'TIMEOUT'}"] += 1
+            return None
+
+        handles = [h for h in await asyncio.gather(*(park(o) for o in scenario.generate_orders(run_id))) if h]
+
+        latencies: List[float] = []
+
+        async def approve(handle: WorkflowHandle):
+            start = time.perf_counter()
+            try:
+                await handle.signal("provide_decision", "approved")
+            except Exception as e:
+                outcomes[f"SIGNAL_ERROR:{type(e).__name__}"] += 1
+                return
+            if await self._result(handle, scenario.timeout_seconds, outcomes):
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        # Cơn bão: mọi quyết định được gửi cùng lúc, không giới hạn đồng thời
+        started = time.perf_counter()
+        await asyncio.gather(*(approve(handle) for handle in handles))
+        return summarize(scenario, latencies, outcomes, time.perf_counter() - started)
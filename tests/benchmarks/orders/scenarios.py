@@ -0,0 +1,112 @@
+"""
+Kịch bản benchmark cho luồng đơn hàng, khai báo dưới dạng dữ liệu.
+
+Mỗi Scenario mô tả tải (số đơn, số đơn chạy đồng thời, số dòng mỗi đơn, sản phẩm được
+chọn) và cách duyệt đơn:
+    preapproved   quyết định "approved" được gửi cùng lúc start (signal-with-start), nên đơn
+                  không dừng ở bước chờ duyệt kể cả khi rule auto-approval từ chối
+    storm         mọi đơn được start trước và dừng ở PENDING_APPROVAL (tổng tiền vượt
+                  ngưỡng auto-approval), sau đó tất cả được duyệt cùng một lúc
+
+Đơn hàng được sinh theo seed cố định, nên hai lần chạy cùng kịch bản gửi cùng một tải.
+"""
+import random
+from dataclasses import dataclass, replace
+from typing import Dict, Iterator, List, Optional, Tuple
+
+APPROVAL_PREAPPROVED = "preapproved"
+APPROVAL_STORM = "storm"
+
+# Sản phẩm của kho mẫu (storage/inventory_store.py), trừ PROD-004 thuộc nhóm bị chặn auto-approval
+DEFAULT_PRODUCTS = ("PROD-001", "PROD-002", "PROD-003", "PROD-005")
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    description: str
+    orders: int
+    concurrency: int
+    lines_per_order: int = 1
+    products: Tuple[str, ...] = DEFAULT_PRODUCTS
+    # Mọi dòng dùng sản phẩm này (SKU bán chạy, xem INVENTORY_HOT_SKUS)
+    hot_product: Optional[str] = None
+    quantity: int = 1
+    price: float = 10.0
+    approval: str = APPROVAL_PREAPPROVED
+    # Thời gian tối đa chờ một đơn hoàn tất
+    timeout_seconds: float = 300.0
+    seed: int = 42
+
+    def generate_orders(self, run_id: str) -> Iterator[Dict]:
+        """Workflow inputs of this scenario; ids are prefixed with `run_id` so runs do not collide."""
+        rng = random.Random(self.seed)
+        for i in range(self.orders):
+            items = [
+                {
+                    "product_id": self.hot_product or rng.choice(self.products),
+                    "quantity": self.quantity,
+                    "price": self.price,
+                }
+                for _ in range(self.lines_per_order)
+            ]
+            yield {
+                "id": f"BENCH-{run_id}-{self.name}-{i:06d}",
+                # Mỗi đơn một khách hàng để rule velocity không ảnh hưởng kết quả
+                "customer_id": f"BENCH-CUST-{run_id}-{i:06d}",
+                "items": items,
+                "total_amount": round(sum(item["quantity"] * item["price"] for item in items), 2),
+                "payment_method": "CREDIT_CARD",
+            }
+
+    def scaled(self, orders: Optional[int] = None, concurrency: Optional[int] = None) -> "Scenario":
+        """Same scenario with a different load."""
+        return replace(
+            self,
+            orders=orders if orders is not None else self.orders,
+            concurrency=concurrency if concurrency is not None else self.concurrency,
+        )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario(
+            name="concurrent_orders",
+            description="Many small single-line orders in flight at once",
+            orders=200,
+            concurrency=50,
+        ),
+        Scenario(
+            name="large_orders",
+            description="Orders with 100 lines each (validation, rules and inventory batch cost per line)",
+            orders=20,
+            concurrency=5,
+            lines_per_order=100,
+            price=1.0,
+        ),
+        Scenario(
+            name="hot_sku",
+            description="Every order reserves the same product (set INVENTORY_HOT_SKUS=PROD-002 for the SKU actor path)",
+            orders=200,
+            concurrency=50,
+            hot_product="PROD-002",
+        ),
+        Scenario(
+            name="approval_storm",
+            description="Orders parked at manual approval, then all approved at the same moment",
+            orders=200,
+            concurrency=50,
+            # Vượt max_total_amount của rule auto-approval -> phải chờ duyệt
+            price=600.0,
+            approval=APPROVAL_STORM,
+        ),
+    )
+}
+
+
+def select(names: List[str]) -> List[Scenario]:
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+    return [SCENARIOS[name] for name in names]
@@ -0,0 +1 @@
+# replay benchmark package initialization
@@ -0,0 +1,116 @@
+"""
+Benchmark replay workflow và kiểm tra determinism trên các history fixture.
+
+Worker replay toàn bộ history khi workflow không còn trong cache và khi trả lời query
+cho workflow đó, nên thời gian replay là chi phí CPU của workflow task và là cận dưới
+của latency query khi cache miss. Lệnh run báo cáo cho mỗi loại workflow: thời gian
+replay một workflow (p50/p95/max), µs mỗi event (wall và CPU), CPU mỗi workflow task.
+Exit code 1 khi có history replay không deterministic (code workflow thay đổi mà
+không có workflow.patched) hoặc khi chậm hơn baseline quá --tolerance.
+
+Chạy:
+    # Xuất history các lần chạy đã đóng (vd. sau python -m tests.benchmarks.orders) thành fixture
+    python -m tests.benchmarks.replay export --limit 20
+    # Replay, đo và kiểm tra determinism
+    python -m tests.benchmarks.replay run --iterations 5 --output replay.json
+    python -m tests.benchmarks.replay run --baseline replay.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from temporalio.client import Client
+
+from models.converter import data_converter
+from tests.benchmarks.replay.fixtures import DEFAULT_FIXTURES_DIR, DEFAULT_WORKFLOW_TYPES, export_histories, load_histories
+from tests.benchmarks.replay.runner import compare, replay, summarize
+
+
+async def export(args) -> int:
+    host = os.getenv("TEMPORAL_HOST", "localhost")
+    port = os.getenv("TEMPORAL_PORT", "7233")
+    client = await Client.connect(f"{host}:{port}", data_converter=data_converter)
+    written = await export_histories(client, args.fixtures, args.types, args.limit, args.query)
+    print(f"Exported {len(written)} histories to {args.fixtures}")
+    return 0
+
+
+def print_summaries(summaries):
+    print(f"\n{'workflow':<24}{'hist':>6}{'events':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+          f"{'us/event':>10}{'cpu us/ev':>11}{'cpu us/wft':>12}")
+    for s in summaries:
+        print(
+            f"{s['workflow_type']:<24}{s['histories']:>6}{s['events_per_history']:>8.0f}{s['replay_p50_ms']:>10.2f}"
+            f"{s['replay_p95_ms']:>10.2f}{s['replay_max_ms']:>10.2f}{s['us_per_event'] or 0:>10.1f}"
+            f"{s['cpu_us_per_event'] or 0:>11.1f}{s['cpu_us_per_workflow_task'] or 0:>12.1f}"
+        )
+
+
+async def run(args) -> int:
+    histories = load_histories(args.fixtures, args.types)
+    if not histories:
+        print(f"No history fixtures in {args.fixtures}; create them with the export command")
+        return 1
+    print(f"Replaying {len(histories)} histories x {args.iterations} (+{args.warmup} warmup)...")
+    samples, failures = await replay(histories, args.iterations, args.warmup)
+    summaries = summarize(samples)
+    print_summaries(summaries)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summaries, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    status = 0
+    if failures:
+        print(f"\n{len(failures)} histories failed to replay (non-deterministic):")
+        for workflow_id, failure in sorted(failures.items()):
+            print(f"  {workflow_id}: {failure}")
+        status = 1
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(summaries, json.load(f), args.tolerance)
+        if not rows:
+            print("No workflow types comparable with the baseline")
+        else:
+            print(f"\nComparison with baseline (tolerance {args.tolerance:.0%})")
+            print(f"{'workflow':<24}{'metric':<26}{'baseline':>12}{'current':>12}{'change':>10}")
+            for row in rows:
+                flag = "  REGRESSION" if row["regression"] else ""
+                print(f"{row['workflow_type']:<24}{row['metric']:<26}{row['baseline']:>12.2f}"
+                      f"{row['current']:>12.2f}{row['change']:>+10.1%}{flag}")
+        if any(row["regression"] for row in rows):
+            status = 1
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="History fixtures directory")
+    parser.add_argument("--types", nargs="+", default=list(DEFAULT_WORKFLOW_TYPES), help="Workflow types")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Export closed runs from the Temporal server as fixtures")
+    export_parser.add_argument("--limit", type=int, default=20, help="Histories per workflow type")
+    export_parser.add_argument("--query", help="Extra visibility query, e.g. \"StartTime > '2024-01-01T00:00:00Z'\"")
+
+    run_parser = commands.add_parser("run", help="Replay the fixtures, report replay cost and check determinism")
+    run_parser.add_argument("--iterations", type=int, default=5)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument("--output", help="Write the per-type results as JSON")
+    run_parser.add_argument("--baseline", help="Compare with results previously written by --output")
+    run_parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="Relative slowdown beyond which a metric counts as a regression (default 0.2)")
+
+    args = parser.parse_args()
+    sys.exit(asyncio.run(export(args) if args.command == "export" else run(args)))
+
+
+if __name__ == "__main__":
+    main()
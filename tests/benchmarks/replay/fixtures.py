@@ -0,0 +1,63 @@
+"""
+Fixture history workflow cho benchmark replay và kiểm tra determinism.
+
+Mỗi fixture là history JSON của một lần chạy (cùng định dạng Temporal UI / `temporal
+workflow show --output json`, nên có thể thả thêm file tải từ UI vào), nằm ở
+<thư mục>/<WorkflowType>/<workflow_id>.json. Loại workflow được đọc từ event đầu tiên,
+thư mục con chỉ để dễ nhìn.
+"""
+import os
+from typing import List, Optional, Sequence, Tuple
+
+from temporalio.client import Client, WorkflowHistory
+
+# Thư mục fixture mặc định: tests/fixtures/histories
+DEFAULT_FIXTURES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "fixtures", "histories",
+)
+DEFAULT_WORKFLOW_TYPES = ("OrderApprovalWorkflow", "PaymentWorkflow", "InventoryWorkflow")
+
+
+def workflow_type(history: WorkflowHistory) -> str:
+    return history.events[0].workflow_execution_started_event_attributes.workflow_type.name
+
+
+def _file_name(workflow_id: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in workflow_id) + ".json"
+
+
+async def export_histories(client: Client, output_dir: str, workflow_types: Sequence[str] = DEFAULT_WORKFLOW_TYPES,
+                           limit: int = 20, query: Optional[str] = None) -> List[str]:
+    """Writes the histories of up to `limit` closed runs of each type; returns the files written."""
+    written = []
+    for type_name in workflow_types:
+        type_query = f"WorkflowType = '{type_name}' AND ExecutionStatus != 'Running'"
+        if query:
+            type_query = f"{type_query} AND ({query})"
+        directory = os.path.join(output_dir, type_name)
+        os.makedirs(directory, exist_ok=True)
+        count = 0
+        async for execution in client.list_workflows(type_query):
+            if count >= limit:
+                break
+            history = await client.get_workflow_handle(execution.id, run_id=execution.run_id).fetch_history()
+            path = os.path.join(directory, _file_name(execution.id))
+            with open(path, "w") as f:
+                f.write(history.to_json())
+            written.append(path)
+            count += 1
+    return written
+
+
+def load_histories(fixtures_dir: str, workflow_types: Optional[Sequence[str]] = None) -> List[WorkflowHistory]:
+    """Histories of every fixture under `fixtures_dir`, sorted by path, optionally only of the given types."""
+    histories = []
+    for root, _, files in sorted(os.walk(fixtures_dir)):
+        for name in sorted(files):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(root, name)) as f:
+                history = WorkflowHistory.from_json(name[:-len(".json")], f.read())
+            if workflow_types is None or workflow_type(history) in workflow_types:
+                histories.append(history)
+    return histories
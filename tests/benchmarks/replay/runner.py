@@ -0,0 +1,153 @@
+"""
+Replay các history fixture bằng Replayer của Temporal với đúng workflows, data converter
+và workflow runner (sandbox) mà worker dùng, và đo chi phí của từng lần replay.
+
+Mỗi history được replay từ đầu trên một run mới (như khi worker mất cache hoặc trả lời
+query cho workflow không còn trong cache). Thời gian đo cho từng history gồm wall time
+và CPU time của process (gồm các thread của core SDK). Lượt đầu tiên (warmup: import
+module trong sandbox, khởi tạo worker) không được tính.
+
+Như run_workers, rule duyệt đơn được nạp trước: history ghi trước patch
+approval-rules-activity đánh giá rule ngay trong code workflow, nơi sandbox không cho đọc file.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+from temporalio.api.enums.v1 import EventType
+from temporalio.client import WorkflowHistory
+from temporalio.worker import Replayer
+
+from models.converter import data_converter
+from rules.engine import get_rules
+from tests.benchmarks.replay.fixtures import workflow_type
+from worker import TASK_QUEUES
+from workflows.sandbox import create_workflow_runner
+
+REPLAYER_SHUTDOWN_GRACE_SECONDS = 0.2
+
+
+@dataclass
+class ReplaySample:
+    workflow_type: str
+    workflow_id: str
+    events: int
+    workflow_tasks: int
+    wall_seconds: float
+    cpu_seconds: float
+
+
+def all_workflows() -> List[type]:
+    """Every workflow class registered by worker.py."""
+    return [wf for workflows, _ in TASK_QUEUES.values() for wf in workflows]
+
+
+def _workflow_tasks(history: WorkflowHistory) -> int:
+    return sum(1 for event in history.events if event.event_type == EventType.EVENT_TYPE_WORKFLOW_TASK_COMPLETED)
+
+
+async def replay(histories: Sequence[WorkflowHistory], iterations: int = 5,
+                 warmup: int = 1) -> Tuple[List[ReplaySample], Dict[str, str]]:
+    """
+    Replays every history warmup + iterations times; returns the samples of successful
+    replays and, per workflow id, the first replay failure (non-determinism or workflow task error).
+    """
+    get_rules()
+    replayer = Replayer(
+        workflows=all_workflows(),
+        data_converter=data_converter,
+        workflow_runner=create_workflow_runner(),
+    )
+    samples: List[ReplaySample] = []
+    failures: Dict[str, str] = {}
+    started = {}
+
+    async def feed() -> AsyncIterator[WorkflowHistory]:
+        for _ in range(warmup + iterations):
+            for history in histories:
+                started["wall"], started["cpu"] = time.perf_counter(), time.process_time()
+                yield history
+
+    async with replayer.workflow_replay_iterator(feed()) as results:
+        index = 0
+        async for result in results:
+            wall = time.perf_counter() - started["wall"]
+            cpu = time.process_time() - started["cpu"]
+            history = result.history
+            if result.replay_failure is not None:
+                failures.setdefault(history.workflow_id, f"{type(result.replay_failure).__name__}: {result.replay_failure}")
+            elif index >= warmup * len(histories):
+                samples.append(ReplaySample(
+                    workflow_type(history), history.workflow_id, len(history.events),
+                    _workflow_tasks(history), wall, cpu,
+                ))
+            index += 1
+    # Core SDK còn giải phóng replay worker trên thread của nó một lúc sau khi iterator
+    # đóng; interpreter thoát ngay lúc đó (CLI) thì process bị abort thay vì trả exit code
+    await asyncio.sleep(REPLAYER_SHUTDOWN_GRACE_SECONDS)
+    return samples, failures
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples: List[ReplaySample]) -> List[Dict]:
+    """Per workflow type: replay time per workflow, per event and per workflow task."""
+    by_type: Dict[str, List[ReplaySample]] = {}
+    for sample in samples:
+        by_type.setdefault(sample.workflow_type, []).append(sample)
+
+    summaries = []
+    for type_name, group in sorted(by_type.items()):
+        wall = [s.wall_seconds * 1000 for s in group]
+        events = sum(s.events for s in group)
+        tasks = sum(s.workflow_tasks for s in group)
+        total_wall = sum(s.wall_seconds for s in group)
+        total_cpu = sum(s.cpu_seconds for s in group)
+        summaries.append({
+            "workflow_type": type_name,
+            "histories": len({s.workflow_id for s in group}),
+            "replays": len(group),
+            "events_per_history": round(events / len(group), 1),
+            "replay_p50_ms": round(percentile(wall, 50), 3),
+            "replay_p95_ms": round(percentile(wall, 95), 3),
+            "replay_max_ms": round(max(wall), 3),
+            "us_per_event": round(total_wall / events * 1e6, 2) if events else None,
+            "cpu_us_per_event": round(total_cpu / events * 1e6, 2) if events else None,
+            "cpu_us_per_workflow_task": round(total_cpu / tasks * 1e6, 2) if tasks else None,
+        })
+    return summaries
+
+
+# Metric so với baseline; giá trị nhỏ hơn là tốt hơn
+COMPARED_METRICS = ("replay_p95_ms", "us_per_event", "cpu_us_per_workflow_task")
+
+
+def compare(summaries: List[Dict], baseline: List[Dict], tolerance: float) -> List[Dict]:
+    """One row per compared metric; `regression` when it grew beyond tolerance. Types with a different fixture set are skipped."""
+    baseline_by_type = {entry["workflow_type"]: entry for entry in baseline}
+    rows = []
+    for summary in summaries:
+        base = baseline_by_type.get(summary["workflow_type"])
+        if base is None or base["histories"] != summary["histories"]:
+            continue
+        for metric in COMPARED_METRICS:
+            current, previous = summary.get(metric), base.get(metric)
+            if current is None or not previous:
+                continue
+            change = (current - previous) / previous
+            rows.append({
+                "workflow_type": summary["workflow_type"],
+                "metric": metric,
+                "baseline": previous,
+                "current": current,
+                "change": round(change, 4),
+                "regression": change > tolerance,
+            })
+    return rows
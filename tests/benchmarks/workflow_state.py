@@ -0,0 +1,127 @@
+"""
+Benchmark bộ nhớ cho mỗi OrderApprovalWorkflow nằm trong sticky cache của worker,
+so sánh trạng thái cũ với trạng thái gọn hiện tại (models/order_state.py).
+
+    legacy    instance có __dict__, Order pydantic (một OrderItem cho mỗi dòng) và hai
+              RetryPolicy tạo trong __init__ (cách workflow giữ trạng thái trước đây)
+    compact   OrderApprovalWorkflow hiện tại: __slots__, OrderState theo cột, RetryPolicy
+              dùng chung ở cấp module
+
+Input của mỗi workflow được decode riêng từ JSON (như payload Temporal), nên chuỗi
+product_id của các workflow không dùng chung object trừ khi được intern.
+Chỉ đo trạng thái do code của dự án giữ, không gồm phần SDK giữ cho mỗi workflow run.
+
+Chạy:
+    python -m tests.benchmarks.workflow_state --workflows 5000 --lines 20
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tracemalloc
+from datetime import timedelta
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import orjson
+from temporalio.common import RetryPolicy
+
+from models.order import Order, OrderStatus
+from models.order_state import OrderState
+from workflows.order_workflow import OrderApprovalWorkflow
+
+
+class _LegacyScope:
+    def __init__(self):
+        self._tasks = []
+        self.cancel_requested = False
+
+
+class LegacyWorkflowState:
+    """The per-instance state OrderApprovalWorkflow used to hold."""
+
+    def __init__(self, order_input: dict):
+        self._order_state = Order(**order_input)
+        self._is_cancelled = False
+        self._approval_decision = None
+        self._auto_approval_reasons = []
+        self._validation_errors = []
+        self._scope = _LegacyScope()
+        self._validation_retry_policy = RetryPolicy(
+            initial_interval=timedelta(seconds=2),
+            backoff_coefficient=2.0,
+            maximum_interval=timedelta(seconds=30),
+            maximum_attempts=3,
+            non_retryable_error_types=["ApplicationError"],
+        )
+        self._compensation_retry_policy = RetryPolicy(
+            initial_interval=timedelta(seconds=1),
+            backoff_coefficient=2.0,
+            maximum_interval=timedelta(seconds=30),
+            maximum_attempts=10,
+        )
+        self._order_state.status = OrderStatus.PENDING_APPROVAL
+
+
+def legacy_workflow(order_input: dict):
+    return LegacyWorkflowState(order_input)
+
+
+def compact_workflow(order_input: dict):
+    instance = OrderApprovalWorkflow()
+    instance._order_state = OrderState.from_input(order_input)
+    instance._order_state.status = OrderStatus.PENDING_APPROVAL
+    return instance
+
+
+def _payloads(workflows: int, lines: int, skus: int):
+    rng = random.Random(42)
+    for i in range(workflows):
+        items = [
+            {"product_id": f"PROD-{rng.randrange(skus):05d}", "quantity": rng.randint(1, 5), "price": round(rng.uniform(1, 100), 2)}
+            for _ in range(lines)
+        ]
+        yield orjson.dumps({
+            "id": f"ORD-{i:07d}",
+            "customer_id": f"CUST-{rng.randrange(1000):04d}",
+            "items": items,
+            "total_amount": sum(item["quantity"] * item["price"] for item in items),
+            "payment_method": "CREDIT_CARD",
+        })
+
+
+def measure(build, payloads) -> int:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    cache = [build(orjson.loads(payload)) for payload in payloads]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(cache) == len(payloads)
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory per cached OrderApprovalWorkflow")
+    parser.add_argument("--workflows", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=20, help="Lines per order")
+    parser.add_argument("--skus", type=int, default=500, help="Distinct products the lines are drawn from")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    payloads = list(_payloads(args.workflows, args.lines, args.skus))
+    report = {"workflows": args.workflows, "lines": args.lines, "skus": args.skus}
+    for name, build in (("legacy", legacy_workflow), ("compact", compact_workflow)):
+        total = measure(build, payloads)
+        report[name] = {"bytes": total, "bytes_per_workflow": total / args.workflows}
+
+    print(json.dumps(report, indent=2))
+    print(f"\nCompact state: {report['compact']['bytes'] / report['legacy']['bytes'] * 100:.1f}% of legacy")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Benchmark độ trễ workflow task và bộ nhớ cho mỗi workflow trong cache,
+so sánh các cấu hình sandbox của worker.
+
+Các mode:
+    baseline             SandboxedWorkflowRunner mặc định chạy code workflow của --baseline-ref
+                         (trước khi tối ưu, vd. 2902098^), checkout bằng git worktree tạm
+    sandbox-passthrough  Restrictions với PASSTHROUGH_MODULES (cấu hình hiện tại của worker)
+    unsandboxed          UnsandboxedWorkflowRunner (WORKFLOW_SANDBOX=off)
+
+Baseline không thể dựng từ code hiện tại chỉ bằng restrictions: module workflow import
+models trong workflow.unsafe.imports_passed_through(), nên sandbox pass through chúng kể cả
+khi danh sách passthrough rỗng. Vì vậy baseline chạy chính code workflow cũ (models import
+ngoài passthrough, re-import cho mỗi workflow run) với converter mặc định như lúc đó.
+
+Activities được thay bằng stub trả về ngay lập tức để chỉ đo chi phí workflow task.
+Đơn hàng vượt ngưỡng auto-approval nên mọi workflow dừng ở PENDING_APPROVAL.
+Mỗi mode chạy trong một process riêng để số liệu bộ nhớ không ảnh hưởng lẫn nhau.
+
+Chạy (cần Temporal server, hoặc --local để tự khởi động dev server):
+    python -m tests.benchmarks.workflow_task --workflows 200 --baseline-ref 2902098^
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Adjust import paths
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.worker import UnsandboxedWorkflowRunner, Worker
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner
+
+# Module của repo (models, rules, workflows) chỉ được import trong process của từng mode,
+# để mode baseline lấy chúng từ worktree của --baseline-ref
+MODES = ("baseline", "sandbox-passthrough", "unsandboxed")
+
+# order_id -> thời điểm (monotonic) từng stub activity được gọi
+_first_task_at: Dict[str, float] = {}
+_pending_approval_at: Dict[str, float] = {}
+
+
+@activity.defn(name="validate_order")
+async def stub_validate_order(order_data: dict) -> bool:
+    _first_task_at[order_data["id"]] = time.monotonic()
+    return True
+
+
+@activity.defn(name="evaluate_approval_rules")
+async def stub_evaluate_approval_rules(order_data: dict):
+    # Rule thật, không có velocity (không ghi lại đơn hàng); code baseline không gọi activity này
+    from rules.engine import get_rules
+    return get_rules().evaluate(order_data)
+
+
+@activity.defn(name="notify_manager")
+async def stub_notify_manager(order_id: str):
+    _pending_approval_at[order_id] = time.monotonic()
+
+
+def _rss_bytes() -> int:
+    """Current RSS (Linux /proc), falling back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _workflow_runner(mode: str):
+    if mode == "baseline":
+        return SandboxedWorkflowRunner()
+    from workflows.sandbox import passthrough_restrictions
+
+    if mode == "sandbox-passthrough":
+        return SandboxedWorkflowRunner(restrictions=passthrough_restrictions())
+    return UnsandboxedWorkflowRunner()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_mode(client: Client, mode: str, num_workflows: int) -> dict:
+    # Import sau khi đo RSS ban đầu để chi phí import workflow module được tính vào mode
+    rss_before_import = _rss_bytes()
+    from workflows.order_workflow import OrderApprovalWorkflow
+    if mode != "baseline":
+        # Như worker.py: nạp rule trước, không workflow task nào phải đọc file cấu hình
+        from rules.engine import get_rules
+        get_rules()
+
+    task_queue = f"bench-workflow-task-{mode}-{uuid.uuid4().hex[:8]}"
+    worker = Worker(
+        client,
+        task_queue=task_queue,
+        workflows=[OrderApprovalWorkflow],
+        activities=[stub_validate_order, stub_evaluate_approval_rules, stub_notify_manager],
+        workflow_runner=_workflow_runner(mode),
+        max_cached_workflows=num_workflows + 10,
+    )
+
+    async with worker:
+        rss_before = _rss_bytes()
+        started_at = {}
+        handles = []
+        for i in range(num_workflows):
+            order_id = f"BENCH-{mode}-{i}-{uuid.uuid4().hex[:6]}"
+            started_at[order_id] = time.monotonic()
+            handles.append(await client.start_workflow(
+                OrderApprovalWorkflow.run,
+                {
+                    "id": order_id,
+                    "customer_id": f"CUST-{i}",
+                    # Trên max_total_amount của rule -> chờ duyệt thủ công
+                    "items": [{"product_id": "PROD-001", "quantity": 1, "price": 600.0}],
+                    "total_amount": 600.0,
+                },
+                id=f"order-{order_id}",
+                task_queue=task_queue,
+            ))
+
+        # Đợi tất cả workflow tới PENDING_APPROVAL (đang nằm trong sticky cache)
+        deadline = time.monotonic() + 120
+        while len(_pending_approval_at) < num_workflows and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        rss_after = _rss_bytes()
+
+        first_task = [(_first_task_at[k] - started_at[k]) * 1000 for k in _first_task_at]
+        to_pending = [(_pending_approval_at[k] - started_at[k]) * 1000 for k in _pending_approval_at]
+
+        await asyncio.gather(*(h.terminate("benchmark finished") for h in handles), return_exceptions=True)
+
+    return {
+        "mode": mode,
+        "workflows": num_workflows,
+        "completed": len(to_pending),
+        "first_task_ms_p50": statistics.median(first_task) if first_task else None,
+        "first_task_ms_p95": _percentile(first_task, 95) if first_task else None,
+        "to_pending_ms_p50": statistics.median(to_pending) if to_pending else None,
+        "to_pending_ms_p95": _percentile(to_pending, 95) if to_pending else None,
+        "import_rss_bytes": rss_before - rss_before_import,
+        "bytes_per_cached_workflow": (rss_after - rss_before) / max(1, len(to_pending)),
+    }
+
+
+async def _connect(mode: str, local: bool):
+    if mode == "baseline":
+        # Code baseline chưa có models/converter.py
+        from temporalio.converter import DataConverter
+        data_converter = DataConverter.default
+    else:
+        from models.converter import data_converter
+    if local:
+        from temporalio.testing import WorkflowEnvironment
+        env = await WorkflowEnvironment.start_local(data_converter=data_converter)
+        return env, env.client
+    host = os.getenv("TEMPORAL_HOST", "localhost")
+    port = os.getenv("TEMPORAL_PORT", "7233")
+    return None, await Client.connect(f"{host}:{port}", data_converter=data_converter)
+
+
+@contextmanager
+def _baseline_checkout(ref: str):
+    """Temporary git worktree of ref, removed afterwards."""
+    path = tempfile.mkdtemp(prefix="bench-baseline-")
+    subprocess.run(["git", "worktree", "add", "--detach", path, ref], cwd=REPO_ROOT, check=True, capture_output=True)
+    try:
+        yield path
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", path], cwd=REPO_ROOT, check=False, capture_output=True)
+
+
+async def _run_single(mode: str, num_workflows: int, local: bool, code_root: Optional[str]):
+    if code_root:
+        # Code workflow (và models, activities) của baseline đứng trước repo hiện tại
+        sys.path.insert(0, code_root)
+    env, client = await _connect(mode, local)
+    try:
+        result = await run_mode(client, mode, num_workflows)
+    finally:
+        if env:
+            await env.shutdown()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", type=int, default=200)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--local", action="store_true", help="Start a local Temporal dev server")
+    parser.add_argument("--baseline-ref", help="Git ref whose workflow code the baseline mode runs (before the passthrough change)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--single-mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--code-root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_mode:
+        asyncio.run(_run_single(args.single_mode, args.workflows, args.local, args.code_root))
+        return
+
+    modes = args.modes
+    if "baseline" in modes and not args.baseline_ref:
+        print("Skipping baseline: pass --baseline-ref (e.g. the commit before the sandbox passthrough change)")
+        modes = [mode for mode in modes if mode != "baseline"]
+
+    results = []
+    for mode in modes:
+        print(f"Running {mode} with {args.workflows} workflows...")
+        cmd = [sys.executable, os.path.abspath(__file__),
+               "--single-mode", mode, "--workflows", str(args.workflows)]
+        if args.local:
+            cmd.append("--local")
+        if mode == "baseline":
+            with _baseline_checkout(args.baseline_ref) as code_root:
+                out = subprocess.run(cmd + ["--code-root", code_root], check=True, capture_output=True, text=True).stdout
+        else:
+            out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"\n{'mode':<22}{'first task p50/p95 (ms)':>26}{'to pending p50/p95 (ms)':>26}{'KB/cached wf':>15}")
+    for r in results:
+        print(
+            f"{r['mode']:<22}"
+            f"{r['first_task_ms_p50'] or 0:>13.1f}/{r['first_task_ms_p95'] or 0:<12.1f}"
+            f"{r['to_pending_ms_p50'] or 0:>13.1f}/{r['to_pending_ms_p95'] or 0:<12.1f}"
+            f"{r['bytes_per_cached_workflow'] / 1024:>15.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
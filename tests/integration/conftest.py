@@ -0,0 +1,69 @@
+"""
+Fixtures cho test integration trên môi trường time-skipping của Temporal.
+
+Test server (tải về lần đầu, hoặc lấy từ TEMPORAL_TEST_SERVER_PATH) tự nhảy thời gian
+khi workflow chỉ còn chờ timer, nên các nhánh chờ 1 phút / 1 giờ / 1 ngày chạy trong vài
+giây. Activities thật được đăng ký như trong worker.py, với độ trễ mô phỏng bằng 0 và
+lỗi ngẫu nhiên tắt (activities/simulation.py); xem harness.py.
+
+Không có test server (vd. không tải được khi offline) thì các test này bị skip; đặt
+TEMPORAL_INTEGRATION_REQUIRED=1 (hoặc CI=true) để chúng fail thay vì skip, tránh CI báo
+thành công khi không test gì. Phần không cần server của các kịch bản lease có trong
+tests/unit/test_lease_activities.py.
+
+Chạy:
+    python -m pytest tests/integration -q
+"""
+import asyncio
+import os
+import sys
+from typing import Callable
+
+import pytest
+
+# Adjust import paths
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from temporalio.testing import WorkflowEnvironment
+
+from activities import simulation
+from activities.temporal_client import set_client
+from models.converter import data_converter
+
+# Giới hạn thời gian thật cho mỗi test (thời gian workflow thì được nhảy)
+TEST_TIMEOUT_SECONDS = 60
+# Fail thay vì skip khi không khởi động được test server
+INTEGRATION_REQUIRED = os.getenv(
+    "TEMPORAL_INTEGRATION_REQUIRED", os.getenv("CI", "false")
+).lower() in ("1", "true", "yes")
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def env(event_loop):
+    simulation.configure(latency_scale=0, faults=False)
+    try:
+        env = event_loop.run_until_complete(WorkflowEnvironment.start_time_skipping(
+            data_converter=data_converter,
+            test_server_existing_path=os.getenv("TEMPORAL_TEST_SERVER_PATH"),
+        ))
+    except Exception as e:
+        if INTEGRATION_REQUIRED:
+            pytest.fail(f"Temporal time-skipping test server unavailable: {e}")
+        pytest.skip(f"Temporal time-skipping test server unavailable: {e}")
+    # Activities gửi signal (SkuReservationWorkflow) qua client của môi trường test
+    set_client(env.client)
+    yield env
+    event_loop.run_until_complete(env.shutdown())
+
+
+@pytest.fixture
+def run(event_loop) -> Callable:
+    """Runs a coroutine to completion on the session loop, bounded by TEST_TIMEOUT_SECONDS of wall time."""
+    return lambda coro: event_loop.run_until_complete(asyncio.wait_for(coro, TEST_TIMEOUT_SECONDS))
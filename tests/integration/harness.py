@@ -0,0 +1,69 @@
+"""
+Worker và tiện ích dùng chung cho test integration.
+
+running_workers đăng ký workflows và activities thật của worker.py cho mọi task queue;
+một test ép nhánh lỗi cần kiểm tra bằng cách thay activity tương ứng bằng phiên bản
+riêng cùng tên (vd. cổng thanh toán từ chối, lease ngắn hạn). Như run_workers, harness
+nạp rule duyệt đơn trước khi chạy workflow task và chạy bộ quét lease hết hạn của store.
+Lease hết hạn theo giờ thật (không theo thời gian được nhảy của test server), nên bộ quét
+chạy với chu kỳ ngắn LEASE_SWEEP_SECONDS.
+"""
+import asyncio
+import uuid
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Callable, Iterable
+
+from temporalio import activity
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+from rules.engine import get_rules
+from storage.inventory_store import get_inventory_store
+from storage.leases import run_lease_sweeper
+from worker import TASK_QUEUES
+from workflows.order_workflow import INVENTORY_TASK_QUEUE, PAYMENT_TASK_QUEUE
+from workflows.sandbox import create_workflow_runner
+
+ORDER_TASK_QUEUE = "order-task-queue"
+LEASE_SWEEP_SECONDS = 0.1
+
+
+def unique_id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+@asynccontextmanager
+async def running_workers(env: WorkflowEnvironment, overrides: Iterable[Callable] = ()):
+    """Workers for every task queue of worker.py; `overrides` replace the activities of the same name."""
+    get_rules()
+    replaced = {activity._Definition.must_from_callable(fn).name: fn for fn in overrides}
+    async with AsyncExitStack() as stack:
+        for task_queue, (workflows, activities) in TASK_QUEUES.items():
+            registered = []
+            for fn in activities:
+                name = activity._Definition.must_from_callable(fn).name
+                registered.append(replaced.get(name, fn))
+            await stack.enter_async_context(Worker(
+                env.client,
+                task_queue=task_queue,
+                workflows=workflows,
+                activities=registered,
+                workflow_runner=create_workflow_runner(),
+            ))
+        sweeper_stop = asyncio.Event()
+        sweeper = asyncio.create_task(run_lease_sweeper(get_inventory_store(), LEASE_SWEEP_SECONDS, sweeper_stop))
+        try:
+            yield
+        finally:
+            sweeper_stop.set()
+            await sweeper
+
+
+async def wait_for_query(handle, query: str, predicate: Callable, attempts: int = 200):
+    """Polls a query until `predicate` accepts its result (time is not skipped while polling)."""
+    for _ in range(attempts):
+        result = await handle.query(query)
+        if predicate(result):
+            return result
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"Query {query} never satisfied the condition (last result: {result!r})")
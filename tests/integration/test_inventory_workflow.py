@@ -0,0 +1,106 @@
+"""
+InventoryWorkflow: lease được cấp, thiếu hàng, tín hiệu cancel giữa lúc đặt trước, và
+timeout 1 phút chờ quyết định của SkuReservationWorkflow cho sản phẩm bán chạy.
+"""
+from datetime import timedelta
+
+from temporalio import activity
+
+from activities.heartbeat import sleep_with_heartbeat
+from storage.inventory_store import get_inventory_store
+from tests.integration.harness import INVENTORY_TASK_QUEUE, running_workers, unique_id, wait_for_query
+
+PRODUCT_ID = "PROD-002"
+
+
+def inventory_params(order_id: str, quantity: int = 1, product_id: str = PRODUCT_ID) -> dict:
+    return {
+        "order_id": f"inventory_{order_id}",
+        "inventory_updates": [{"product_id": product_id, "quantity_change": -quantity, "order_id": order_id}],
+    }
+
+
+@activity.defn(name="reserve_inventory_lease")
+async def stalled_lease_reservation(params: dict) -> dict:
+    # Giữ activity chạy (có heartbeat) tới khi workflow hủy nó
+    await sleep_with_heartbeat(60, "reserve_lease")
+    raise AssertionError("reservation was not cancelled")
+
+
+@activity.defn(name="request_sku_reservation")
+async def lost_sku_reservation(request: dict) -> None:
+    # Yêu cầu không tới được actor: workflow không bao giờ nhận quyết định
+    return None
+
+
+async def available(product_id: str = PRODUCT_ID) -> int:
+    return (await get_inventory_store().get(product_id)).available_quantity()
+
+
+def test_reservation_returns_lease(env, run):
+    async def scenario():
+        async with running_workers(env):
+            before = await available()
+            order_id = unique_id("ORDER")
+            result = await env.client.execute_workflow(
+                "InventoryWorkflow", inventory_params(order_id, 2), id=f"inventory_{order_id}",
+                task_queue=INVENTORY_TASK_QUEUE,
+            )
+            reserved = await available()
+            await get_inventory_store().release_lease(result["lease_id"])
+            return result, before, reserved, await available()
+
+    result, before, reserved, released = run(scenario())
+    assert result["status"] == "RESERVED"
+    assert reserved == before - 2
+    assert released == before
+
+
+def test_insufficient_inventory_fails(env, run):
+    async def scenario():
+        async with running_workers(env):
+            order_id = unique_id("ORDER")
+            return await env.client.execute_workflow(
+                "InventoryWorkflow", inventory_params(order_id, 100_000), id=f"inventory_{order_id}",
+                task_queue=INVENTORY_TASK_QUEUE,
+            )
+
+    result = run(scenario())
+    assert result["status"] == "FAILED"
+
+
+def test_cancel_signal_interrupts_reservation(env, run):
+    async def scenario():
+        async with running_workers(env, overrides=[stalled_lease_reservation]):
+            before = await available()
+            order_id = unique_id("ORDER")
+            handle = await env.client.start_workflow(
+                "InventoryWorkflow", inventory_params(order_id), id=f"inventory_{order_id}",
+                task_queue=INVENTORY_TASK_QUEUE,
+            )
+            await wait_for_query(handle, "get_timings", lambda timings: timings["current_stage"] == "reservation")
+            await handle.signal("cancel")
+            return await handle.result(), before, await available()
+
+    result, before, after = run(scenario())
+    assert result["status"] == "CANCELLED"
+    assert after == before
+
+
+def test_hot_sku_reservation_times_out_without_decision(env, run, monkeypatch):
+    monkeypatch.setenv("INVENTORY_HOT_SKUS", PRODUCT_ID)
+
+    async def scenario():
+        async with running_workers(env, overrides=[lost_sku_reservation]):
+            started = await env.get_current_time()
+            order_id = unique_id("ORDER")
+            result = await env.client.execute_workflow(
+                "InventoryWorkflow", inventory_params(order_id), id=f"inventory_{order_id}",
+                task_queue=INVENTORY_TASK_QUEUE,
+            )
+            return result, await env.get_current_time() - started
+
+    result, elapsed = run(scenario())
+    assert result["status"] == "FAILED"
+    assert result["reason"] == "Reservation timed out"
+    assert elapsed >= timedelta(minutes=1)
@@ -0,0 +1,144 @@
+"""
+OrderApprovalWorkflow end-to-end với child PaymentWorkflow/InventoryWorkflow: duyệt tự động,
+duyệt/từ chối thủ công, hủy khi đang chờ duyệt, và bù trừ khi thanh toán bị từ chối
+hoặc lease tồn kho đã hết hạn lúc commit.
+"""
+from temporalio import activity
+
+from activities.heartbeat import sleep_with_heartbeat
+from activities.inventory_activities import reserve_inventory_lease
+from activities.payment_activities import process_payment, refund_payment
+from models.payment import Payment, PaymentStatus
+from storage.inventory_store import get_inventory_store
+from tests.integration.harness import ORDER_TASK_QUEUE, running_workers, unique_id, wait_for_query
+
+PRODUCT_ID = "PROD-002"
+# Lease ngắn cho test hết hạn; thanh toán chạy (giờ thật) quá hạn lease cộng một tick
+# 1 giây của TimingWheel, để bộ quét của harness đã trả hàng trước khi commit
+SHORT_LEASE_TTL_SECONDS = 0.5
+SLOW_PAYMENT_SECONDS = 3.0
+
+
+def order_input(order_id: str, price: float = 50.0, quantity: int = 1) -> dict:
+    """A one-line order; above the rules' max_total_amount (500) it needs manual approval."""
+    return {
+        "id": order_id,
+        # Mỗi đơn một khách hàng để rule velocity không ảnh hưởng kết quả
+        "customer_id": f"CUST-{order_id}",
+        "items": [{"product_id": PRODUCT_ID, "quantity": quantity, "price": price}],
+        "total_amount": round(price * quantity, 2),
+        "payment_method": "CREDIT_CARD",
+    }
+
+
+async def available() -> int:
+    return (await get_inventory_store().get(PRODUCT_ID)).available_quantity()
+
+
+async def start_order(env, order: dict):
+    return await env.client.start_workflow(
+        "OrderApprovalWorkflow", order, id=f"order-{order['id']}", task_queue=ORDER_TASK_QUEUE,
+    )
+
+
+@activity.defn(name="process_payment")
+async def declined_payment(payment: Payment) -> Payment:
+    payment.status = PaymentStatus.FAILED
+    return payment
+
+
+@activity.defn(name="reserve_inventory_lease")
+async def short_lease(params: dict) -> dict:
+    return await reserve_inventory_lease({**params, "ttl_seconds": SHORT_LEASE_TTL_SECONDS})
+
+
+@activity.defn(name="process_payment")
+async def slow_payment(payment: Payment) -> Payment:
+    # Lease lapses and the harness sweeper returns its stock while payment is still running
+    await sleep_with_heartbeat(SLOW_PAYMENT_SECONDS, "slow payment")
+    return await process_payment(payment)
+
+
+refunded_payments = []
+
+
+@activity.defn(name="refund_payment")
+async def recorded_refund(payment: Payment) -> Payment:
+    refunded_payments.append(payment.id)
+    return await refund_payment(payment)
+
+
+def test_auto_approved_order_is_paid_and_committed(env, run):
+    async def scenario():
+        async with running_workers(env):
+            before = await available()
+            handle = await start_order(env, order_input(unique_id("ORDER"), quantity=2))
+            return await handle.result(), before, await available()
+
+    result, before, after = run(scenario())
+    assert result["status"] == "PROCESSING"
+    assert after == before - 2
+
+
+def test_manual_approval(env, run):
+    async def scenario():
+        async with running_workers(env):
+            handle = await start_order(env, order_input(unique_id("ORDER"), price=600.0))
+            await wait_for_query(handle, "get_status", lambda status: status == "PENDING_APPROVAL")
+            await handle.signal("provide_decision", "approved")
+            return await handle.result()
+
+    assert run(scenario())["status"] == "PROCESSING"
+
+
+def test_rejected_order(env, run):
+    async def scenario():
+        async with running_workers(env):
+            before = await available()
+            handle = await start_order(env, order_input(unique_id("ORDER"), price=600.0))
+            await wait_for_query(handle, "get_status", lambda status: status == "PENDING_APPROVAL")
+            await handle.signal("provide_decision", "rejected")
+            return await handle.result(), before, await available()
+
+    result, before, after = run(scenario())
+    assert result["status"] == "REJECTED"
+    assert after == before
+
+
+def test_cancel_while_waiting_for_approval(env, run):
+    async def scenario():
+        async with running_workers(env):
+            handle = await start_order(env, order_input(unique_id("ORDER"), price=600.0))
+            await wait_for_query(handle, "get_status", lambda status: status == "PENDING_APPROVAL")
+            await handle.signal("cancel_order")
+            return await handle.result(), await handle.query("get_timings")
+
+    result, timings = run(scenario())
+    assert result["status"] == "CANCELLED"
+    assert timings["stages"][-1]["stage"] == "cancellation"
+
+
+def test_declined_payment_releases_inventory(env, run):
+    async def scenario():
+        async with running_workers(env, overrides=[declined_payment]):
+            before = await available()
+            handle = await start_order(env, order_input(unique_id("ORDER")))
+            return await handle.result(), before, await available()
+
+    result, before, after = run(scenario())
+    assert result["status"] == "FULFILLMENT_FAILED"
+    assert after == before
+
+
+def test_expired_lease_refunds_payment(env, run):
+    async def scenario():
+        async with running_workers(env, overrides=[short_lease, slow_payment, recorded_refund]):
+            before = await available()
+            order = order_input(unique_id("ORDER"))
+            result = await (await start_order(env, order)).result()
+            return order, result, before, await available()
+
+    order, result, before, after = run(scenario())
+    assert result["status"] == "FULFILLMENT_FAILED"
+    assert f"{order['id']}-payment" in refunded_payments
+    assert after == before
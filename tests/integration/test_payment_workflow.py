@@ -0,0 +1,66 @@
+"""
+PaymentWorkflow: chờ hoàn tiền tối đa 1 ngày, hoàn tiền khi có tín hiệu, thanh toán bị từ chối.
+"""
+from datetime import timedelta
+
+from temporalio import activity
+
+from models.payment import Payment, PaymentStatus
+from tests.integration.harness import PAYMENT_TASK_QUEUE, running_workers, unique_id, wait_for_query
+
+
+def payment_input(payment_id: str) -> dict:
+    return {"id": payment_id, "order_id": f"ORDER-{payment_id}", "amount": 120.0, "method": "CREDIT_CARD"}
+
+
+@activity.defn(name="process_payment")
+async def declined_payment(payment: Payment) -> Payment:
+    payment.status = PaymentStatus.FAILED
+    return payment
+
+
+def test_refund_window_expires_after_one_day(env, run):
+    async def scenario():
+        async with running_workers(env):
+            started = await env.get_current_time()
+            payment_id = unique_id("PAY")
+            result = await env.client.execute_workflow(
+                "PaymentWorkflow", payment_input(payment_id), id=f"payment_{payment_id}", task_queue=PAYMENT_TASK_QUEUE,
+            )
+            return result, await env.get_current_time() - started
+
+    result, elapsed = run(scenario())
+    assert result["status"] == "COMPLETED"
+    assert result["transaction_id"]
+    assert elapsed >= timedelta(days=1)
+
+
+def test_refund_signal_refunds_payment(env, run):
+    async def scenario():
+        async with running_workers(env):
+            payment_id = unique_id("PAY")
+            handle = await env.client.start_workflow(
+                "PaymentWorkflow", payment_input(payment_id), id=f"payment_{payment_id}", task_queue=PAYMENT_TASK_QUEUE,
+            )
+            await wait_for_query(handle, "get_timings", lambda timings: timings["current_stage"] == "refund_wait")
+            await handle.signal("refundPayment", "customer request")
+            return await handle.result(), await handle.query("get_timings")
+
+    result, timings = run(scenario())
+    assert result["status"] == "REFUNDED"
+    assert [stage["stage"] for stage in timings["stages"]] == ["processing", "refund_wait", "refund"]
+
+
+def test_declined_payment_fails_without_waiting_for_refund(env, run):
+    async def scenario():
+        async with running_workers(env, overrides=[declined_payment]):
+            started = await env.get_current_time()
+            payment_id = unique_id("PAY")
+            result = await env.client.execute_workflow(
+                "PaymentWorkflow", payment_input(payment_id), id=f"payment_{payment_id}", task_queue=PAYMENT_TASK_QUEUE,
+            )
+            return result, await env.get_current_time() - started
+
+    result, elapsed = run(scenario())
+    assert result["status"] == "FAILED"
+    assert elapsed < timedelta(hours=1)
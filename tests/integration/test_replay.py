@@ -0,0 +1,24 @@
+"""
+Kiểm tra determinism: mọi history fixture (tests/fixtures/histories) phải replay được
+với code workflow hiện tại. Không cần Temporal server.
+
+Repo kèm sẵn các history dựng tay cho từng loại workflow: OrderApprovalWorkflow theo
+nhánh hiện tại (rule trong activity, từ chối thủ công), nhánh ghi trước
+approval-rules-activity và child-workflow-fulfilment (rule trong code workflow, duyệt rồi
+process_approved_order) và nhánh trước khi có rule; PaymentWorkflow thanh toán xong;
+InventoryWorkflow kiểm tra theo lô và đặt trước bằng lease. Marker của workflow.patched
+nằm đúng workflow task như khi worker ghi. History thật có thể thêm bằng
+`python -m tests.benchmarks.replay export`.
+"""
+import pytest
+
+from tests.benchmarks.replay.fixtures import DEFAULT_FIXTURES_DIR, load_histories
+from tests.benchmarks.replay.runner import replay
+
+HISTORIES = load_histories(DEFAULT_FIXTURES_DIR)
+
+
+@pytest.mark.skipif(not HISTORIES, reason="no history fixtures (python -m tests.benchmarks.replay export)")
+def test_history_fixtures_replay_deterministically(event_loop):
+    _, failures = event_loop.run_until_complete(replay(HISTORIES, iterations=1, warmup=0))
+    assert failures == {}
@@ -0,0 +1,108 @@
+"""Chuyển trạng thái của CircuitBreaker (activities/circuit_breaker.py)."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from activities import circuit_breaker
+from activities.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from integrations.http import ServiceRequestError, ServiceUnavailableError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for the breaker module."""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _call(breaker: CircuitBreaker, error: BaseException = None):
+    async def call():
+        async with breaker.guard():
+            if error is not None:
+                raise error
+    asyncio.run(call())
+
+
+def _breaker() -> CircuitBreaker:
+    return CircuitBreaker("test", failure_rate_threshold=0.5, window_seconds=30, minimum_calls=4, open_seconds=15)
+
+
+def test_opens_at_failure_rate_after_minimum_calls(clock):
+    breaker = _breaker()
+    for _ in range(2):
+        _call(breaker)
+    for _ in range(2):
+        with pytest.raises(ServiceUnavailableError):
+            _call(breaker, ServiceUnavailableError("test", "down"))
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        _call(breaker)
+    assert breaker.rejected == 1
+
+
+def test_failures_below_minimum_calls_keep_it_closed(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            _call(breaker, ValueError("boom"))
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_trial_closes_or_reopens(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            _call(breaker, ValueError("boom"))
+    clock[0] += 16
+    with pytest.raises(ValueError):
+        _call(breaker, ValueError("still down"))
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.times_opened == 2
+
+    clock[0] += 16
+    _call(breaker)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_request_errors_do_not_count_as_failures(clock):
+    breaker = _breaker()
+    for _ in range(10):
+        with pytest.raises(ServiceRequestError):
+            _call(breaker, ServiceRequestError("test", "POST /x: HTTP 400"))
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.failures == 0
+
+
+def test_cancelled_trial_call_frees_the_half_open_slot(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        with pytest.raises(ValueError):
+            _call(breaker, ValueError("boom"))
+    clock[0] += 16
+    with pytest.raises(asyncio.CancelledError):
+        _call(breaker, asyncio.CancelledError())
+    assert breaker.state == CircuitState.HALF_OPEN
+    _call(breaker)
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_calls_failing_after_it_opened_do_not_reopen_it(clock):
+    breaker = _breaker()
+    for _ in range(6):
+        breaker.before_call()
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    opened_at = clock[0]
+
+    # Các lời gọi còn lại bắt đầu khi breaker còn đóng và lỗi sau khi nó đã mở
+    clock[0] += 10
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.times_opened == 1
+    assert breaker.failures == 6
+    clock[0] = opened_at + 16
+    breaker.before_call()
+    assert breaker.state == CircuitState.HALF_OPEN
@@ -0,0 +1,47 @@
+"""Data converter orjson + pydantic (models/converter.py)."""
+import asyncio
+from dataclasses import dataclass
+from typing import List
+
+from models.converter import data_converter, decode_json, encode_json
+from models.order import Order, OrderItem, OrderStatus
+from models.payment import Payment, PaymentMethod
+
+
+@dataclass(frozen=True)
+class Point:
+    x: int
+    y: int
+
+
+def _round_trip(value, type_hint):
+    async def convert():
+        payloads = await data_converter.encode([value])
+        return (await data_converter.decode(payloads, [type_hint]))[0]
+    return asyncio.run(convert())
+
+
+def test_models_round_trip_by_type_hint():
+    order = Order(id="O1", customer_id="C1", items=[OrderItem(product_id="P1", quantity=2, price=5.0)],
+                  total_amount=10.0, payment_method=PaymentMethod.CASH)
+    decoded = _round_trip(order, Order)
+    assert decoded == order
+    assert decoded.payment_method is PaymentMethod.CASH
+
+    payment = Payment(order_id="O1", amount=10.0, method=PaymentMethod.E_WALLET)
+    assert _round_trip(payment, Payment) == payment
+
+
+def test_plain_values_and_dataclasses():
+    assert _round_trip({"status": OrderStatus.APPROVED, "n": 1}, dict) == {"status": "APPROVED", "n": 1}
+    assert _round_trip([Point(1, 2)], List[Point]) == [Point(1, 2)]
+
+    async def encoding():
+        return (await data_converter.encode([{"a": 1}]))[0].metadata["encoding"]
+    # Cùng encoding với converter mặc định: history cũ replay được
+    assert asyncio.run(encoding()) == b"json/plain"
+
+
+def test_same_json_as_default_converter_for_dicts():
+    value = {"id": "O1", "items": [1, 2], 3: "int key"}
+    assert decode_json(encode_json(value)) == {"id": "O1", "items": [1, 2], "3": "int key"}
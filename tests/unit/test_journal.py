@@ -0,0 +1,111 @@
+"""
+Journal tồn kho (storage/journal.py): phục hồi khi bản ghi cuối bị ghi dở, xoay
+segment, snapshot và phục hồi store có journal.
+"""
+import asyncio
+import os
+
+from storage.journal import (
+    OP_RESERVE,
+    OP_RESTOCK,
+    InventoryJournal,
+    JournaledInventoryStore,
+    decode_records,
+)
+from storage.leases import Lease
+from storage.memory import InMemoryInventoryStore
+
+ROWS = [{"product_id": "SKU-1", "id": "INV-1", "name": "Item 1", "quantity": 100, "reserved": 0}]
+
+
+def _append_reserves(journal: InventoryJournal, count: int):
+    for n in range(1, count + 1):
+        journal.append(OP_RESERVE, "SKU-1", 1, 100, n, order_id=f"ORD-{n}")
+
+
+def _segments(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if name.startswith("journal-"))
+
+
+def _close(journal: InventoryJournal):
+    asyncio.run(journal.close())
+
+
+def test_recovers_up_to_torn_last_record(tmp_path):
+    journal = InventoryJournal(str(tmp_path))
+    journal.recover(ROWS)
+    _append_reserves(journal, 3)
+    # Ba bản ghi cùng kích thước
+    record_size = journal._segment.offset // 3
+    _close(journal)
+
+    # Crash giữa lúc ghi bản ghi thứ 3: phần cuối của nó chưa xuống đĩa
+    path = os.path.join(tmp_path, _segments(tmp_path)[0])
+    with open(path, "r+b") as f:
+        f.seek(3 * record_size - 10)
+        f.write(b"\0" * 10)
+
+    journal = InventoryJournal(str(tmp_path))
+    rows, _, _ = journal.recover(ROWS)
+    assert journal.last_seq == 2
+    assert rows[0]["reserved"] == 2
+
+    # Bản ghi mới ghi đè lên phần đuôi hỏng, không nối sau nó
+    journal.append(OP_RESTOCK, "SKU-1", 5, 105, 2)
+    _close(journal)
+    journal = InventoryJournal(str(tmp_path))
+    rows, _, _ = journal.recover(ROWS)
+    assert journal.last_seq == 3
+    assert (rows[0]["quantity"], rows[0]["reserved"]) == (105, 2)
+    _close(journal)
+
+
+def test_rotated_segments_are_named_after_their_first_record(tmp_path):
+    journal = InventoryJournal(str(tmp_path), segment_bytes=200)
+    journal.recover(ROWS)
+    _append_reserves(journal, 10)
+    _close(journal)
+
+    segments = _segments(tmp_path)
+    assert len(segments) > 1
+    for name in segments:
+        with open(os.path.join(tmp_path, name), "rb") as f:
+            first_record, _ = next(decode_records(f.read()))
+        assert name == f"journal-{first_record.seq:020d}.log"
+
+    journal = InventoryJournal(str(tmp_path), segment_bytes=200)
+    rows, _, _ = journal.recover(ROWS)
+    assert journal.last_seq == 10
+    assert rows[0]["reserved"] == 10
+    _close(journal)
+
+
+def test_snapshot_prunes_segments_and_restores_state_and_leases(tmp_path):
+    def create_store():
+        journal = InventoryJournal(str(tmp_path), segment_bytes=200)
+        return JournaledInventoryStore(journal, lambda rows: InMemoryInventoryStore(rows), snapshot_every=1000)
+
+    async def write():
+        store = create_store()
+        for n in range(6):
+            await store.reserve("PROD-001", 1, order_id=f"ORD-{n}")
+        await store.reserve_lease("LEASE-1", [("PROD-002", 3)], ttl_seconds=600, order_id="ORD-L")
+        await store.snapshot()
+        assert len(_segments(tmp_path)) == 1
+        await store.release("PROD-001", 2, order_id="ORD-0")
+        # Không ghi snapshot lúc đóng: phần đuôi sau snapshot phải được replay
+        await store.journal.close()
+
+    async def reopen():
+        store = create_store()
+        item = await store.get("PROD-001")
+        lease = await store.get_lease("LEASE-1")
+        leased = await store.get("PROD-002")
+        await store.journal.close()
+        return item, lease, leased
+
+    asyncio.run(write())
+    item, lease, leased = asyncio.run(reopen())
+    assert item.reserved == 5 + 6 - 2
+    assert isinstance(lease, Lease) and lease.lines == [("PROD-002", 3)]
+    assert leased.reserved == 10 + 3
@@ -0,0 +1,83 @@
+"""
+Activity lease tồn kho chạy trong ActivityEnvironment, không cần Temporal server: phần
+tồn kho của test integration test_expired_lease_refunds_payment (lease hết hạn trong lúc
+thanh toán, bộ quét trả hàng, commit thất bại không retry), để CI không có test server
+vẫn kiểm tra nhánh này.
+"""
+import asyncio
+
+import pytest
+from temporalio.exceptions import ApplicationError
+from temporalio.testing import ActivityEnvironment
+
+from activities import simulation
+from activities.inventory_activities import (
+    commit_inventory_lease,
+    release_inventory_lease,
+    reserve_inventory_lease,
+)
+from storage import inventory_store
+from storage.leases import run_lease_sweeper
+from storage.memory import InMemoryInventoryStore
+
+PRODUCT_ID = "PROD-002"
+SWEEP_SECONDS = 0.05
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Fresh memory store as the process-wide store, with simulated latency and faults off."""
+    simulation.configure(latency_scale=0, faults=False)
+    store = InMemoryInventoryStore()
+    monkeypatch.setattr(inventory_store, "_store", store)
+    yield store
+    simulation.configure()
+
+
+def test_lease_expiring_before_commit_returns_stock_and_fails_commit(store):
+    async def scenario():
+        env = ActivityEnvironment()
+        before = (await store.get(PRODUCT_ID)).available_quantity()
+        stop = asyncio.Event()
+        sweeper = asyncio.create_task(run_lease_sweeper(store, SWEEP_SECONDS, stop))
+        try:
+            lease = await env.run(reserve_inventory_lease, {
+                "lease_id": "L-ORDER-1", "order_id": "ORDER-1",
+                "lines": [{"product_id": PRODUCT_ID, "quantity": 2}], "ttl_seconds": 0.1,
+            })
+            assert lease["status"] == "RESERVED"
+            assert (await store.get(PRODUCT_ID)).available_quantity() == before - 2
+
+            # Hết hạn cộng một tick 1 giây của TimingWheel, như thanh toán chậm trong test integration
+            await asyncio.sleep(1.5)
+            assert (await store.get(PRODUCT_ID)).available_quantity() == before
+            with pytest.raises(ApplicationError) as raised:
+                await env.run(commit_inventory_lease, "L-ORDER-1")
+            assert raised.value.type == "LeaseNotFoundError"
+            assert raised.value.non_retryable
+
+            released = await env.run(release_inventory_lease, "L-ORDER-1")
+            assert released["status"] == "NOT_FOUND"
+            assert (await store.get(PRODUCT_ID)).available_quantity() == before
+        finally:
+            stop.set()
+            await sweeper
+
+    asyncio.run(scenario())
+
+
+def test_committed_lease_is_not_swept(store):
+    async def scenario():
+        env = ActivityEnvironment()
+        before = await store.get(PRODUCT_ID)
+        await env.run(reserve_inventory_lease, {
+            "lease_id": "L-ORDER-2", "order_id": "ORDER-2",
+            "lines": [{"product_id": PRODUCT_ID, "quantity": 1}], "ttl_seconds": 30,
+        })
+        committed = await env.run(commit_inventory_lease, "L-ORDER-2")
+        assert committed["status"] == "COMMITTED"
+        assert await store.expire_leases(now=10**10) == []
+        item = await store.get(PRODUCT_ID)
+        assert (item.quantity, item.reserved) == (before.quantity - 1, before.reserved)
+
+    asyncio.run(scenario())
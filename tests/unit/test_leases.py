@@ -0,0 +1,111 @@
+"""
+Hạn của lease: TimingWheel (storage/timing_wheel.py), LeaseBook và việc trả hàng của
+lease hết hạn trong store (storage/leases.py, storage/inventory_store.py).
+"""
+import asyncio
+import time
+
+import pytest
+
+from storage.leases import Lease, LeaseBook, LeaseNotFoundError
+from storage.memory import InMemoryInventoryStore
+from storage.timing_wheel import TimingWheel
+
+ROWS = [{"product_id": "SKU-1", "id": "INV-1", "name": "Item 1", "quantity": 10, "reserved": 0}]
+
+
+def test_wheel_returns_keys_once_their_tick_has_passed():
+    wheel = TimingWheel(tick_seconds=1.0, slots=8, start=100.0)
+    wheel.schedule("a", 101.5)
+    wheel.schedule("b", 103.0)
+    assert wheel.advance(101.9) == []
+    assert wheel.advance(102.0) == ["a"]
+    assert wheel.advance(103.0) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_wheel_keeps_deadlines_beyond_one_revolution():
+    wheel = TimingWheel(tick_seconds=1.0, slots=4, start=0.0)
+    wheel.schedule("far", 6.0)  # cùng slot với tick 2
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(6.0) == ["far"]
+
+
+def test_wheel_long_jump_and_cancel():
+    wheel = TimingWheel(tick_seconds=1.0, slots=4, start=0.0)
+    for n in range(1, 10):
+        wheel.schedule(n, float(n))
+    assert wheel.cancel(5)
+    assert not wheel.cancel(5)
+    assert sorted(wheel.advance(100.0)) == [1, 2, 3, 4, 6, 7, 8, 9]
+
+
+def test_wheel_never_schedules_into_a_past_tick():
+    wheel = TimingWheel(tick_seconds=1.0, slots=4, start=10.0)
+    wheel.schedule("late", 3.0)
+    assert wheel.advance(11.0) == ["late"]
+
+
+def test_lease_book_pops_only_expired_leases():
+    now = time.time()
+    book = LeaseBook()
+    book.add(Lease("short", "ORD-1", now + 5))
+    book.add(Lease("long", "ORD-2", now + 60))
+    book.add(Lease("settled", "ORD-3", now + 5))
+    book.pop("settled")
+    assert [lease.lease_id for lease in book.pop_expired(now + 10)] == ["short"]
+    assert [lease.lease_id for lease in book.all()] == ["long"]
+
+
+def test_expired_lease_returns_units_and_cannot_be_committed():
+    async def scenario():
+        store = InMemoryInventoryStore(ROWS)
+        await store.reserve_lease("L-1", [("SKU-1", 3)], ttl_seconds=30, order_id="ORD-1")
+        await store.reserve_lease("L-2", [("SKU-1", 2)], ttl_seconds=30, order_id="ORD-2")
+        assert (await store.get("SKU-1")).reserved == 5
+
+        expired = await store.expire_leases(now=time.time() + 60)
+        assert sorted(lease.lease_id for lease in expired) == ["L-1", "L-2"]
+        assert (await store.get("SKU-1")).reserved == 0
+        with pytest.raises(LeaseNotFoundError):
+            await store.commit_lease("L-1")
+
+    asyncio.run(scenario())
+
+
+def test_commit_of_lapsed_lease_before_sweep_releases_it():
+    async def scenario():
+        store = InMemoryInventoryStore(ROWS)
+        await store.reserve_lease("L-1", [("SKU-1", 4)], ttl_seconds=0.01, order_id="ORD-1")
+        await asyncio.sleep(0.05)
+        with pytest.raises(LeaseNotFoundError):
+            await store.commit_lease("L-1")
+        item = await store.get("SKU-1")
+        assert (item.quantity, item.reserved) == (10, 0)
+
+    asyncio.run(scenario())
+
+
+class YieldingStore(InMemoryInventoryStore):
+    """Memory store whose reserve yields to the event loop, like a remote inventory service call."""
+
+    async def reserve(self, product_id, quantity, order_id=None):
+        await asyncio.sleep(0)
+        return await super().reserve(product_id, quantity, order_id)
+
+
+def test_concurrent_grants_of_one_lease_reserve_once():
+    async def scenario():
+        store = YieldingStore(ROWS)
+        # Activity retry sau heartbeat timeout trong khi lần gọi đầu vẫn đang chạy
+        first, retry = await asyncio.gather(
+            store.reserve_lease("L-1", [("SKU-1", 3)], ttl_seconds=30, order_id="ORD-1"),
+            store.reserve_lease("L-1", [("SKU-1", 3)], ttl_seconds=30, order_id="ORD-1"),
+        )
+        assert first is retry
+        assert (await store.get("SKU-1")).reserved == 3
+        await store.release_lease("L-1")
+        assert (await store.get("SKU-1")).reserved == 0
+        assert store._lease_locks == {}
+
+    asyncio.run(scenario())
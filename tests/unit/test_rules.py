@@ -0,0 +1,85 @@
+"""Rule auto-approval (rules/engine.py) và đánh giá offline (rules/evaluate.py)."""
+from datetime import datetime, timedelta
+
+from rules.engine import Velocity, VelocityTracker, compile_rules, load_rules
+from rules.evaluate import evaluate_orders
+
+RULES = {
+    "version": "7",
+    "max_total_amount": 500,
+    "allowed_customers": ["VIP"],
+    "allow_list_max_total_amount": 2000,
+    "blocked_customers": ["FRAUD"],
+    "max_line_quantity": 10,
+    "product_categories": {"GIFT-1": "gift_cards"},
+    "blocked_categories": ["gift_cards"],
+    "velocity": {"window_minutes": 60, "max_orders": 3, "max_amount": 1000},
+}
+
+
+def _order(customer_id="C1", total=100.0, product_id="PROD-001", quantity=1):
+    return {"id": "O1", "customer_id": customer_id, "total_amount": total,
+            "items": [{"product_id": product_id, "quantity": quantity, "price": total / quantity}]}
+
+
+def test_low_risk_order_is_auto_approved():
+    decision = compile_rules(RULES).evaluate(_order(), Velocity())
+    assert decision.auto_approve
+    assert decision.rules_version == "7"
+
+
+def test_each_rule_can_send_an_order_to_manual_approval():
+    rules = compile_rules(RULES)
+    cases = {
+        "amount": (_order(total=900), Velocity()),
+        "blocked_customers": (_order(customer_id="FRAUD"), Velocity()),
+        "line_quantity": (_order(quantity=20, total=200), Velocity()),
+        "categories": (_order(product_id="GIFT-1"), Velocity()),
+        "velocity": (_order(), Velocity(order_count=3)),
+    }
+    for rule, (order, velocity) in cases.items():
+        decision = rules.evaluate(order, velocity)
+        assert not decision.auto_approve
+        assert decision.failed_rules == (rule,)
+
+
+def test_allow_list_raises_amount_limit_and_missing_velocity_fails():
+    rules = compile_rules(RULES)
+    assert rules.evaluate(_order(customer_id="VIP", total=900), Velocity()).auto_approve
+    assert rules.evaluate(_order(), None).failed_rules == ("velocity",)
+
+
+def test_disabled_rules_approve_nothing():
+    rules = compile_rules({**RULES, "enabled": False})
+    assert not rules.evaluate(_order(), Velocity()).auto_approve
+
+
+def test_bundled_rules_load():
+    rules = load_rules()
+    assert rules.checks and rules.needs_velocity
+
+
+def test_velocity_tracker_window_and_idempotent_retries():
+    tracker = VelocityTracker(timedelta(minutes=60))
+    start = datetime(2026, 1, 1, 10, 0)
+    assert tracker.record("C1", "O1", 100, start) == Velocity(0, 0.0)
+    assert tracker.record("C1", "O2", 50, start + timedelta(minutes=10)) == Velocity(1, 100.0)
+    # Activity retry của O2: cùng kết quả, không đếm hai lần
+    assert tracker.record("C1", "O2", 50, start + timedelta(minutes=11)) == Velocity(1, 100.0)
+    assert tracker.record("C1", "O3", 10, start + timedelta(minutes=65)) == Velocity(1, 50.0)
+    assert tracker.record("C2", "O4", 10, start) == Velocity(0, 0.0)
+
+
+def test_offline_evaluation_mixes_naive_and_aware_timestamps():
+    rules = compile_rules(RULES)
+    orders = [
+        {**_order(), "id": "O1", "created_at": "2026-01-01T10:00:00+00:00"},
+        {**_order(), "id": "O2", "created_at": "2026-01-01T10:05:00"},
+        {**_order(), "id": "O3", "created_at": "2026-01-01T12:10:00+02:00"},
+        {**_order(), "id": "O4", "created_at": "2026-01-01T10:15:00Z"},
+        {**_order(), "id": "O5"},
+    ]
+    report = evaluate_orders(rules, orders)
+    assert report["orders"] == 5
+    # O5 không có velocity; O4 là đơn thứ tư trong cửa sổ 60 phút (tối đa 3 đơn trước đó)
+    assert report["failed_rules"] == {"velocity": 2}
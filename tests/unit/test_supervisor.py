@@ -0,0 +1,31 @@
+"""Số process con mà supervisor.py dựng cho từng task queue."""
+from supervisor import INVENTORY_TASK_QUEUE, build_specs
+
+
+def _names(specs):
+    return [spec.name for spec in specs]
+
+
+def test_inventory_queue_runs_one_process_with_a_per_process_store(caplog):
+    specs = build_specs([INVENTORY_TASK_QUEUE, "payment-task-queue"], 3, {}, False, 1, "memory")
+
+    assert _names(specs).count(f"{INVENTORY_TASK_QUEUE}/all/0") == 1
+    assert sum(spec.task_queue == INVENTORY_TASK_QUEUE for spec in specs) == 1
+    assert sum(spec.task_queue == "payment-task-queue" for spec in specs) == 3
+    assert "INVENTORY_STORE=memory" in caplog.text
+
+
+def test_split_roles_caps_only_inventory_activity_processes():
+    specs = build_specs([INVENTORY_TASK_QUEUE], 4, {}, True, 2, "array")
+
+    assert _names(specs) == [
+        f"{INVENTORY_TASK_QUEUE}/workflow/0",
+        f"{INVENTORY_TASK_QUEUE}/workflow/1",
+        f"{INVENTORY_TASK_QUEUE}/activity/0",
+    ]
+
+
+def test_postgres_store_keeps_requested_inventory_processes():
+    specs = build_specs([INVENTORY_TASK_QUEUE], 2, {INVENTORY_TASK_QUEUE: 5}, False, 1, "postgres")
+
+    assert len(specs) == 5
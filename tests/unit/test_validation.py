@@ -0,0 +1,31 @@
+"""Kiểm tra dòng đơn hàng (rules/validation.py)."""
+import math
+
+from rules.validation import ValidationLimits, validate_lines
+
+
+def _lookup(prices):
+    return lambda product_id: prices.get(product_id)
+
+
+def test_validation_reports_every_line_error_at_once():
+    order = {
+        "total_amount": 999,
+        "items": [
+            {"product_id": "A", "quantity": 1, "price": 10.0},
+            {"product_id": "MISSING", "quantity": 1, "price": 5.0},
+            {"product_id": "A", "quantity": 0, "price": 10.0},
+            {"product_id": "B", "quantity": 1, "price": -1},
+            {"product_id": "A", "quantity": 1, "price": 12.0},
+        ],
+    }
+    errors = validate_lines(order, _lookup({"A": 10.0, "B": math.nan}), ValidationLimits())
+    assert [(e["line"], e["code"]) for e in errors] == [
+        (1, "UNKNOWN_PRODUCT"), (2, "INVALID_QUANTITY"), (3, "INVALID_PRICE"), (4, "PRICE_DRIFT"), (-1, "TOTAL_MISMATCH"),
+    ]
+
+
+def test_valid_order_and_empty_order():
+    order = {"total_amount": 20.0, "items": [{"product_id": "A", "quantity": 2, "price": 10.0}]}
+    assert validate_lines(order, _lookup({"A": 10.0}), ValidationLimits()) == []
+    assert validate_lines({"items": []}, _lookup({}), ValidationLimits())[0]["code"] == "EMPTY_ORDER"
@@ -0,0 +1,119 @@
+"""
+Collector OTLP/HTTP tối giản để chạy tracing ở local mà không cần OpenTelemetry Collector
+thật: nhận POST /v1/traces (protobuf, có thể gzip) và ghi mỗi span thành một dòng JSONL,
+cùng định dạng với exporter "file" (tracing/otel.py).
+
+Chạy:
+    python -m tracing.collector --port 4318 --output traces.jsonl
+    TRACING_EXPORTER=otlp OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318 python worker.py
+"""
+import argparse
+import gzip
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import orjson
+from google.protobuf.json_format import MessageToDict
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (
+    ExportTraceServiceRequest,
+    ExportTraceServiceResponse,
+)
+
+from tracing.otel import span_record
+
+TRACES_PATH = "/v1/traces"
+
+
+def _value(any_value):
+    kind = any_value.WhichOneof("value")
+    if kind in ("string_value", "bool_value", "int_value", "double_value"):
+        return getattr(any_value, kind)
+    # Mảng, kvlist, bytes: dạng JSON của protobuf
+    return MessageToDict(any_value) if kind else None
+
+
+def _attributes(key_values) -> dict:
+    return {kv.key: _value(kv.value) for kv in key_values}
+
+
+def request_records(request: ExportTraceServiceRequest):
+    """Span records of one OTLP export request."""
+    for resource_spans in request.resource_spans:
+        service = _attributes(resource_spans.resource.attributes).get("service.name")
+        for scope_spans in resource_spans.scope_spans:
+            for span in scope_spans.spans:
+                yield span_record(
+                    span.name,
+                    int.from_bytes(span.trace_id, "big"),
+                    int.from_bytes(span.span_id, "big"),
+                    int.from_bytes(span.parent_span_id, "big") if span.parent_span_id else None,
+                    service,
+                    span.start_time_unix_nano,
+                    span.end_time_unix_nano,
+                    _attributes(span.attributes),
+                    # Cùng tên với StatusCode của SDK (UNSET, OK, ERROR)
+                    ("UNSET", "OK", "ERROR")[span.status.code],
+                )
+
+
+class CollectorServer(ThreadingHTTPServer):
+    def __init__(self, address, output_path: str):
+        super().__init__(address, CollectorHandler)
+        self.lock = threading.Lock()
+        self.output = open(output_path, "ab", buffering=0)
+        self.spans = 0
+
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    server: CollectorServer
+
+    def do_POST(self):
+        if self.path != TRACES_PATH:
+            self.send_error(404)
+            return
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        request = ExportTraceServiceRequest()
+        request.ParseFromString(body)
+
+        lines = [orjson.dumps(record) + b"\n" for record in request_records(request)]
+        with self.server.lock:
+            self.server.output.write(b"".join(lines))
+            self.server.spans += len(lines)
+
+        response = ExportTraceServiceResponse().SerializeToString()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-protobuf")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OTLP/HTTP trace collector writing spans as JSONL")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", default="traces.jsonl")
+    args = parser.parse_args()
+
+    server = CollectorServer((args.host, args.port), args.output)
+    print(f"Collecting traces on http://{args.host}:{args.port}{TRACES_PATH} -> {args.output}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{server.spans} spans written")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+OpenTelemetry tracing cho API, Temporal client và worker.
+
+Một trace đi từ request HTTP (TracingMiddleware) qua lời gọi start_workflow/signal của
+API, các workflow task (RunWorkflow), tới từng lần chạy activity (RunActivity, mỗi lần
+retry là một span riêng) và child workflow. TracingInterceptor của temporalio truyền
+context qua header của workflow/activity, nên API và worker (kể cả các process con của
+supervisor.py) ghi chung một trace. Span của workflow không được ghi lại khi replay.
+
+Cấu hình qua biến môi trường:
+    TRACING_EXPORTER       off (mặc định) | file | otlp | console
+    TRACING_FILE           file JSONL cho exporter "file" (mặc định traces.jsonl), một span mỗi dòng
+    OTEL_EXPORTER_OTLP_ENDPOINT
+                           collector cho exporter "otlp" (OTLP/HTTP, mặc định http://localhost:4318);
+                           chạy thử với python -m tracing.collector
+    TRACING_SAMPLE_RATIO   tỷ lệ trace được lấy mẫu ở gốc (mặc định 1.0). Span con theo quyết định
+                           của span cha, nên một trace hoặc được ghi đầy đủ hoặc không ghi gì.
+    OTEL_SERVICE_NAME      ghi đè tên service (mặc định order-api / order-worker)
+"""
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import orjson
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from temporalio.contrib.opentelemetry import TracingInterceptor
+
+logger = logging.getLogger(__name__)
+
+EXPORTERS = ("off", "file", "otlp", "console")
+
+_enabled: Optional[bool] = None
+
+
+def span_record(name: str, trace_id: int, span_id: int, parent_span_id: Optional[int], service: Optional[str],
+                start_ns: int, end_ns: int, attributes: Dict, status: str) -> Dict:
+    """One span as written to the trace file (also used by tracing/collector.py)."""
+    return {
+        "trace_id": f"{trace_id:032x}",
+        "span_id": f"{span_id:016x}",
+        "parent_span_id": f"{parent_span_id:016x}" if parent_span_id else None,
+        "name": name,
+        "service": service,
+        "start_ns": start_ns,
+        "duration_ms": round((end_ns - start_ns) / 1e6, 3),
+        "status": status,
+        "attributes": attributes,
+    }
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans to a JSONL file, one span per line."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        # Không buffer: mỗi lô span là một lần write(), các process ghi chung file không xen nhau
+        self._file = open(path, "ab", buffering=0)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = bytearray()
+        for span in spans:
+            context = span.get_span_context()
+            lines += orjson.dumps(span_record(
+                span.name,
+                context.trace_id,
+                context.span_id,
+                span.parent.span_id if span.parent is not None else None,
+                span.resource.attributes.get("service.name"),
+                span.start_time,
+                span.end_time,
+                dict(span.attributes or {}),
+                span.status.status_code.name,
+            )) + b"\n"
+        with self._lock:
+            self._file.write(lines)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+def _create_exporter(name: str) -> SpanExporter:
+    if name == "file":
+        return FileSpanExporter(os.getenv("TRACING_FILE", "traces.jsonl"))
+    if name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    return ConsoleSpanExporter()
+
+
+def configure_tracing(service_name: str) -> bool:
+    """Installs the process-wide tracer provider selected by TRACING_EXPORTER; True when tracing is on."""
+    global _enabled
+    if _enabled is not None:
+        return _enabled
+    exporter_name = os.getenv("TRACING_EXPORTER", "off").lower()
+    if exporter_name not in EXPORTERS:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {exporter_name} (expected one of {', '.join(EXPORTERS)})")
+    _enabled = exporter_name != "off"
+    if not _enabled:
+        return False
+
+    ratio = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", service_name)}),
+        sampler=ParentBased(root=TraceIdRatioBased(ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(_create_exporter(exporter_name)))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled for {service_name}: exporter={exporter_name}, sample ratio={ratio}")
+    return True
+
+
+def tracing_interceptors() -> List[TracingInterceptor]:
+    """Temporal client interceptors for tracing (also applied to workers using the client)."""
+    return [TracingInterceptor()] if _enabled else []
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening a server span per HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+        self._tracer = trace.get_tracer(__name__)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Tiếp tục trace của bên gọi nếu request có header traceparent
+        carrier = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        method = scope["method"]
+        with self._tracer.start_as_current_span(
+            method, context=propagate.extract(carrier), kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as span:
+            status = 500
+
+            async def send_wrapper(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                # Tên span theo route template để các request cùng route gom được với nhau
+                route = scope.get("route")
+                if route is not None:
+                    span.update_name(f"{method} {route.path}")
+                    span.set_attribute("http.route", route.path)
+                span.set_attribute("http.response.status_code", status)
+                if status >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
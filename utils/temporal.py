@@ -1,9 +1,10 @@
 from temporalio.client import Client
+from models.converter import data_converter
 import asyncio
 
 async def get_temporal_client() -> Client:
     """
     Khởi tạo và trả về Temporal client
     """
-    client = await Client.connect("localhost:7233")
+    client = await Client.connect("localhost:7233", data_converter=data_converter)
     return client 
\ No newline at end of file
@@ -1,5 +1,8 @@
 import asyncio
 import os
+import signal
+from datetime import timedelta
+from typing import Iterable, Optional
 from dotenv import load_dotenv # Khôi phục import gốc
 # from python_dotenv import load_dotenv
 from temporalio.client import Client
@@ -8,14 +11,24 @@ import logging
 from temporalio import workflow
 
 # Import workflows
-from workflows.order_workflow import OrderApprovalWorkflow  
-from workflows.payment_workflow import PaymentWorkflow  
-from workflows.inventory_workflow import InventoryWorkflow
+from workflows.order_workflow import OrderApprovalWorkflow
+from workflows.payment_workflow import PaymentWorkflow
+from workflows.inventory_workflow import InventoryLeaseWorkflow, InventoryWorkflow
+from workflows.sku_reservation_workflow import SkuReservationWorkflow
+from workflows.sandbox import create_workflow_runner, sandbox_enabled
+from rules.engine import get_rules
+from storage.inventory_store import get_inventory_store
+from storage.leases import run_lease_sweeper
 
 # Import activities
 from activities.order_activities import all_activities as order_activities
 from activities.payment_activities import payment_activities
 from activities.inventory_activities import inventory_activities
+from activities.temporal_client import set_client
+from integrations.http import close_services
+from models.converter import data_converter
+from metrics.worker import get_runtime, record_slot_limits, run_breaker_metrics
+from tracing.otel import configure_tracing, tracing_interceptors
 
 # Configure logging
 logging.basicConfig(
@@ -24,65 +37,141 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def main():
+# Task queue name -> (workflows, activities) served on that queue
+TASK_QUEUES = {
+    "order-task-queue": ([OrderApprovalWorkflow], order_activities),
+    "payment-task-queue": ([PaymentWorkflow], payment_activities),
+    "inventory-task-queue": ([InventoryWorkflow, InventoryLeaseWorkflow, SkuReservationWorkflow], inventory_activities),
+}
+
+# "all": workflows + activities, "workflow": chỉ workflow tasks, "activity": chỉ activity tasks
+WORKER_ROLES = ("all", "workflow", "activity")
+
+
+async def connect_client() -> Client:
+    """Connects to Temporal using TEMPORAL_HOST / TEMPORAL_PORT from the environment."""
     load_dotenv() # Load .env file
     host = os.getenv("TEMPORAL_HOST", "localhost")
     port = os.getenv("TEMPORAL_PORT", "7233")
-    
+
     # Use default namespace for all workflows
     namespace = "default"
-    
-    order_task_queue = "order-task-queue"
-    payment_task_queue = "payment-task-queue"
-    inventory_task_queue = "inventory-task-queue"
 
-    logger.info(f"Connecting to Temporal at {host}:{port}...")
+    logger.info(f"Connecting to Temporal at {host}:{port}, namespace: {namespace}...")
+    # Converter encode/decode model pydantic trực tiếp (models/converter.py)
+    # Runtime riêng khi bật WORKER_METRICS_PORT (Prometheus exporter của core SDK, metrics/worker.py)
+    # Interceptor tracing của client cũng được worker dùng cho workflow và activity (tracing/otel.py)
+    configure_tracing("order-worker")
+    client = await Client.connect(
+        f"{host}:{port}", namespace=namespace, data_converter=data_converter, runtime=get_runtime(),
+        interceptors=tracing_interceptors(),
+    )
+    logger.info(f"Successfully connected to namespace: {namespace}")
+    return client
+
+
+def create_worker(client: Client, task_queue: str, role: str = "all") -> Worker:
+    """Creates a worker for one task queue, restricted to the given role."""
+    if task_queue not in TASK_QUEUES:
+        raise ValueError(f"Unknown task queue: {task_queue}")
+    if role not in WORKER_ROLES:
+        raise ValueError(f"Unknown worker role: {role}")
+
+    workflows, activities = TASK_QUEUES[task_queue]
+    graceful_shutdown = int(os.getenv("WORKER_GRACEFUL_SHUTDOWN_SECONDS", "30"))
+    max_concurrent_activities = int(os.getenv("WORKER_MAX_CONCURRENT_ACTIVITIES", "50"))
+    max_concurrent_workflow_tasks = int(os.getenv("WORKER_MAX_CONCURRENT_WORKFLOW_TASKS", "100"))
+    record_slot_limits(task_queue, role, max_concurrent_workflow_tasks, max_concurrent_activities)
+
+    logger.info(f"Creating {role} worker for task queue: {task_queue} (sandbox: {sandbox_enabled()})")
+    return Worker(
+        client,
+        task_queue=task_queue,
+        workflows=workflows if role != "activity" else [],
+        workflow_runner=create_workflow_runner(),
+        # Workflow-only workers keep the activities registered (for local activities)
+        # but never poll the task queue for remote activity tasks
+        activities=activities,
+        no_remote_activities=role == "workflow",
+        max_concurrent_activities=max_concurrent_activities,
+        max_concurrent_workflow_tasks=max_concurrent_workflow_tasks,
+        graceful_shutdown_timeout=timedelta(seconds=graceful_shutdown),
+    )
+
+
+async def run_workers(
+    task_queues: Optional[Iterable[str]] = None,
+    role: str = "all",
+    shutdown_event: Optional[asyncio.Event] = None,
+):
+    """
+    Runs workers for the given task queues until shutdown_event is set,
+    then drains them (in-flight activities get graceful_shutdown_timeout to finish).
+    """
+    task_queues = list(task_queues or TASK_QUEUES)
+    shutdown_event = shutdown_event or asyncio.Event()
+
+    # Load approval rules up front so no workflow task has to read the config file
+    rules = get_rules()
+    logger.info(f"Loaded approval rules version {rules.version} ({len(rules.checks)} checks)")
+
+    client = await connect_client()
+    # Activities gửi signal (vd. tới SkuReservationWorkflow) dùng chung kết nối này
+    set_client(client)
+    workers = [create_worker(client, task_queue, role) for task_queue in task_queues]
+
+    logger.info(f"Starting {len(workers)} {role} worker(s) for {', '.join(task_queues)}")
+    run_tasks = [asyncio.create_task(w.run()) for w in workers]
+    shutdown_task = asyncio.create_task(shutdown_event.wait())
+
+    # Process chạy activity kho hàng cũng trả lại các lease hết hạn
+    background_stop = asyncio.Event()
+    sweeper_task = None
+    if "inventory-task-queue" in task_queues and role != "workflow":
+        sweep_interval = float(os.getenv("INVENTORY_LEASE_SWEEP_SECONDS", "1"))
+        sweeper_task = asyncio.create_task(run_lease_sweeper(get_inventory_store(), sweep_interval, background_stop))
+
+    # Breaker nằm trong process chạy activity; metrics của chúng đi cùng exporter của worker
+    breaker_metrics_task = None
+    if role != "workflow":
+        breaker_interval = float(os.getenv("WORKER_BREAKER_METRICS_SECONDS", "5"))
+        breaker_metrics_task = asyncio.create_task(run_breaker_metrics(breaker_interval, background_stop))
+
+    try:
+        # Dừng khi nhận tín hiệu shutdown hoặc khi một worker bị lỗi
+        await asyncio.wait(run_tasks + [shutdown_task], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        shutdown_task.cancel()
+        logger.info("Draining workers...")
+        await asyncio.gather(*(w.shutdown() for w in workers), return_exceptions=True)
+        results = await asyncio.gather(*run_tasks, return_exceptions=True)
+        background_stop.set()
+        if sweeper_task is not None:
+            await sweeper_task
+        if breaker_metrics_task is not None:
+            await breaker_metrics_task
+        # Đóng pool kết nối (tồn kho, HTTP) sau khi các activity đang chạy đã xong
+        await get_inventory_store().close()
+        await close_services()
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Worker stopped with error: {result}")
+                raise result
+        logger.info("All workers drained")
+
+
+def install_shutdown_handlers(loop: asyncio.AbstractEventLoop, shutdown_event: asyncio.Event):
+    """Sets shutdown_event on SIGTERM/SIGINT so workers can drain instead of dying mid-activity."""
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, shutdown_event.set)
+
+
+async def main():
+    shutdown_event = asyncio.Event()
+    install_shutdown_handlers(asyncio.get_running_loop(), shutdown_event)
+    logger.info("Starting all workers... Press Ctrl+C to exit")
     try:
-        # Create client with default namespace
-        logger.info(f"Connecting to namespace: {namespace}")
-        client = await Client.connect(f"{host}:{port}", namespace=namespace)
-        logger.info(f"Successfully connected to namespace: {namespace}")
-
-        # Create workers for different task queues with their specific activities
-        logger.info(f"\nCreating order worker for task queue: {order_task_queue}")
-        order_worker = Worker(
-            client,
-            task_queue=order_task_queue,
-            workflows=[OrderApprovalWorkflow],
-            activities=order_activities,
-            max_concurrent_activities=50,
-        )
-        logger.info(f"Order worker created with {len(order_activities)} activities")
-
-        logger.info(f"\nCreating payment worker for task queue: {payment_task_queue}")
-        payment_worker = Worker(
-            client,
-            task_queue=payment_task_queue,
-            workflows=[PaymentWorkflow],
-            activities=payment_activities,
-            max_concurrent_activities=50
-        )
-        logger.info(f"Payment worker created with {len(payment_activities)} activities")
-
-        logger.info(f"\nCreating inventory worker for task queue: {inventory_task_queue}")
-        inventory_worker = Worker(
-            client,
-            task_queue=inventory_task_queue,
-            workflows=[InventoryWorkflow],
-            activities=inventory_activities,
-            max_concurrent_activities=50,
-        )
-        logger.info(f"Inventory worker created with {len(inventory_activities)} activities")
-
-        logger.info("\nStarting all workers... Press Ctrl+C to exit")
-        try:
-            await asyncio.gather(
-                order_worker.run(),
-                payment_worker.run(),
-                inventory_worker.run()
-            )
-        except KeyboardInterrupt:
-            logger.info("Received shutdown signal")
+        await run_workers(shutdown_event=shutdown_event)
     except Exception as e:
         logger.error(f"Error in worker: {e}")
         raise
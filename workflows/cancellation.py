@@ -0,0 +1,40 @@
+"""
+Cancellation scope cho workflow: nhóm các activity/child workflow đang chạy để
+một tín hiệu cancel có thể hủy tất cả ngay lập tức, thay vì chỉ đặt cờ và chờ
+tới bước tiếp theo.
+
+Activity nhận yêu cầu cancel qua heartbeat, vì vậy các activity được chạy trong
+scope cần heartbeat_timeout (xem ACTIVITY_HEARTBEAT_TIMEOUT).
+"""
+import asyncio
+from datetime import timedelta
+from typing import Any, List
+
+# Worker chết hoặc activity bị cancel được phát hiện trong khoảng thời gian này
+ACTIVITY_HEARTBEAT_TIMEOUT = timedelta(seconds=5)
+
+
+class CancellationScope:
+    __slots__ = ("_tasks", "cancel_requested")
+
+    def __init__(self):
+        # list (không phải set) để thứ tự cancel luôn deterministic khi replay
+        self._tasks: List[asyncio.Task] = []
+        self.cancel_requested = False
+
+    async def run(self, task: Any) -> Any:
+        """Awaits an activity/child handle, cancelling it if the scope is cancelled."""
+        if self.cancel_requested:
+            task.cancel()
+        self._tasks.append(task)
+        try:
+            return await task
+        finally:
+            self._tasks.remove(task)
+
+    def cancel(self):
+        """Requests cancellation of every task currently running in the scope."""
+        self.cancel_requested = True
+        for task in list(self._tasks):
+            if not task.done():
+                task.cancel()
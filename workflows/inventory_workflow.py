@@ -1,20 +1,33 @@
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from temporalio.workflow import ActivityCancellationType
 from temporalio.exceptions import ActivityError, ApplicationError, CancelledError, TimeoutError
 from datetime import timedelta
-import sys
-import os
 import asyncio
 from typing import List, Dict
 
-# Adjust the import path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-
-from models.inventory import InventoryUpdate, InventoryStatus
-
-# Define activities stub
+# Define activities stub. Models are passed through as well so the sandbox does
+# not re-import them (and rebuild the pydantic schemas) for every workflow run.
 with workflow.unsafe.imports_passed_through():
-    from activities.inventory_activities import check_inventory, reserve_inventory, update_inventory, unreserve_inventory
+    from models.inventory import InventoryStatus, inventory_update_list
+    from activities.inventory_activities import (
+        check_inventory,
+        check_inventory_batch,
+        reserve_inventory,
+        update_inventory,
+        unreserve_inventory,
+        reserve_inventory_lease,
+        commit_inventory_lease,
+        release_inventory_lease,
+        request_sku_reservation,
+    )
+    from workflows.cancellation import ACTIVITY_HEARTBEAT_TIMEOUT, CancellationScope
+    from workflows.timings import StageTimings
+
+# Hàng đã đặt trước được giữ tối đa bao lâu trước khi store tự trả về kho
+RESERVATION_LEASE_TTL = timedelta(hours=1)
+# Thời gian tối đa chờ SkuReservationWorkflow trả lời một yêu cầu đặt trước
+SKU_RESERVATION_TIMEOUT = timedelta(minutes=1)
 
 @workflow.defn(name="InventoryWorkflow")
 class InventoryWorkflow:
@@ -24,6 +37,12 @@ class InventoryWorkflow:
         self._reservation_results = {}
         self._is_committed = False
         self._current_status = "PENDING"
+        # Kết quả từ SkuReservationWorkflow, theo lease_id
+        self._sku_decisions = {}
+        # Check/reserve activities đang chạy; tín hiệu cancel hủy chúng ngay
+        self._scope = CancellationScope()
+        # Thời gian từng giai đoạn (query get_timings, ghi ra metrics khi kết thúc)
+        self._timings = StageTimings()
         
         # Define RetryPolicy
         self._inventory_retry_policy = RetryPolicy(
@@ -66,64 +85,76 @@ class InventoryWorkflow:
         
         workflow.logger.info(f"Starting InventoryWorkflow logic for order: {order_id}")
         
-        # Chuyển đổi từ dict sang InventoryUpdate để thêm order_id
-        self._inventory_updates = []
-        for update in inventory_updates:
-            # Tạo một bản sao của update để không ảnh hưởng đến dữ liệu gốc
-            update_copy = update.copy()
-            # Chỉ thêm order_id nếu nó chưa tồn tại
-            if 'order_id' not in update_copy:
-                update_copy['order_id'] = order_id
-            self._inventory_updates.append(InventoryUpdate(**update_copy).to_dict())
+        # Validate mọi dòng trong một lần gọi (cùng dạng InventoryUpdate.to_dict()),
+        # thêm order_id nếu dòng chưa có
+        self._inventory_updates = inventory_update_list.validate_python(
+            [{"order_id": order_id, **update} for update in inventory_updates]
+        )
         
         try:
             # Kiểm tra xem đây là yêu cầu kiểm tra đơn thuần hay cập nhật tồn kho
             is_check_only = order_id.startswith("inventory_check_")
             
             # 1. Kiểm tra tồn kho cho tất cả sản phẩm
+            self._timings.start("check")
             check_results = {}
-            for update in self._inventory_updates:
-                product_id = update["product_id"]
-                quantity = abs(update["quantity_change"])  # Đảm bảo lấy giá trị dương
+            if workflow.patched("batch-inventory-check"):
+                # Một activity kiểm tra cả đơn thay vì một activity cho mỗi dòng
+                failure = await self._check_inventory_batch(order_id, check_results)
+                if failure is not None:
+                    return failure
+            else:
+                for update in self._inventory_updates:
+                    product_id = update["product_id"]
+                    quantity = abs(update["quantity_change"])  # Đảm bảo lấy giá trị dương
                 
-                try:
-                    result = await workflow.start_activity(
-                        check_inventory,
-                        args=[product_id, quantity],  # Pass arguments as a list
-                        retry_policy=self._inventory_retry_policy,
-                        start_to_close_timeout=timedelta(seconds=10),
-                    )
-                    check_results[product_id] = result
+                    try:
+                        result = await self._scope.run(workflow.start_activity(
+                            check_inventory,
+                            args=[product_id, quantity],  # Pass arguments as a list
+                            retry_policy=self._inventory_retry_policy,
+                            start_to_close_timeout=timedelta(seconds=10),
+                            heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                        ))
+                        check_results[product_id] = result
                     
-                    if not result["is_available"]:
+                        if not result["is_available"]:
+                            self._current_status = "FAILED"
+                            workflow.logger.warning(f"Insufficient inventory for product {product_id} in order {order_id}")
+                            return {
+                                "order_id": order_id,
+                                "status": "FAILED",
+                                "reason": f"Insufficient inventory for product {product_id}",
+                                "details": check_results
+                            }
+                
+                    except ApplicationError as e:
                         self._current_status = "FAILED"
-                        workflow.logger.warning(f"Insufficient inventory for product {product_id} in order {order_id}")
+                        workflow.logger.error(f"Inventory check failed for product {product_id} in order {order_id}: {e}")
                         return {
                             "order_id": order_id,
                             "status": "FAILED",
-                            "reason": f"Insufficient inventory for product {product_id}",
+                            "reason": str(e),
                             "details": check_results
                         }
                 
-                except ApplicationError as e:
-                    self._current_status = "FAILED"
-                    workflow.logger.error(f"Inventory check failed for product {product_id} in order {order_id}: {e}")
-                    return {
-                        "order_id": order_id,
-                        "status": "FAILED",
-                        "reason": str(e),
-                        "details": check_results
-                    }
-                
-                except ActivityError as e:
-                    self._current_status = "FAILED"
-                    workflow.logger.error(f"Inventory check failed after retries for product {product_id} in order {order_id}: {e}")
-                    return {
-                        "order_id": order_id,
-                        "status": "FAILED",
-                        "reason": "Service unavailable",
-                        "details": check_results
-                    }
+                    except ActivityError as e:
+                        if self._is_cancelled:
+                            self._current_status = "CANCELLED"
+                            workflow.logger.info(f"Inventory check interrupted by cancellation for order {order_id}")
+                            return {
+                                "order_id": order_id,
+                                "status": "CANCELLED",
+                                "details": check_results
+                            }
+                        self._current_status = "FAILED"
+                        workflow.logger.error(f"Inventory check failed after retries for product {product_id} in order {order_id}: {e}")
+                        return {
+                            "order_id": order_id,
+                            "status": "FAILED",
+                            "reason": "Service unavailable",
+                            "details": check_results
+                        }
             
             # Nếu chỉ là kiểm tra tồn kho, trả về kết quả ngay
             if is_check_only:
@@ -134,27 +165,44 @@ class InventoryWorkflow:
                     "details": check_results
                 }
             
-            # 2. Đặt trước tồn kho cho tất cả sản phẩm (Saga pattern)
+            # 2. Đặt trước cả đơn dưới một lease của store. Store tự trả hàng khi lease
+            # hết hạn nên workflow kết thúc ngay, không giữ timer 1 giờ chờ commit/cancel
+            self._timings.start("reservation")
+            if workflow.patched("inventory-leases"):
+                return await self._reserve_lease(order_id, params, check_results)
+
+            # Đặt trước tồn kho cho từng sản phẩm (Saga pattern, các lần chạy cũ)
             reserved_products = []
             try:
                 for update in self._inventory_updates:
                     product_id = update["product_id"]
                     
                     try:
-                        reserve_result = await workflow.start_activity(
+                        # Chờ activity xác nhận đã hủy, để biết chắc sản phẩm này chưa bị giữ
+                        reserve_result = await self._scope.run(workflow.start_activity(
                             reserve_inventory,
                             args=[update],  # Pass arguments as a list
                             retry_policy=self._inventory_retry_policy,
                             start_to_close_timeout=timedelta(seconds=15),
-                        )
+                            heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                            cancellation_type=ActivityCancellationType.WAIT_CANCELLATION_COMPLETED,
+                        ))
                         self._reservation_results[product_id] = reserve_result
                         reserved_products.append(product_id)
                         
                     except Exception as e:
                         # Nếu có lỗi trong quá trình đặt trước, rollback các sản phẩm đã đặt trước
+                        await self._rollback_reservations(reserved_products, order_id)
+                        if self._is_cancelled:
+                            self._current_status = "CANCELLED"
+                            workflow.logger.info(f"Inventory reservation interrupted by cancellation for order {order_id}")
+                            return {
+                                "order_id": order_id,
+                                "status": "CANCELLED",
+                                "details": self._reservation_results
+                            }
                         self._current_status = "FAILED"
                         workflow.logger.error(f"Failed to reserve inventory for product {product_id} in order {order_id}: {e}")
-                        await self._rollback_reservations(reserved_products, order_id)
                         return {
                             "order_id": order_id,
                             "status": "FAILED",
@@ -163,6 +211,7 @@ class InventoryWorkflow:
                         }
                 
                 # 3. Đợi tín hiệu commit hoặc rollback (hoặc hủy)
+                self._timings.start("commit_wait")
                 try:
                     # Thiết lập timeout để không đợi mãi mãi
                     reservation_timeout = timedelta(hours=1)
@@ -183,6 +232,7 @@ class InventoryWorkflow:
                 # 4. Thực hiện commit hoặc rollback
                 if self._is_committed:
                     # Commit: Cập nhật kho (giảm số lượng thực tế)
+                    self._timings.start("commit")
                     update_results = {}
                     for update in self._inventory_updates:
                         product_id = update["product_id"]
@@ -229,6 +279,10 @@ class InventoryWorkflow:
             self._current_status = "FAILED"
             workflow.logger.exception(f"Unhandled error in inventory workflow for order {order_id}: {e}")
             raise
+
+        finally:
+            self._timings.finish()
+            self._timings.emit(self._current_status)
         
         workflow.logger.info(f"Inventory workflow completed for order {order_id}")
         return {
@@ -237,8 +291,187 @@ class InventoryWorkflow:
             "details": self._reservation_results
         }
 
+    async def _check_inventory_batch(self, order_id: str, check_results: Dict) -> Dict | None:
+        """Kiểm tra tồn kho cả đơn trong một activity; trả về kết quả thất bại, hoặc None nếu đủ hàng"""
+        lines = [
+            {"product_id": update["product_id"], "quantity": abs(update["quantity_change"])}
+            for update in self._inventory_updates
+        ]
+        try:
+            result = await self._scope.run(workflow.start_activity(
+                check_inventory_batch,
+                lines,
+                retry_policy=self._inventory_retry_policy,
+                start_to_close_timeout=timedelta(seconds=10),
+                heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+            ))
+        except ActivityError as e:
+            if self._is_cancelled:
+                self._current_status = "CANCELLED"
+                workflow.logger.info(f"Inventory check interrupted by cancellation for order {order_id}")
+                return {"order_id": order_id, "status": "CANCELLED", "details": check_results}
+            self._current_status = "FAILED"
+            workflow.logger.error(f"Inventory check failed for order {order_id}: {e}")
+            # Lỗi nghiệp vụ (vd. sản phẩm không tồn tại) giữ nguyên thông báo, còn lại là service lỗi
+            reason = str(e.cause) if isinstance(e.cause, ApplicationError) else "Service unavailable"
+            return {"order_id": order_id, "status": "FAILED", "reason": reason, "details": check_results}
+
+        check_results.update(result["details"])
+        if result["is_available"]:
+            return None
+
+        product_id = next(pid for pid, detail in result["details"].items() if not detail["is_available"])
+        self._current_status = "FAILED"
+        workflow.logger.warning(f"Insufficient inventory for product {product_id} in order {order_id}")
+        return {
+            "order_id": order_id,
+            "status": "FAILED",
+            "reason": f"Insufficient inventory for product {product_id}",
+            "details": check_results
+        }
+
+    async def _reserve_lease(self, order_id: str, params: Dict, check_results: Dict) -> Dict:
+        """Đặt trước cả đơn trong một lease; trả về RESERVED kèm lease_id để bên gọi commit/release"""
+        lease_id = f"{order_id}-{workflow.info().run_id}"
+        ttl_seconds = params.get("lease_ttl_seconds", RESERVATION_LEASE_TTL.total_seconds())
+        lines = [
+            {"product_id": update["product_id"], "quantity": abs(update["quantity_change"])}
+            for update in self._inventory_updates
+        ]
+        # Đơn một dòng cho sản phẩm bán chạy đi qua actor của SKU thay vì tranh khóa trong store
+        is_hot = len(lines) == 1 and check_results.get(lines[0]["product_id"], {}).get("hot", False)
+        if is_hot and workflow.patched("sku-actor-reservations"):
+            return await self._reserve_via_sku_actor(order_id, lease_id, lines[0], ttl_seconds)
+
+        try:
+            # Chờ activity xác nhận đã hủy, để biết chắc lease có được cấp hay không
+            result = await self._scope.run(workflow.start_activity(
+                reserve_inventory_lease,
+                {"lease_id": lease_id, "order_id": order_id, "lines": lines, "ttl_seconds": ttl_seconds},
+                retry_policy=self._inventory_retry_policy,
+                start_to_close_timeout=timedelta(seconds=15),
+                heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                cancellation_type=ActivityCancellationType.WAIT_CANCELLATION_COMPLETED,
+            ))
+        except ActivityError as e:
+            if self._is_cancelled:
+                await self._release_lease(lease_id, order_id)
+                self._current_status = "CANCELLED"
+                workflow.logger.info(f"Inventory reservation interrupted by cancellation for order {order_id}")
+                return {"order_id": order_id, "status": "CANCELLED", "details": self._reservation_results}
+            self._current_status = "FAILED"
+            workflow.logger.error(f"Failed to reserve inventory lease for order {order_id}: {e}")
+            reason = str(e.cause) if isinstance(e.cause, ApplicationError) else "Service unavailable"
+            return {"order_id": order_id, "status": "FAILED", "reason": reason, "details": self._reservation_results}
+
+        return await self._lease_reserved(order_id, lease_id, result)
+
+    async def _reserve_via_sku_actor(self, order_id: str, lease_id: str, line: Dict, ttl_seconds: float) -> Dict:
+        """Gửi yêu cầu tới SkuReservationWorkflow của sản phẩm rồi chờ kết quả qua signal"""
+        request = {
+            **line,
+            "lease_id": lease_id,
+            "order_id": order_id,
+            "ttl_seconds": ttl_seconds,
+            "reply_to": {"workflow_id": workflow.info().workflow_id, "run_id": workflow.info().run_id},
+        }
+        try:
+            await self._scope.run(workflow.start_activity(
+                request_sku_reservation,
+                request,
+                retry_policy=self._inventory_retry_policy,
+                start_to_close_timeout=timedelta(seconds=10),
+            ))
+            await workflow.wait_condition(
+                lambda: lease_id in self._sku_decisions or self._is_cancelled,
+                timeout=SKU_RESERVATION_TIMEOUT,
+            )
+        except ActivityError as e:
+            if not self._is_cancelled:
+                self._current_status = "FAILED"
+                workflow.logger.error(f"Failed to queue reservation for order {order_id}: {e}")
+                return {"order_id": order_id, "status": "FAILED", "reason": "Service unavailable", "details": {}}
+        except asyncio.TimeoutError:
+            # Actor có thể vẫn cấp lease sau đó: trả lại để không giữ hàng tới khi hết hạn
+            await self._release_lease(lease_id, order_id)
+            self._current_status = "FAILED"
+            workflow.logger.error(f"Timed out waiting for reservation decision for order {order_id}")
+            return {"order_id": order_id, "status": "FAILED", "reason": "Reservation timed out", "details": {}}
+
+        if self._is_cancelled:
+            await self._release_lease(lease_id, order_id)
+            self._current_status = "CANCELLED"
+            workflow.logger.info(f"Inventory reservation interrupted by cancellation for order {order_id}")
+            return {"order_id": order_id, "status": "CANCELLED", "details": self._reservation_results}
+
+        decision = self._sku_decisions[lease_id]
+        if decision["status"] != "RESERVED":
+            self._current_status = "FAILED"
+            workflow.logger.warning(f"Reservation refused for order {order_id}: {decision.get('reason')}")
+            return {"order_id": order_id, "status": "FAILED", "reason": decision.get("reason"), "details": decision}
+        return await self._lease_reserved(order_id, lease_id, decision)
+
+    async def _lease_reserved(self, order_id: str, lease_id: str, result: Dict) -> Dict:
+        """Lease đã được cấp: trả về RESERVED, hoặc trả lại lease nếu đơn vừa bị hủy"""
+        self._reservation_results = result
+        if self._is_cancelled:
+            # Tín hiệu cancel đến đúng lúc lease vừa được cấp
+            await self._release_lease(lease_id, order_id)
+            self._current_status = "CANCELLED"
+            return {"order_id": order_id, "status": "CANCELLED", "details": result}
+
+        self._current_status = "RESERVED"
+        workflow.logger.info(f"Inventory reserved for order {order_id} under lease {lease_id} until {result['expires_at']}")
+        return {
+            "order_id": order_id,
+            "status": "RESERVED",
+            "lease_id": lease_id,
+            "expires_at": result["expires_at"],
+            "details": result
+        }
+
+    async def _release_lease(self, lease_id: str, order_id: str):
+        """Trả lease về kho; lỗi chỉ được log vì lease hết hạn cũng tự được trả"""
+        try:
+            await workflow.start_activity(
+                release_inventory_lease,
+                lease_id,
+                start_to_close_timeout=timedelta(seconds=10),
+            )
+        except ActivityError as e:
+            workflow.logger.error(f"Failed to release inventory lease {lease_id} for order {order_id}: {e}")
+
     async def _rollback_reservations(self, product_ids: List[str], order_id: str):
-        """Hủy tất cả đặt trước đã thực hiện"""
+        """Hủy tất cả đặt trước đã thực hiện (song song cho các sản phẩm)"""
+        self._timings.start("rollback")
+        # History ghi trước khi rollback chạy song song có các activity unreserve nối tiếp nhau
+        if not workflow.patched("parallel-rollback"):
+            return await self._rollback_reservations_sequentially(product_ids, order_id)
+        updates = [
+            update for update in self._inventory_updates
+            if update["product_id"] in product_ids
+        ]
+        results = await asyncio.gather(*(
+            workflow.start_activity(
+                unreserve_inventory,
+                args=[update],  # Pass arguments as a list
+                start_to_close_timeout=timedelta(seconds=10),
+            )
+            for update in updates
+        ), return_exceptions=True)
+
+        rollback_results = {}
+        for update, result in zip(updates, results):
+            product_id = update["product_id"]
+            if isinstance(result, BaseException):
+                workflow.logger.error(f"Failed to unreserve product {product_id} for order {order_id}: {result}")
+            else:
+                rollback_results[product_id] = result
+
+        return rollback_results
+
+    async def _rollback_reservations_sequentially(self, product_ids: List[str], order_id: str):
+        """Hủy từng đặt trước lần lượt (đường cũ, chỉ cho các history ghi trước parallel-rollback)"""
         rollback_results = {}
         for product_id in product_ids:
             # Tìm update tương ứng
@@ -253,7 +486,7 @@ class InventoryWorkflow:
                     rollback_results[product_id] = result
                 except Exception as e:
                     workflow.logger.error(f"Failed to unreserve product {product_id} for order {order_id}: {e}")
-        
+
         return rollback_results
 
     @workflow.signal
@@ -267,13 +500,53 @@ class InventoryWorkflow:
         """Tín hiệu hủy đặt trước, rollback"""
         workflow.logger.info("Received cancel signal")
         self._is_cancelled = True
+        # Không chờ check/reserve đang chạy xong mới rollback
+        self._scope.cancel()
+
+    @workflow.signal
+    async def sku_reservation_decided(self, decision: Dict):
+        """Kết quả đặt trước từ SkuReservationWorkflow"""
+        self._sku_decisions[decision["lease_id"]] = decision
 
     @workflow.query
     def get_status(self) -> str:
         """Trả về trạng thái hiện tại của workflow"""
         return self._current_status
 
+    @workflow.query
+    def get_timings(self) -> dict:
+        """Trả về thời gian bắt đầu/kết thúc của từng giai đoạn đã qua"""
+        return self._timings.to_dict()
+
     @workflow.query
     def get_reservation_details(self) -> dict:
         """Trả về chi tiết đặt trước kho hàng"""
-        return self._reservation_results 
\ No newline at end of file
+        return self._reservation_results 
+
+@workflow.defn(name="InventoryLeaseWorkflow")
+class InventoryLeaseWorkflow:
+    """Commit hoặc trả một lease tồn kho đã cấp bởi InventoryWorkflow"""
+
+    @workflow.run
+    async def run(self, params: Dict) -> Dict:
+        lease_id = params["lease_id"]
+        action = params.get("action")
+        if action == "commit":
+            activity_fn = commit_inventory_lease
+        elif action == "release":
+            activity_fn = release_inventory_lease
+        else:
+            raise ApplicationError(f"Unknown lease action '{action}'", non_retryable=True)
+
+        try:
+            return await workflow.execute_activity(
+                activity_fn,
+                lease_id,
+                start_to_close_timeout=timedelta(seconds=15),
+                heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                retry_policy=RetryPolicy(maximum_attempts=5, maximum_interval=timedelta(seconds=10)),
+            )
+        except ActivityError as e:
+            workflow.logger.error(f"Inventory lease {lease_id} {action} failed: {e}")
+            reason = str(e.cause) if isinstance(e.cause, ApplicationError) else "Service unavailable"
+            return {"lease_id": lease_id, "status": "FAILED", "reason": reason}
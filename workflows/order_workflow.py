@@ -1,15 +1,12 @@
 from temporalio import workflow
 from temporalio.common import RetryPolicy
-from temporalio.exceptions import ActivityError, ApplicationError, CancelledError # Import exceptions
+from temporalio.exceptions import ActivityError, ApplicationError, CancelledError, ChildWorkflowError # Import exceptions
 from datetime import timedelta
-import sys
-import os
 import asyncio
 
-# Adjust the import path based on your project structure
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+PAYMENT_TASK_QUEUE = "payment-task-queue"
+INVENTORY_TASK_QUEUE = "inventory-task-queue"
 
-from models.order import Order, OrderStatus # Import necessary models
 # Placeholder for activities import
 # from activities.order_activities import OrderActivities
 
@@ -17,32 +14,70 @@ from models.order import Order, OrderStatus # Import necessary models
 # This requires OrderActivities to be defined with @activity.defn
 # Replace "OrderActivities" with the actual class name if different
 with workflow.unsafe.imports_passed_through():
+    # Models are passed through so the sandbox does not re-import them
+    # (and rebuild the pydantic schemas) for every workflow run
+    from models.order import OrderStatus
+    from models.order_state import OrderState
+    from workflows.cancellation import ACTIVITY_HEARTBEAT_TIMEOUT, CancellationScope
+    from workflows.timings import StageTimings
+    from rules.engine import Decision, Velocity, get_rules
     # Import the activity functions we defined (currently mocks in worker.py)
     # In a real scenario, you'd import the interface or a generated stub
     from activities.order_activities import (
         validate_order,
+        evaluate_approval_rules,
+        record_customer_order,
         notify_manager,
         process_approved_order,
         notify_rejection,
         handle_cancellation,
-        cleanup_order
+        cleanup_order,
+        VALIDATION_ERROR_TYPE,
     )
 
+
+# Dùng chung cho mọi workflow run thay vì tạo lại trong mỗi instance
+VALIDATION_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=2),
+    backoff_coefficient=2.0,
+    maximum_interval=timedelta(seconds=30),
+    maximum_attempts=3,
+    # Do not retry ApplicationError (e.g., invalid data)
+    non_retryable_error_types=["ApplicationError"],
+)
+# Compensation phải chạy tới cùng, retry nhiều hơn
+COMPENSATION_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=1),
+    backoff_coefficient=2.0,
+    maximum_interval=timedelta(seconds=30),
+    maximum_attempts=10,
+)
+
+
+def _lease_id(inventory_result: dict | None) -> str | None:
+    """Lease id from an InventoryWorkflow result, when the reservation is being held."""
+    if inventory_result and inventory_result.get("status") == "RESERVED":
+        return inventory_result.get("lease_id")
+    return None
+
+
 @workflow.defn(name="OrderApprovalWorkflow") # Changed name for clarity
 class OrderApprovalWorkflow:
+    # Hàng nghìn instance nằm trong sticky cache khi chờ duyệt: không cần __dict__ cho mỗi instance
+    __slots__ = ("_order_state", "_is_cancelled", "_approval_decision", "_auto_approval_reasons",
+                 "_validation_errors", "_scope", "_timings")
+
     def __init__(self):
-        self._order_state: Order | None = None
+        # Trạng thái gọn (models/order_state.py) thay vì Order pydantic với một OrderItem mỗi dòng
+        self._order_state: OrderState | None = None
         self._is_cancelled: bool = False
         self._approval_decision: str | None = None # To store approval signal result
-        # Define RetryPolicy specifically for validation
-        self._validation_retry_policy = RetryPolicy(
-            initial_interval=timedelta(seconds=2),
-            backoff_coefficient=2.0,
-            maximum_interval=timedelta(seconds=30),
-            maximum_attempts=3,
-            # Do not retry ApplicationError (e.g., invalid data)
-            non_retryable_error_types=["ApplicationError"],
-        )
+        self._auto_approval_reasons: list = [] # Why the rules sent the order to manual approval
+        self._validation_errors: list = [] # Per-line errors from validate_order
+        # In-flight activities that cancel_order interrupts immediately
+        self._scope = CancellationScope()
+        # Thời gian từng giai đoạn (query get_timings, ghi ra metrics khi kết thúc)
+        self._timings = StageTimings()
         # Define activity options (timeouts are now set per-activity call)
         # self._activity_options = {
         #     "start_to_close_timeout": timedelta(seconds=60),
@@ -53,20 +88,22 @@ class OrderApprovalWorkflow:
 
     @workflow.run
     async def run(self, order_input: dict):
-        self._order_state = Order(**order_input)
+        self._order_state = OrderState.from_input(order_input)
         workflow.logger.info(f"Starting OrderApprovalWorkflow for order: {self._order_state.id}")
         self._order_state.status = OrderStatus.CREATED
 
         try:
             # 1. Validate Order (Activity with Retry)
             self._update_status(OrderStatus.VALIDATION_PENDING)
+            self._timings.start("validation")
             try:
-                await workflow.start_activity(
+                await self._scope.run(workflow.start_activity(
                     validate_order,
-                    self._order_state.model_dump(),
-                    retry_policy=self._validation_retry_policy,
+                    self._order_state.to_dict(),
+                    retry_policy=VALIDATION_RETRY_POLICY,
                     start_to_close_timeout=timedelta(minutes=1),
-                )
+                    heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                ))
                 # Validation successful
                 workflow.logger.info(f"Order {self._order_state.id} passed validation.")
 
@@ -74,14 +111,25 @@ class OrderApprovalWorkflow:
                 # Non-retryable validation failure (e.g., bad data)
                 workflow.logger.error(f"Order {self._order_state.id} validation failed permanently: {e}")
                 self._update_status(OrderStatus.VALIDATION_FAILED)
-                return self._order_state.model_dump()
+                return self._order_state.to_dict()
 
             except ActivityError as e:
+                if self._is_cancelled:
+                    # cancel_order interrupted the running validation
+                    workflow.logger.info(f"Validation interrupted by cancellation for order {self._order_state.id}.")
+                    await self._handle_cancellation_logic()
+                    return self._order_state.to_dict()
+                if isinstance(e.cause, ApplicationError) and e.cause.type == VALIDATION_ERROR_TYPE:
+                    # Dữ liệu đơn hàng sai (mọi lỗi theo dòng nằm trong details)
+                    workflow.logger.error(f"Order {self._order_state.id} validation failed permanently: {e.cause}")
+                    self._validation_errors = list(e.cause.details[0]) if e.cause.details else []
+                    self._update_status(OrderStatus.VALIDATION_FAILED)
+                    return self._order_state.to_dict()
                 # Failure after all retries for retryable errors
                 workflow.logger.error(f"Order {self._order_state.id} validation failed after retries: {e}")
                 self._update_status(OrderStatus.AUTO_REJECTED)
                  # Optionally run cleanup/notification for auto-rejection
-                return self._order_state.model_dump()
+                return self._order_state.to_dict()
 
             except CancelledError:
                  workflow.logger.info(f"Workflow cancelled during order validation for {self._order_state.id}.")
@@ -93,43 +141,66 @@ class OrderApprovalWorkflow:
             if self._is_cancelled:
                 workflow.logger.info(f"Handling cancellation after validation for {self._order_state.id}.")
                 await self._handle_cancellation_logic()
-                return self._order_state.model_dump()
+                return self._order_state.to_dict()
 
-            # 2. Pending Approval & Wait for Signal
-            self._update_status(OrderStatus.PENDING_APPROVAL)
-            await workflow.start_activity(
-                notify_manager,
-                self._order_state.id,
-                start_to_close_timeout=timedelta(seconds=30),
-             )
-
-            workflow.logger.info(f"Order {self._order_state.id} waiting for approval signal.")
-            try:
-                # Wait indefinitely (or add a timeout) for the decision signal
-                await workflow.wait_condition(lambda: self._approval_decision is not None)
-            except CancelledError:
-                workflow.logger.info(f"Workflow cancelled while waiting for approval for {self._order_state.id}.")
-                self._update_status(OrderStatus.CANCELLED)
+            # 2. Auto-approval fast path cho đơn hàng rủi ro thấp.
+            # patched() giữ cho các history ghi trước khi có rule engine vẫn replay đúng.
+            auto_approved = workflow.patched("auto-approval-rules") and await self._try_auto_approve()
+            # cancel_order trong lúc đánh giá rule: không chuyển sang PENDING_APPROVAL.
+            # History cũ (trước approval-rules-activity) vẫn đi tiếp như khi được ghi.
+            if self._is_cancelled and workflow.patched("approval-rules-activity"):
+                workflow.logger.info(f"Handling cancellation after auto-approval for {self._order_state.id}.")
                 await self._handle_cancellation_logic()
-                raise
+                return self._order_state.to_dict()
+            if auto_approved:
+                workflow.logger.info(f"Order {self._order_state.id} auto-approved by rules.")
+            else:
+                # Pending Approval & Wait for Signal
+                self._update_status(OrderStatus.PENDING_APPROVAL)
+                self._timings.start("approval_wait")
+                try:
+                    await self._scope.run(workflow.start_activity(
+                        notify_manager,
+                        self._order_state.id,
+                        start_to_close_timeout=timedelta(seconds=30),
+                        heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                    ))
+                except ActivityError:
+                    if not self._is_cancelled:
+                        raise
+
+                workflow.logger.info(f"Order {self._order_state.id} waiting for approval signal.")
+                try:
+                    # Wait indefinitely (or add a timeout) for the decision signal; cancel_order also wakes us
+                    await workflow.wait_condition(lambda: self._approval_decision is not None or self._is_cancelled)
+                except CancelledError:
+                    workflow.logger.info(f"Workflow cancelled while waiting for approval for {self._order_state.id}.")
+                    self._update_status(OrderStatus.CANCELLED)
+                    await self._handle_cancellation_logic()
+                    raise
 
             # Check cancellation signal received while waiting
             if self._is_cancelled:
                  workflow.logger.info(f"Handling cancellation after wait_condition for {self._order_state.id}.")
                  await self._handle_cancellation_logic()
-                 return self._order_state.model_dump()
+                 return self._order_state.to_dict()
 
             # 3. Process Decision
             workflow.logger.info(f"Received decision '{self._approval_decision}' for order {self._order_state.id}.")
             if self._approval_decision == "approved":
                 self._update_status(OrderStatus.APPROVED)
-                await workflow.start_activity(
-                    process_approved_order,
-                    self._order_state.id,
-                    start_to_close_timeout=timedelta(minutes=5), # Longer timeout for processing
-                )
+                # History ghi trước khi có child workflow chỉ có activity process_approved_order
+                if workflow.patched("child-workflow-fulfilment"):
+                    await self._fulfil_order()
+                else:
+                    await workflow.start_activity(
+                        process_approved_order,
+                        self._order_state.id,
+                        start_to_close_timeout=timedelta(minutes=5), # Longer timeout for processing
+                    )
             elif self._approval_decision == "rejected":
                 self._update_status(OrderStatus.REJECTED)
+                self._timings.start("rejection")
                 await workflow.start_activity(
                     notify_rejection,
                     self._order_state.id,
@@ -153,11 +224,217 @@ class OrderApprovalWorkflow:
         finally:
             # This block executes whether the workflow succeeds, fails, or is cancelled
             workflow.logger.info(f"Workflow finished for order {self._order_state.id} with final status {self._order_state.status}")
+            self._timings.finish()
+            self._timings.emit(self._order_state.status)
             # Cleanup specific to cancellation might be handled within the cancellation checks/handler
             # if self._is_cancelled:
             #      await self._handle_cancellation_logic()
 
-        return self._order_state.model_dump()
+        return self._order_state.to_dict()
+
+    async def _try_auto_approve(self) -> bool:
+        """Evaluates the approval rules; sets the decision to approved when they all pass."""
+        self._timings.start("auto_approval")
+        order_data = self._order_state.to_dict()
+        if workflow.patched("approval-rules-activity"):
+            try:
+                decision = await self._scope.run(workflow.start_activity(
+                    evaluate_approval_rules,
+                    order_data,
+                    start_to_close_timeout=timedelta(seconds=10),
+                ))
+            except ActivityError as e:
+                # Không đánh giá được rule (hoặc cancel_order) -> duyệt thủ công
+                workflow.logger.warning(f"Approval rules evaluation failed for order {self._order_state.id}: {e}")
+                self._auto_approval_reasons = ["approval rules unavailable"]
+                return False
+        else:
+            decision = await self._evaluate_rules_in_workflow(order_data)
+
+        self._auto_approval_reasons = list(decision.reasons)
+        if not decision.auto_approve:
+            workflow.logger.info(
+                f"Order {self._order_state.id} needs manual approval (rules v{decision.rules_version}): "
+                f"{'; '.join(decision.reasons)}"
+            )
+            return False
+        self._approval_decision = "approved"
+        return True
+
+    async def _evaluate_rules_in_workflow(self, order_data: dict) -> Decision:
+        """
+        Rules evaluated in workflow code, for workflows started before the
+        approval-rules-activity patch; needs the rules preloaded by the worker.
+        """
+        rules = get_rules()
+        velocity = None
+        if rules.needs_velocity:
+            try:
+                result = await self._scope.run(workflow.start_activity(
+                    record_customer_order,
+                    order_data,
+                    start_to_close_timeout=timedelta(seconds=10),
+                ))
+                velocity = Velocity(**result)
+            except ActivityError as e:
+                # Không có dữ liệu velocity -> rule velocity sẽ đưa đơn về duyệt thủ công
+                workflow.logger.warning(f"Velocity lookup failed for order {self._order_state.id}: {e}")
+        return rules.evaluate(order_data, velocity)
+
+    async def _fulfil_order(self):
+        """
+        Runs PaymentWorkflow and InventoryWorkflow as concurrent child workflows.
+        Inventory reservation overlaps payment authorization; the reservation is
+        committed once payment completes, otherwise both sides are compensated.
+        """
+        order = self._order_state
+        now = workflow.now().isoformat()
+        payment_id = f"{order.id}-payment"
+        payment_input = {
+            "id": payment_id,
+            "order_id": order.id,
+            "amount": order.total_amount,
+            "method": order.payment_method or "CREDIT_CARD",
+            "created_at": now,
+            "updated_at": now,
+            # Child payment returns right after processing instead of holding for refunds
+            "hold_for_refund": False,
+        }
+
+        # Gộp các dòng cùng sản phẩm; số lượng âm = trừ kho khi commit
+        quantities = order.quantities_by_product()
+        inventory_params = {
+            "order_id": f"inventory_{order.id}",
+            "inventory_updates": [
+                {"product_id": product_id, "quantity_change": -quantity, "order_id": order.id}
+                for product_id, quantity in quantities.items()
+            ],
+        }
+
+        self._update_status(OrderStatus.PAYMENT_PENDING)
+        self._timings.start("payment")
+        payment_handle, inventory_handle = await asyncio.gather(
+            workflow.start_child_workflow(
+                "PaymentWorkflow",
+                payment_input,
+                id=f"payment_{payment_id}",
+                task_queue=PAYMENT_TASK_QUEUE,
+            ),
+            workflow.start_child_workflow(
+                "InventoryWorkflow",
+                inventory_params,
+                id=f"inventory_{order.id}",
+                task_queue=INVENTORY_TASK_QUEUE,
+            ),
+        )
+        order.payment_id = payment_id
+
+        # Đơn mới: inventory trả về một lease ngay khi đặt trước xong; workflow này
+        # commit hoặc trả lease sau khi có kết quả thanh toán
+        use_leases = workflow.patched("inventory-leases")
+        payment_result = None
+        inventory_lease_id = None
+        try:
+            try:
+                payment_result = await payment_handle
+            except ChildWorkflowError as e:
+                workflow.logger.error(f"Payment child workflow failed for order {order.id}: {e}")
+            payment_ok = bool(payment_result) and payment_result.get("status") == "COMPLETED"
+
+            # Phần còn lại: chờ inventory (đã chạy song song) rồi commit hoặc trả hàng
+            self._timings.start("inventory")
+            if payment_ok:
+                self._update_status(OrderStatus.PAYMENT_COMPLETED)
+                if not use_leases and not inventory_handle.done():
+                    await inventory_handle.signal("commit")
+            else:
+                # Thanh toán thất bại -> giải phóng hàng đã đặt trước
+                await self._compensate(inventory_handle=inventory_handle)
+
+            inventory_result = None
+            try:
+                inventory_result = await inventory_handle
+            except ChildWorkflowError as e:
+                workflow.logger.error(f"Inventory child workflow failed for order {order.id}: {e}")
+
+            if use_leases:
+                inventory_lease_id = _lease_id(inventory_result)
+                if payment_ok:
+                    inventory_ok = inventory_lease_id is not None and await self._commit_inventory_lease(inventory_lease_id)
+                else:
+                    if inventory_lease_id is not None:
+                        await self._compensate(inventory_lease_id=inventory_lease_id)
+                    inventory_ok = False
+            else:
+                inventory_ok = bool(inventory_result) and inventory_result.get("status") == "COMPLETED"
+        except (asyncio.CancelledError, CancelledError):
+            workflow.logger.info(f"Workflow cancelled during fulfilment for order {order.id}, compensating.")
+            self._timings.start("compensation")
+            paid = bool(payment_result) and payment_result.get("status") == "COMPLETED"
+            if use_leases and inventory_lease_id is None and inventory_handle.done() \
+                    and not inventory_handle.cancelled() and inventory_handle.exception() is None:
+                inventory_lease_id = _lease_id(inventory_handle.result())
+            await self._compensate(payment_result if paid else None, inventory_handle, inventory_lease_id)
+            raise
+
+        if payment_ok and inventory_ok:
+            workflow.logger.info(f"Order {order.id} paid and inventory committed.")
+            self._update_status(OrderStatus.PROCESSING)
+            return
+
+        workflow.logger.warning(
+            f"Fulfilment failed for order {order.id} "
+            f"(payment ok: {payment_ok}, inventory ok: {inventory_ok})."
+        )
+        if payment_ok:
+            # Inventory đã tự rollback (hoặc lease đã hết hạn); chỉ còn hoàn tiền
+            self._timings.start("compensation")
+            await self._compensate(payment_result)
+        self._update_status(OrderStatus.FULFILLMENT_FAILED)
+
+    async def _commit_inventory_lease(self, lease_id: str) -> bool:
+        """Commits the inventory lease; False when it already expired or could not be committed."""
+        try:
+            await workflow.start_activity(
+                "commit_inventory_lease",
+                lease_id,
+                task_queue=INVENTORY_TASK_QUEUE,
+                start_to_close_timeout=timedelta(seconds=15),
+                heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                retry_policy=COMPENSATION_RETRY_POLICY,
+            )
+            return True
+        except ActivityError as e:
+            workflow.logger.error(f"Failed to commit inventory lease {lease_id} for order {self._order_state.id}: {e}")
+            return False
+
+    async def _compensate(self, payment_result: dict | None = None, inventory_handle=None,
+                          inventory_lease_id: str | None = None):
+        """Runs all applicable compensations concurrently."""
+        compensations = []
+        if payment_result:
+            compensations.append(workflow.start_activity(
+                "refund_payment",
+                payment_result,
+                task_queue=PAYMENT_TASK_QUEUE,
+                start_to_close_timeout=timedelta(seconds=30),
+                heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                retry_policy=COMPENSATION_RETRY_POLICY,
+            ))
+        if inventory_handle is not None and not inventory_handle.done():
+            compensations.append(inventory_handle.signal("cancel"))
+        if inventory_lease_id is not None:
+            compensations.append(workflow.start_activity(
+                "release_inventory_lease",
+                inventory_lease_id,
+                task_queue=INVENTORY_TASK_QUEUE,
+                start_to_close_timeout=timedelta(seconds=10),
+                retry_policy=COMPENSATION_RETRY_POLICY,
+            ))
+        results = await asyncio.gather(*compensations, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                workflow.logger.error(f"Compensation failed for order {self._order_state.id}: {result}")
 
     def _update_status(self, new_status: OrderStatus):
         if self._order_state:
@@ -169,6 +446,7 @@ class OrderApprovalWorkflow:
         """Runs cleanup activity specific to cancellation."""
         if self._order_state:
             workflow.logger.info(f"Running cancellation handling activity for order {self._order_state.id}")
+            self._timings.start("cancellation")
             await workflow.start_activity(
                 handle_cancellation,
                 self._order_state.id,
@@ -188,7 +466,22 @@ class OrderApprovalWorkflow:
         """Returns the full order state."""
         if not self._order_state:
              return None
-        return self._order_state.model_dump()
+        return self._order_state.to_dict()
+
+    @workflow.query
+    def get_timings(self) -> dict:
+        """Returns the start/end time and duration of every stage reached so far."""
+        return self._timings.to_dict()
+
+    @workflow.query
+    def get_validation_errors(self) -> list:
+        """Returns every per-line validation error of the order."""
+        return self._validation_errors
+
+    @workflow.query
+    def get_auto_approval_reasons(self) -> list:
+        """Returns why the approval rules sent the order to manual approval."""
+        return self._auto_approval_reasons
 
     @workflow.signal
     async def provide_decision(self, decision: str):
@@ -209,6 +502,10 @@ class OrderApprovalWorkflow:
         # Only allow cancellation before a final decision or state
         if self._order_state and self._order_state.status not in [
             OrderStatus.APPROVED,
+            OrderStatus.PAYMENT_PENDING,
+            OrderStatus.PAYMENT_COMPLETED,
+            OrderStatus.PROCESSING,
+            OrderStatus.FULFILLMENT_FAILED,
             OrderStatus.REJECTED,
             OrderStatus.VALIDATION_FAILED,
             OrderStatus.AUTO_REJECTED,
@@ -218,8 +515,9 @@ class OrderApprovalWorkflow:
             if not self._is_cancelled:
                  workflow.logger.info(f"Received cancellation signal for order {self._order_state.id}")
                  self._is_cancelled = True
-                 # The main workflow logic will check _is_cancelled at await points
-                 # or explicitly call _handle_cancellation_logic
+                 # Interrupt whatever activity is running now instead of waiting for it to finish;
+                 # the main workflow logic then checks _is_cancelled and runs _handle_cancellation_logic
+                 self._scope.cancel()
                  # We might set status to CANCELLED immediately or let the main flow handle it.
                  # Setting it here can be simpler if cancellation is immediate.
                  self._update_status(OrderStatus.CANCELLED)
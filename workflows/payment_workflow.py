@@ -2,18 +2,15 @@ from temporalio import workflow
 from temporalio.common import RetryPolicy
 from temporalio.exceptions import ActivityError, ApplicationError, CancelledError
 from datetime import timedelta
-import sys
-import os
 import asyncio
 
-# Adjust the import path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-
-from models.payment import Payment, PaymentStatus
-
-# Define activities stub
+# Define activities stub. Models are passed through as well so the sandbox does
+# not re-import them (and rebuild the pydantic schemas) for every workflow run.
 with workflow.unsafe.imports_passed_through():
+    from models.payment import Payment, PaymentStatus
     from activities.payment_activities import process_payment, refund_payment, verify_payment_status
+    from workflows.cancellation import ACTIVITY_HEARTBEAT_TIMEOUT
+    from workflows.timings import StageTimings
 
 @workflow.defn(name="PaymentWorkflow")
 class PaymentWorkflow:
@@ -21,6 +18,8 @@ class PaymentWorkflow:
         self._payment_state = None
         self._is_cancelled = False
         self._refund_requested = False
+        # Thời gian từng giai đoạn (query get_timings, ghi ra metrics khi kết thúc)
+        self._timings = StageTimings()
         
         # Define RetryPolicy
         self._payment_retry_policy = RetryPolicy(
@@ -40,21 +39,25 @@ class PaymentWorkflow:
         Returns:
             Dictionary containing final payment state
         """
+        # Khi chạy như child workflow của OrderApprovalWorkflow, không giữ workflow chờ hoàn tiền
+        hold_for_refund = payment_input.pop("hold_for_refund", True)
         self._payment_state = Payment(**payment_input)
         workflow.logger.info(f"Starting PaymentWorkflow for payment: {self._payment_state.id}, order: {self._payment_state.order_id}")
 
         try:
             # 1. Xử lý thanh toán
             workflow.logger.info(f"Processing payment {self._payment_state.id}")
+            self._timings.start("processing")
             try:
-                payment_result = await workflow.start_activity(
+                # Activity nhận và trả về Payment; data converter (models/converter.py)
+                # encode/decode model trực tiếp, không cần dựng lại từ dict
+                self._payment_state = await workflow.start_activity(
                     process_payment,
-                    self._payment_state.to_dict(),
+                    self._payment_state,
                     retry_policy=self._payment_retry_policy,
                     start_to_close_timeout=timedelta(seconds=30),
+                    heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
                 )
-                # Cập nhật trạng thái thanh toán
-                self._payment_state = Payment(**payment_result)
                 workflow.logger.info(f"Payment {self._payment_state.id} processed, status: {self._payment_state.status}")
             
             except ApplicationError as e:
@@ -76,12 +79,14 @@ class PaymentWorkflow:
             # 2. Đợi xác nhận thanh toán nếu cần thiết (nếu đang trong trạng thái PROCESSING)
             if self._payment_state.status == PaymentStatus.PROCESSING:
                 workflow.logger.info(f"Verifying payment status for {self._payment_state.id}")
+                self._timings.start("verification")
                 try:
                     verification_result = await workflow.start_activity(
                         verify_payment_status,
                         self._payment_state.id,
                         self._payment_state.transaction_id or "UNKNOWN",
                         start_to_close_timeout=timedelta(seconds=20),
+                        heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
                     )
                     
                     # Cập nhật trạng thái
@@ -93,7 +98,8 @@ class PaymentWorkflow:
                     # Giữ nguyên trạng thái PROCESSING
             
             # 3. Đợi yêu cầu hoàn tiền nếu thanh toán đã hoàn thành
-            if self._payment_state.status == PaymentStatus.COMPLETED:
+            if self._payment_state.status == PaymentStatus.COMPLETED and hold_for_refund:
+                self._timings.start("refund_wait")
                 try:
                     # Đợi có hạn chế 1 ngày
                     refund_timeout = timedelta(days=1)
@@ -102,14 +108,14 @@ class PaymentWorkflow:
                         
                         if self._refund_requested:
                             workflow.logger.info(f"Processing refund for payment {self._payment_state.id}")
+                            self._timings.start("refund")
                             try:
-                                refund_result = await workflow.start_activity(
+                                self._payment_state = await workflow.start_activity(
                                     refund_payment,
-                                    self._payment_state.to_dict(),
+                                    self._payment_state,
                                     start_to_close_timeout=timedelta(seconds=30),
+                                    heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
                                 )
-                                # Cập nhật trạng thái
-                                self._payment_state = Payment(**refund_result)
                                 workflow.logger.info(f"Refund for payment {self._payment_state.id} processed, status: {self._payment_state.status}")
                             
                             except Exception as e:
@@ -130,6 +136,10 @@ class PaymentWorkflow:
             if not self._is_cancelled:
                 self._payment_state.status = PaymentStatus.FAILED
             raise
+
+        finally:
+            self._timings.finish()
+            self._timings.emit(self._payment_state.status)
         
         workflow.logger.info(f"Payment workflow completed for payment {self._payment_state.id} with final status {self._payment_state.status}")
         return self._payment_state.to_dict()
@@ -148,6 +158,11 @@ class PaymentWorkflow:
             return {}
         return self._payment_state.to_dict()
 
+    @workflow.query
+    def get_timings(self) -> dict:
+        """Start/end time and duration of every stage reached so far"""
+        return self._timings.to_dict()
+
     @workflow.signal
     async def cancelPayment(self, reason: str):
         """Signal to cancel the payment workflow"""
@@ -168,17 +183,17 @@ class PaymentWorkflow:
         
         self._refund_requested = True
         try:
-            refund_result = await workflow.execute_activity(
+            self._payment_state = await workflow.execute_activity(
                 refund_payment,
-                self._payment_state.to_dict(),
+                self._payment_state,
                 start_to_close_timeout=timedelta(minutes=5),
+                heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
                 retry_policy=RetryPolicy(
                     initial_interval=timedelta(seconds=1),
                     maximum_interval=timedelta(seconds=10),
                     maximum_attempts=3,
                 )
             )
-            self._payment_state = Payment(**refund_result)
         except Exception as e:
             workflow.logger.error(f"Refund failed: {str(e)}")
             raise 
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Cấu hình workflow runner (sandbox) cho worker.
+
+Sandbox của Temporal re-import module workflow cho mỗi lần chạy workflow. Các
+module dưới đây là deterministic (chỉ có model/định nghĩa dữ liệu), nên được
+pass through để chỉ import một lần cho cả process.
+
+Đặt WORKFLOW_SANDBOX=off để dùng UnsandboxedWorkflowRunner - chỉ dùng cho
+deployment tin cậy, nơi code workflow đã được review về tính deterministic.
+"""
+import os
+
+from temporalio.worker import UnsandboxedWorkflowRunner, WorkflowRunner
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner, SandboxRestrictions
+
+# Các module deterministic được import một lần và dùng chung giữa các workflow run
+PASSTHROUGH_MODULES = (
+    "models",
+    "rules",
+    "pydantic",
+    "pydantic_core",
+    "annotated_types",
+    "typing_extensions",
+    "orjson",
+    # TracingInterceptor giữ span hiện tại trong contextvars của opentelemetry
+    "opentelemetry",
+)
+
+
+def passthrough_restrictions() -> SandboxRestrictions:
+    """Default sandbox restrictions plus the project's deterministic modules."""
+    return SandboxRestrictions.default.with_passthrough_modules(*PASSTHROUGH_MODULES)
+
+
+def sandbox_enabled() -> bool:
+    return os.getenv("WORKFLOW_SANDBOX", "on").lower() not in ("off", "false", "0")
+
+
+def create_workflow_runner() -> WorkflowRunner:
+    """Returns the workflow runner selected by WORKFLOW_SANDBOX."""
+    if not sandbox_enabled():
+        return UnsandboxedWorkflowRunner()
+    return SandboxedWorkflowRunner(restrictions=passthrough_restrictions())
@@ -0,0 +1,146 @@
+"""
+Actor đặt trước cho một SKU bán chạy (flash sale).
+
+Mỗi SKU trong INVENTORY_HOT_SKUS có một SkuReservationWorkflow (id sku_reservation_<SKU>)
+nhận yêu cầu đặt trước qua signal "reserve". Yêu cầu được xếp hàng theo thứ tự đến và
+quyết định theo lô: một activity reserve_sku_batch cho cả lô, rồi kết quả được signal về
+từng InventoryWorkflow đã gửi yêu cầu. Các đơn tranh nhau cùng SKU vì vậy không còn xếp
+hàng chờ khóa/retry trong store, mà được xử lý hàng trăm yêu cầu mỗi lần gọi.
+
+Trong lúc một lô đang chạy, yêu cầu mới tiếp tục dồn vào hàng đợi cho lô sau, nên kích
+thước lô tự tăng theo tải. History được giới hạn bằng continue-as-new (mang theo các yêu
+cầu chưa xử lý và các lease_id vừa quyết định); actor tự kết thúc khi không có yêu cầu trong IDLE_TIMEOUT và được khởi
+động lại bởi signal-with-start tiếp theo.
+
+Activity request_sku_reservation được retry có thể gửi lại một yêu cầu đã được quyết định
+(vd. signal-with-start thành công nhưng activity timeout). Actor nhớ RECENT_DECISIONS
+lease_id gần nhất đã lấy vào lô và bỏ qua yêu cầu trùng, để một lease không được đặt
+trước hai lần sau khi nó đã commit hoặc release.
+"""
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
+from collections import deque
+from datetime import timedelta
+import asyncio
+from typing import Dict, List
+
+with workflow.unsafe.imports_passed_through():
+    from activities.inventory_activities import reserve_sku_batch
+    from workflows.cancellation import ACTIVITY_HEARTBEAT_TIMEOUT
+
+# Số yêu cầu tối đa trong một activity reserve_sku_batch
+MAX_BATCH_SIZE = 500
+# Continue-as-new khi history vượt ngưỡng này (hoặc khi server gợi ý)
+MAX_HISTORY_EVENTS = 10_000
+IDLE_TIMEOUT = timedelta(minutes=10)
+# Số lease_id đã quyết định được nhớ (và mang qua continue-as-new) để bỏ qua yêu cầu gửi lại
+RECENT_DECISIONS = 2_000
+# Signal trên InventoryWorkflow nhận kết quả
+REPLY_SIGNAL = "sku_reservation_decided"
+
+
+@workflow.defn(name="SkuReservationWorkflow")
+class SkuReservationWorkflow:
+    def __init__(self):
+        self._pending: List[Dict] = []
+        self._pending_ids = set()
+        self._decided = 0
+        # lease_id đã lấy vào lô, cũ nhất trước; chỉ ghi khi có patch "sku-actor-dedupe"
+        self._recent_order = deque()
+        self._recent_ids = set()
+
+    @workflow.run
+    async def run(self, params: Dict) -> Dict:
+        product_id = params["product_id"]
+        remember_decided = workflow.patched("sku-actor-dedupe")
+        if remember_decided:
+            self._remember(params.get("recent_lease_ids", []))
+            # Signal khởi động có thể là yêu cầu gửi lại của một lease lần chạy trước đã quyết định
+            self._pending = [r for r in self._pending if r["lease_id"] not in self._recent_ids]
+            self._pending_ids = {r["lease_id"] for r in self._pending}
+        # Yêu cầu chưa xử lý từ lần chạy trước đứng trước các signal mới
+        carried = [r for r in params.get("pending", []) if r["lease_id"] not in self._pending_ids]
+        self._pending[:0] = carried
+        self._pending_ids.update(r["lease_id"] for r in carried)
+
+        while True:
+            try:
+                await workflow.wait_condition(lambda: bool(self._pending), timeout=IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if self._pending:
+                    continue
+                workflow.logger.info(f"Reservation actor for {product_id} idle, stopping after {self._decided} requests")
+                return {"product_id": product_id, "decided": self._decided}
+
+            batch = self._pending[:MAX_BATCH_SIZE]
+            del self._pending[:MAX_BATCH_SIZE]
+            self._pending_ids.difference_update(r["lease_id"] for r in batch)
+            if remember_decided:
+                self._remember(r["lease_id"] for r in batch)
+
+            decisions = await self._decide(product_id, batch)
+            await self._reply(batch, decisions)
+            self._decided += len(batch)
+
+            info = workflow.info()
+            if info.is_continue_as_new_suggested() or info.get_current_history_length() > MAX_HISTORY_EVENTS:
+                workflow.logger.info(f"Reservation actor for {product_id} continuing as new ({len(self._pending)} pending)")
+                workflow.continue_as_new({
+                    "product_id": product_id,
+                    "pending": self._pending,
+                    "recent_lease_ids": list(self._recent_order),
+                })
+
+    def _remember(self, lease_ids):
+        """Records lease ids as decided, forgetting the oldest beyond RECENT_DECISIONS."""
+        for lease_id in lease_ids:
+            if lease_id in self._recent_ids:
+                continue
+            if len(self._recent_order) >= RECENT_DECISIONS:
+                self._recent_ids.discard(self._recent_order.popleft())
+            self._recent_order.append(lease_id)
+            self._recent_ids.add(lease_id)
+
+    async def _decide(self, product_id: str, batch: List[Dict]) -> List[Dict]:
+        """Decides one batch; every request fails if the inventory service stays unavailable."""
+        try:
+            return await workflow.execute_activity(
+                reserve_sku_batch,
+                {"product_id": product_id, "requests": batch},
+                start_to_close_timeout=timedelta(seconds=30),
+                heartbeat_timeout=ACTIVITY_HEARTBEAT_TIMEOUT,
+                retry_policy=RetryPolicy(maximum_attempts=5, maximum_interval=timedelta(seconds=5)),
+            )
+        except ActivityError as e:
+            workflow.logger.error(f"Reservation batch of {len(batch)} for {product_id} failed: {e}")
+            return [
+                {"lease_id": request["lease_id"], "status": "FAILED", "reason": "Service unavailable"}
+                for request in batch
+            ]
+
+    async def _reply(self, batch: List[Dict], decisions: List[Dict]):
+        """Signals each requester its decision; requesters that already closed are skipped."""
+        results = await asyncio.gather(*(
+            workflow.get_external_workflow_handle(
+                request["reply_to"]["workflow_id"], run_id=request["reply_to"].get("run_id")
+            ).signal(REPLY_SIGNAL, decision)
+            for request, decision in zip(batch, decisions)
+        ), return_exceptions=True)
+        for request, result in zip(batch, results):
+            if isinstance(result, BaseException):
+                workflow.logger.warning(f"Could not deliver reservation {request['lease_id']}: {result}")
+
+    @workflow.signal
+    async def reserve(self, request: Dict):
+        """Queues a reservation request; duplicates of a queued or recently decided lease_id are ignored."""
+        if request["lease_id"] in self._pending_ids or request["lease_id"] in self._recent_ids:
+            workflow.logger.info(f"Ignoring duplicate reservation request {request['lease_id']}")
+            return
+        self._pending_ids.add(request["lease_id"])
+        self._pending.append(request)
+
+    @workflow.query
+    def get_pending(self) -> int:
+        """Number of queued reservation requests."""
+        return len(self._pending)
@@ -0,0 +1,78 @@
+"""
+Thời gian của từng giai đoạn trong một workflow run (validation, chờ duyệt, thanh toán...).
+
+Mốc thời gian lấy từ workflow.now(), nên deterministic: replay cho ra đúng các mốc đã
+ghi, và query get_timings trả về cùng một kết quả trên mọi worker. Mỗi lần start()
+đóng giai đoạn đang chạy và mở giai đoạn mới; finish() đóng giai đoạn cuối.
+
+Khi workflow kết thúc, emit() ghi thời gian mỗi giai đoạn vào:
+    workflow_stage_duration{workflow_type, stage}   histogram (ms) qua metric meter của
+                                                    workflow (exporter của worker, metrics/worker.py)
+    STAGE_TIMINGS_PATH                              một dòng JSONL cho mỗi workflow run
+                                                    (metrics/stage_timings.py, báo cáo p50/p95/p99)
+Cả hai đều bị bỏ qua khi replay, nên mỗi run chỉ được ghi một lần và history không đổi.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from temporalio import workflow
+
+from metrics import stage_timings
+
+
+class StageTimings:
+    __slots__ = ("_stages", "_current", "_current_start")
+
+    def __init__(self):
+        # (stage, bắt đầu, kết thúc), epoch seconds theo giờ của workflow
+        self._stages: List[Tuple[str, float, float]] = []
+        self._current: Optional[str] = None
+        self._current_start = 0.0
+
+    def start(self, stage: str):
+        """Ends the running stage and starts `stage` at the current workflow time."""
+        now = workflow.now().timestamp()
+        if self._current is not None:
+            self._stages.append((self._current, self._current_start, now))
+        self._current = stage
+        self._current_start = now
+
+    def finish(self):
+        """Ends the running stage, if any."""
+        if self._current is not None:
+            self._stages.append((self._current, self._current_start, workflow.now().timestamp()))
+            self._current = None
+
+    def to_dict(self) -> Dict:
+        """Finished stages plus the running one, for the get_timings query."""
+        stages = [
+            {"stage": stage, "started_at": start, "ended_at": end, "duration_ms": round((end - start) * 1000, 3)}
+            for stage, start, end in self._stages
+        ]
+        return {
+            "stages": stages,
+            "current_stage": self._current,
+            "current_stage_started_at": self._current_start if self._current is not None else None,
+        }
+
+    def emit(self, outcome: Any):
+        """Records the stage durations to the workflow metrics and the stage timings sink."""
+        if workflow.unsafe.is_replaying():
+            return
+        info = workflow.info()
+        histogram = workflow.metric_meter().create_histogram(
+            "workflow_stage_duration", "Time spent in each workflow stage", "ms",
+        )
+        for stage, start, end in self._stages:
+            histogram.record(int((end - start) * 1000), {"stage": stage})
+        entry = {
+            "workflow_type": info.workflow_type,
+            "workflow_id": info.workflow_id,
+            "run_id": info.run_id,
+            # Enum trạng thái (OrderStatus, PaymentStatus) hoặc chuỗi
+            "outcome": getattr(outcome, "value", outcome),
+            "completed_at": workflow.now().timestamp(),
+            "stages": [[stage, start, end] for stage, start, end in self._stages],
+        }
+        # Sandbox chặn open() kể cả trong module pass through; ghi file ở đây không ảnh hưởng tính deterministic
+        with workflow.unsafe.sandbox_unrestricted():
+            stage_timings.record(entry)